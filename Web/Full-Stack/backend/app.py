@@ -23,6 +23,18 @@ def create_app():
     
     # Initialize JWT authentication
     jwt = JWTManager(app)
+    
+    # Initialize dashboard metrics cache (invalidated on commit of changed tables)
+    from utils.metrics_cache import metrics_cache
+    metrics_cache.init_app(app)
+
+    # Per-request SQL count/time instrumentation (Server-Timing, logs, per-route percentiles)
+    from utils.request_metrics import request_metrics
+    request_metrics.init_app(app)
+
+    # Count SQL statements per request against endpoint query budgets
+    from utils import query_budget
+    query_budget.init_app(app)
 
     # ========================================================================
     # Health Check Endpoint
@@ -55,6 +67,17 @@ def create_app():
     # Course management routes
     app.register_blueprint(courses_bp, url_prefix="/api/courses")
 
+    # ========================================================================
+    # CLI Commands
+    # ========================================================================
+    from cli import finance_cli, worker
+
+    # flask finance ...
+    app.cli.add_command(finance_cli)
+
+    # flask worker (background jobs)
+    app.cli.add_command(worker)
+
     # ========================================================================
     # Error Handlers
     # ========================================================================
@@ -0,0 +1,15 @@
+"""
+================================================================================
+BENCHMARKS
+================================================================================
+Synthetic data generator (benchmarks/generator.py) and route benchmark
+harness (benchmarks/harness.py) for measuring the API at production scale.
+Run from the backend directory:
+
+    python -m benchmarks generate --students 50000 --database-uri sqlite:///bench.db
+    python -m benchmarks run --database-uri sqlite:///bench.db --output bench.json
+    python -m benchmarks run --database-uri sqlite:///bench.db --baseline bench.json
+
+Never point --database-uri at a database you want to keep: generate drops
+every table first.
+"""
@@ -0,0 +1,107 @@
+"""
+Command line entry point: python -m benchmarks {generate,run}
+"""
+
+import json
+import os
+import time
+
+import click
+
+
+def _create_app(database_uri):
+    # config.py reads DATABASE_URI at import time, so set it before importing the app
+    if database_uri:
+        os.environ['DATABASE_URI'] = database_uri
+    from app import create_app
+
+    return create_app()
+
+
+def _range(value):
+    low, _, high = value.partition('-')
+    return int(low), int(high or low)
+
+
+@click.group()
+def cli():
+    """Synthetic data generator and route benchmarks."""
+
+
+@cli.command()
+@click.option('--database-uri', help='Target database (default: DATABASE_URI / config.py). Its tables are dropped.')
+@click.option('--students', default=1000, show_default=True, help='Students to generate.')
+@click.option('--courses-per-faculty', default=15, show_default=True)
+@click.option('--enrollments', default='2-5', show_default=True, help='Enrollments per student (MIN-MAX).')
+@click.option('--payments', default='0-3', show_default=True, help='Payments per student (MIN-MAX).')
+@click.option('--bank-transactions', type=int, default=None, help='Bank statement lines (default: students / 4).')
+@click.option('--seed', default=42, show_default=True)
+@click.option('--chunk-size', default=5000, show_default=True, help='Rows per INSERT batch.')
+@click.option('--yes', is_flag=True, help='Do not ask before dropping the tables.')
+def generate(database_uri, students, courses_per_faculty, enrollments, payments, bank_transactions, seed, chunk_size, yes):
+    """Drop all tables and load a synthetic university."""
+    from benchmarks.generator import generate as generate_data
+
+    app = _create_app(database_uri)
+    with app.app_context():
+        from models import db
+
+        if not yes:
+            click.confirm(f"Drop every table in {db.engine.url.render_as_string(hide_password=True)}?", abort=True)
+        started = time.perf_counter()
+        counts = generate_data(
+            students=students,
+            courses_per_faculty=courses_per_faculty,
+            enrollments=_range(enrollments),
+            payments=_range(payments),
+            bank_transactions=bank_transactions,
+            seed=seed,
+            chunk_size=chunk_size
+        )
+    for table, count in counts.items():
+        click.echo(f"{table:<18} {count:>10}")
+    click.echo(f"Generated in {time.perf_counter() - started:.1f}s")
+
+
+@cli.command()
+@click.option('--database-uri', help='Database to benchmark (default: DATABASE_URI / config.py).')
+@click.option('--requests', default=20, show_default=True, help='Timed requests per route.')
+@click.option('--warmup', default=2, show_default=True, help='Untimed requests per route.')
+@click.option('--route', 'route_filter', help='Only routes containing this text.')
+@click.option('--output', type=click.Path(dir_okay=False), help='Write the results as JSON.')
+@click.option('--baseline', type=click.Path(exists=True, dir_okay=False), help='Earlier --output to compare with.')
+@click.option('--tolerance', default=0.2, show_default=True, help='Allowed relative p95 growth against the baseline.')
+def run(database_uri, requests, warmup, route_filter, output, baseline, tolerance):
+    """Benchmark every GET route; exit 1 on regressions against --baseline."""
+    from benchmarks.harness import run as run_benchmarks, compare
+
+    app = _create_app(database_uri)
+    results = run_benchmarks(app, requests=requests, warmup=warmup, route_filter=route_filter)
+
+    click.echo(f"{'route':<58} {'status':>6} {'p50 ms':>9} {'p95 ms':>9} {'stmts':>6}")
+    for row in results:
+        if 'skipped' in row:
+            click.echo(f"{row['route']:<58} {'skip':>6}  ({row['skipped']})")
+        elif 'error' in row:
+            click.echo(f"{row['route']:<58} {row['status_code']:>6}  ERROR ({row['error']})")
+        else:
+            click.echo(f"{row['route']:<58} {row['status_code']:>6} {row['p50_ms']:>9.2f} "
+                       f"{row['p95_ms']:>9.2f} {row['statements']:>6}")
+
+    if output:
+        with open(output, 'w') as handle:
+            json.dump(results, handle, indent=2)
+        click.echo(f"Results written to {output}")
+
+    if baseline:
+        with open(baseline) as handle:
+            regressions = compare(results, json.load(handle), tolerance=tolerance)
+        for route, message in regressions:
+            click.echo(f"REGRESSION {route}: {message}")
+        if regressions:
+            raise SystemExit(1)
+        click.echo("No regressions against the baseline")
+
+
+if __name__ == '__main__':
+    cli()
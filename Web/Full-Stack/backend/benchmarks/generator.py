@@ -0,0 +1,234 @@
+"""
+================================================================================
+SYNTHETIC UNIVERSITY GENERATOR
+================================================================================
+Fills an empty schema with a university of configurable size: faculties,
+courses, fee structures, students, enrollments, payments, penalties,
+notifications and bank transactions.
+
+Rows are built in Python with explicit ids and written with executemany
+INSERTs of chunk_size rows, so 100k students load in seconds on SQLite and
+well under a minute on a local MySQL. Student balances follow the ledger
+rules (fees + penalties - received payments) and the ledger summary table
+is rebuilt at the end, so every endpoint sees consistent data. The same
+seed always produces the same data.
+"""
+
+import random
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert, text
+
+from models import (
+    db, User, Faculty, Course, Enrollment, Payment, Penalty, Notification, FeeStructure, BankTransaction
+)
+from services.ledger import LedgerService
+
+
+FACULTIES = (
+    ("Computer and Information Sciences", "CIS"),
+    ("Digital Arts and Design", "DAD"),
+    ("Business Informatics", "BI"),
+    ("Engineering", "ENG"),
+)
+
+FEE_STRUCTURES = (
+    dict(category="tuition", name="Credit Hour Fee (Standard)", amount=500.0, is_per_credit=True),
+    dict(category="admin", name="Registration Fee", amount=200.0, is_per_credit=False),
+    dict(category="admin", name="Technology Fee", amount=150.0, is_per_credit=False),
+    dict(category="bus", name="Bus Service", amount=300.0, is_per_credit=False),
+    dict(category="other", name="Library Access", amount=50.0, is_per_credit=False),
+)
+
+PAYMENT_METHODS = ("ONLINE", "BANK_TRANSFER", "MANUAL")
+
+FIRST_NAMES = ("Ahmed", "Sara", "Omar", "Lina", "Yusuf", "Maya", "Adam", "Nour", "Ali", "Huda", "Karim", "Rana")
+LAST_NAMES = ("Khan", "Haddad", "Rahman", "Saleh", "Nasser", "Aziz", "Farouk", "Mansour", "Hamdan", "Qasim")
+
+
+def _insert(model, rows, chunk_size):
+    """executemany INSERT of rows in chunks of chunk_size."""
+    for start in range(0, len(rows), chunk_size):
+        db.session.execute(insert(model), rows[start:start + chunk_size])
+
+
+def generate(students=1000, courses_per_faculty=15, enrollments=(2, 5), payments=(0, 3),
+             bank_transactions=None, seed=42, chunk_size=5000, now=None):
+    """
+    Drop and recreate every table, then load a synthetic university.
+
+    Args:
+        students (int): Number of students
+        courses_per_faculty (int): Courses created per faculty
+        enrollments (tuple): (min, max) enrollments per student
+        payments (tuple): (min, max) payments per student
+        bank_transactions (int): Bank statement lines (default: one per 4 students);
+            about half of them match a received bank transfer
+        seed (int): Random seed
+        chunk_size (int): Rows per INSERT batch
+        now (datetime): Reference "today" (default: current UTC time)
+
+    Returns:
+        dict: Row count per table
+    """
+    rng = random.Random(seed)
+    now = (now or datetime.now(timezone.utc)).replace(tzinfo=None, microsecond=0)
+    if bank_transactions is None:
+        bank_transactions = students // 4
+
+    db.drop_all()
+    db.create_all()
+    if db.engine.dialect.name == 'sqlite':
+        db.session.execute(text('PRAGMA synchronous=OFF'))
+
+    # Hashing is slow; every generated user shares one hash ("pass123" / "admin123")
+    student_hash = User.generate_hash("pass123")
+
+    faculty_rows = [
+        dict(id=index + 1, name=name, code=code, description=f"Faculty of {name}")
+        for index, (name, code) in enumerate(FACULTIES)
+    ]
+    course_rows = []
+    for faculty in faculty_rows:
+        for number in range(courses_per_faculty):
+            credits = rng.choice((2, 3, 3, 4))
+            course_rows.append(dict(
+                id=len(course_rows) + 1,
+                course_id=f"{faculty['code']}{100 + number}",
+                name=f"{faculty['code']} Course {number + 1}",
+                credits=credits,
+                total_fee=credits * 500.0,
+                faculty_id=faculty['id'],
+                description=None
+            ))
+    courses_by_faculty = {}
+    for course in course_rows:
+        courses_by_faculty.setdefault(course['faculty_id'], []).append(course)
+
+    user_rows = [dict(
+        id=1, username="admin", email="admin@example.com", first_name="Finance", last_name="Admin",
+        password_hash=User.generate_hash("admin123"), is_admin=True, dues_balance=0.0, created_at=now
+    )]
+    enrollment_rows, payment_rows, penalty_rows, notification_rows = [], [], [], []
+    bank_transfers = []
+
+    for number in range(students):
+        student_id = number + 2
+        faculty_id = faculty_rows[number % len(faculty_rows)]['id']
+        created_at = now - timedelta(days=rng.randint(0, 900))
+        first_name, last_name = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+
+        fees = 0.0
+        faculty_courses = courses_by_faculty[faculty_id]
+        count = min(rng.randint(*enrollments), len(faculty_courses))
+        for course in rng.sample(faculty_courses, count):
+            status = 'DROPPED' if rng.random() < 0.05 else 'ACTIVE'
+            enrollment_rows.append(dict(
+                id=len(enrollment_rows) + 1,
+                student_id=student_id,
+                course_id=course['id'],
+                course_fee=course['total_fee'],
+                enrollment_date=created_at + timedelta(days=rng.randint(0, 30)),
+                status=status
+            ))
+            if status == 'ACTIVE':
+                fees += course['total_fee']
+
+        paid = 0.0
+        for _ in range(rng.randint(*payments)):
+            if fees - paid <= 0:
+                break
+            amount = round(min(fees - paid, rng.uniform(0.2, 0.6) * fees), 2)
+            method = rng.choice(PAYMENT_METHODS)
+            status = 'PENDING' if method == 'BANK_TRANSFER' and rng.random() < 0.1 else 'RECEIVED'
+            payment = dict(
+                id=len(payment_rows) + 1,
+                student_id=student_id,
+                amount=amount,
+                payment_date=now - timedelta(days=rng.randint(0, 365), hours=rng.randint(0, 23)),
+                payment_method=method,
+                status=status,
+                reference_number=f"TXN{len(payment_rows) + 1:08d}",
+                recorded_by=1,
+                created_at=now
+            )
+            payment_rows.append(payment)
+            if status == 'RECEIVED':
+                paid += amount
+                if method == 'BANK_TRANSFER':
+                    bank_transfers.append(payment)
+
+        penalties = 0.0
+        if fees > 0 and paid / fees < 0.5 and rng.random() < 0.3:
+            penalty_rows.append(dict(
+                id=len(penalty_rows) + 1, student_id=student_id, amount=150.0, penalty_type="LATE_FEE",
+                applied_by=1, applied_at=now - timedelta(days=rng.randint(0, 60)),
+                notes="Late payment penalty for outstanding dues"
+            ))
+            penalties = 150.0
+
+        if rng.random() < 0.2:
+            notification_rows.append(dict(
+                id=len(notification_rows) + 1, student_id=student_id, notification_type="PAYMENT_REMINDER",
+                message="Your tuition payment is due.", is_read=False,
+                created_at=now - timedelta(days=rng.randint(0, 30))
+            ))
+
+        user_rows.append(dict(
+            id=student_id,
+            username=f"{created_at.year % 100}-{100000 + number:06d}",
+            email=f"student{number}@university.edu",
+            first_name=first_name,
+            last_name=last_name,
+            password_hash=student_hash,
+            is_admin=False,
+            faculty_id=faculty_id,
+            dues_balance=round(fees + penalties - paid, 2),
+            has_bus_service=rng.random() < 0.25,
+            created_at=created_at
+        ))
+
+    # Bank statement lines: half mirror received bank transfers, the rest are unknown deposits
+    bank_rows = []
+    for payment in rng.sample(bank_transfers, min(len(bank_transfers), bank_transactions // 2)):
+        bank_rows.append(dict(
+            bank_ref=f"BNK{len(bank_rows) + 1:09d}",
+            amount=payment['amount'],
+            transaction_date=payment['payment_date'] + timedelta(days=rng.randint(0, 3)),
+            bank_description=f"TRANSFER {payment['reference_number']}",
+            status='Unmatched'
+        ))
+    while len(bank_rows) < bank_transactions:
+        bank_rows.append(dict(
+            bank_ref=f"BNK{len(bank_rows) + 1:09d}",
+            amount=round(rng.uniform(100, 5000), 2),
+            transaction_date=now - timedelta(days=rng.randint(0, 365)),
+            bank_description=f"DEPOSIT {rng.choice(LAST_NAMES).upper()}",
+            status='Unmatched'
+        ))
+    for index, row in enumerate(bank_rows):
+        row['id'] = index + 1
+
+    fee_rows = [dict(fee, id=index + 1, is_active=True, display_order=index) for index, fee in enumerate(FEE_STRUCTURES)]
+
+    for model, rows in (
+        (Faculty, faculty_rows), (Course, course_rows), (FeeStructure, fee_rows), (User, user_rows),
+        (Enrollment, enrollment_rows), (Payment, payment_rows), (Penalty, penalty_rows),
+        (Notification, notification_rows), (BankTransaction, bank_rows),
+    ):
+        _insert(model, rows, chunk_size)
+        db.session.commit()
+
+    LedgerService.rebuild()
+
+    return {
+        'faculties': len(faculty_rows),
+        'courses': len(course_rows),
+        'fee_structures': len(fee_rows),
+        'users': len(user_rows),
+        'enrollments': len(enrollment_rows),
+        'payments': len(payment_rows),
+        'penalties': len(penalty_rows),
+        'notifications': len(notification_rows),
+        'bank_transactions': len(bank_rows),
+    }
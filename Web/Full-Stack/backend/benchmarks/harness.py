@@ -0,0 +1,198 @@
+"""
+================================================================================
+ROUTE BENCHMARK HARNESS
+================================================================================
+Times every GET route of the finance, students and courses blueprints
+against the current database and reports p50/p95 latency and SQL statement
+counts per route.
+
+Requests go through the Flask test client in-process, so the numbers cover
+routing, authentication, queries and serialization without network noise.
+Finance and course routes run as the first admin and student routes as a
+student with enrollments and payments. URL parameters (student_id,
+transaction_id, ...) are filled with ids from the loaded data; routes whose
+parameters cannot be filled are reported as skipped. Routes that write
+(POST/PUT/DELETE) are not benchmarked, so a run leaves the data unchanged
+and can be repeated.
+
+Routes answering with a non-2xx status are reported as errors, without
+latency numbers: a route that fails fast is broken, not fast.
+
+Results can be saved as JSON and compared with a previous run: a route
+regresses when its status code changes, its p95 grows beyond the tolerance
+or it runs more statements than before.
+"""
+
+import time
+
+from flask_jwt_extended import create_access_token
+
+from models import db, User, Enrollment, Payment, BankTransaction, Course, GeneratedReport, Job
+from utils import request_metrics
+
+
+BLUEPRINTS = ('finance', 'students', 'courses')
+
+# Query strings for routes that need (or benefit from) parameters
+QUERY_STRINGS = {
+    'finance.get_student_fees': 'student_id={student_id}',
+    'finance.get_recent_payments': 'limit=50',
+    'finance.get_all_students': 'limit=50',
+    'finance.get_bank_reconciliation': 'limit=50',
+}
+
+
+def url_values():
+    """
+    Ids from the loaded data for URL parameters, plus the users to
+    authenticate as.
+
+    Returns:
+        dict: admin_id, student_id (a student with enrollments and payments),
+            transaction_id, payment_id, course_id, report_id and job_id
+            (None when the table is empty)
+    """
+    admin = User.query.filter_by(is_admin=True).order_by(User.id).first()
+    student_id = db.session.query(Payment.student_id).join(
+        Enrollment, Enrollment.student_id == Payment.student_id
+    ).order_by(Payment.student_id).limit(1).scalar()
+    proof = Payment.query.filter(Payment.proof_document.isnot(None)).order_by(Payment.id).first()
+
+    return {
+        'admin_id': admin.id if admin else None,
+        'student_id': student_id,
+        'transaction_id': db.session.query(BankTransaction.id).order_by(BankTransaction.id).limit(1).scalar(),
+        'payment_id': proof.id if proof else None,
+        'course_id': db.session.query(Course.id).order_by(Course.id).limit(1).scalar(),
+        'report_id': db.session.query(GeneratedReport.id).order_by(GeneratedReport.generated_at.desc()).limit(1).scalar(),
+        'job_id': db.session.query(Job.id).order_by(Job.created_at.desc()).limit(1).scalar(),
+    }
+
+
+def benchmark_routes(app):
+    """GET rules of the benchmarked blueprints, sorted by URL."""
+    rules = [
+        rule for rule in app.url_map.iter_rules()
+        if 'GET' in rule.methods and rule.endpoint.split('.')[0] in BLUEPRINTS
+    ]
+    return sorted(rules, key=lambda rule: rule.rule)
+
+
+def _timed_get(app, client, url, headers):
+    """One request; returns (status_code, milliseconds, statements)."""
+    with app.app_context(), client:
+        started = time.perf_counter()
+        response = client.get(url, headers=headers)
+        response.get_data()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        statements = request_metrics.current()['statements']
+    return response.status_code, elapsed_ms, statements
+
+
+def _succeeded(status_code):
+    return 200 <= status_code < 300
+
+
+def run(app, requests=20, warmup=2, route_filter=None):
+    """
+    Benchmark every GET route.
+
+    Args:
+        app: Flask application bound to the benchmark database
+        requests (int): Timed requests per route
+        warmup (int): Untimed requests per route (caches, connection pool)
+        route_filter (str): Only routes containing this text (optional)
+
+    Returns:
+        list: dicts with route, url, status_code, requests, p50_ms, p95_ms,
+            max_ms and statements (max over the timed requests); route, url,
+            status_code (the first non-2xx one), requests, errors (failed
+            requests) and error for routes that failed; or route and
+            skipped (reason)
+    """
+    with app.app_context():
+        values = url_values()
+        tokens = {
+            'admin': create_access_token(identity=str(values['admin_id'])) if values['admin_id'] else None,
+            'student': create_access_token(identity=str(values['student_id'])) if values['student_id'] else None,
+        }
+
+    client = app.test_client()
+    results = []
+    for rule in benchmark_routes(app):
+        if route_filter and route_filter not in rule.rule:
+            continue
+        missing = sorted(name for name in rule.arguments if values.get(name) is None)
+        token = tokens['student' if rule.endpoint.startswith('students.') else 'admin']
+        if missing or token is None:
+            results.append({'route': rule.rule, 'skipped': f"no {', '.join(missing) or 'user'} in the data"})
+            continue
+
+        with app.test_request_context():
+            url = app.url_for(rule.endpoint, **{name: values[name] for name in rule.arguments})
+        if rule.endpoint in QUERY_STRINGS:
+            url = f"{url}?{QUERY_STRINGS[rule.endpoint].format(**values)}"
+        headers = {"Authorization": f"Bearer {token}"}
+
+        for _ in range(warmup):
+            _timed_get(app, client, url, headers)
+        samples = [_timed_get(app, client, url, headers) for _ in range(requests)]
+
+        failed = [sample[0] for sample in samples if not _succeeded(sample[0])]
+        if failed:
+            results.append({
+                'route': rule.rule,
+                'url': url,
+                'status_code': failed[0],
+                'requests': requests,
+                'errors': len(failed),
+                'error': f"HTTP {failed[0]} on {len(failed)} of {requests} requests",
+            })
+            continue
+
+        durations = sorted(sample[1] for sample in samples)
+        results.append({
+            'route': rule.rule,
+            'url': url,
+            'status_code': samples[-1][0],
+            'requests': requests,
+            'p50_ms': round(request_metrics.percentile(durations, 50), 2),
+            'p95_ms': round(request_metrics.percentile(durations, 95), 2),
+            'max_ms': round(durations[-1], 2),
+            'statements': max(sample[2] for sample in samples),
+        })
+    return results
+
+
+def compare(results, baseline, tolerance=0.2, min_delta_ms=2.0):
+    """
+    Routes whose status code changed, or that got slower or run more
+    statements than in a baseline run. Latency and statements are only
+    compared when both runs succeeded.
+
+    Args:
+        results (list): Output of run()
+        baseline (list): Output of an earlier run()
+        tolerance (float): Allowed relative p95 growth (0.2 = 20%)
+        min_delta_ms (float): p95 growth below this is noise, whatever the ratio
+
+    Returns:
+        list: (route, message) pairs
+    """
+    previous = {row['route']: row for row in baseline if 'skipped' not in row}
+    regressions = []
+    for row in results:
+        before = previous.get(row['route'])
+        if 'skipped' in row or before is None:
+            continue
+        if row['status_code'] != before['status_code']:
+            regressions.append((row['route'], f"status {before['status_code']} -> {row['status_code']}"))
+        # Baselines written before errors were separated have timings for failed routes too
+        if 'error' in row or 'error' in before or not _succeeded(before['status_code']):
+            continue
+        if row['statements'] > before['statements']:
+            regressions.append((row['route'], f"statements {before['statements']} -> {row['statements']}"))
+        grown = row['p95_ms'] - before['p95_ms']
+        if row['p95_ms'] > before['p95_ms'] * (1 + tolerance) and grown > min_delta_ms:
+            regressions.append((row['route'], f"p95 {before['p95_ms']}ms -> {row['p95_ms']}ms"))
+    return regressions
@@ -0,0 +1,124 @@
+"""
+================================================================================
+FLASK CLI COMMANDS
+================================================================================
+Maintenance commands for the finance portal, registered on the app by
+create_app(). Run them with the Flask CLI, e.g.:
+
+    flask finance rebuild-ledger
+    flask finance snapshot
+    flask finance enforce --dry-run
+    flask finance check-query-budgets --arg student_id=5
+    flask worker --processes 2
+"""
+
+import click
+from flask import current_app
+from flask.cli import AppGroup, with_appcontext
+
+
+finance_cli = AppGroup('finance', help='Finance maintenance commands.')
+
+
+@finance_cli.command('rebuild-ledger')
+@click.option('--batch-size', default=1000, show_default=True, help='Students recomputed per transaction.')
+def rebuild_ledger(batch_size):
+    """Recompute the student ledger summary table from source rows."""
+    from services.ledger import LedgerService
+
+    written = LedgerService.rebuild(batch_size=batch_size)
+    click.echo(f"Rebuilt ledger for {written} students")
+
+
+@finance_cli.command('snapshot')
+def snapshot():
+    """Record today's finance dashboard totals (schedule daily)."""
+    from services.snapshots import SnapshotService
+
+    row = SnapshotService.capture()
+    click.echo(
+        f"Snapshot {row.snapshot_date.isoformat()}: collected={row.total_collected:.2f} "
+        f"pending={row.pending_payments:.2f} students={row.total_students} unpaid={row.unpaid_students}"
+    )
+
+
+@finance_cli.command('check-query-budgets')
+@click.option('--user-id', type=int, default=None, help='User to authenticate as (default: first admin).')
+@click.option('--arg', 'url_args', multiple=True, metavar='NAME=VALUE',
+              help='Value for a URL parameter, e.g. --arg student_id=5 (repeatable).')
+def check_query_budgets(user_id, url_args):
+    """Request every GET endpoint with a query budget; fail if one goes over."""
+    from models import User
+    from utils.query_budget import check_budgets
+
+    if user_id is None:
+        admin = User.query.filter_by(is_admin=True).order_by(User.id).first()
+        if admin is None:
+            raise click.ClickException('No admin user found; pass --user-id')
+        user_id = admin.id
+
+    url_values = {}
+    for item in url_args:
+        name, separator, value = item.partition('=')
+        if not separator:
+            raise click.BadParameter(f"expected NAME=VALUE, got {item}", param_hint='--arg')
+        url_values[name] = int(value) if value.isdigit() else value
+
+    results = check_budgets(current_app._get_current_object(), user_id, url_values)
+    for row in results:
+        if row['result'] == 'skipped':
+            click.echo(f"SKIP            {row['url']} ({row['reason']})")
+        else:
+            click.echo(f"{row['result'].upper():<5} {row['statements']:>4}/{row['budget']:<4} "
+                       f"{row['url']} [{row['status_code']}]")
+
+    failed = [row for row in results if row['result'] in ('over', 'error')]
+    if failed:
+        raise click.ClickException(f"{len(failed)} endpoint(s) over budget or failing")
+    click.echo(f"{sum(1 for row in results if row['result'] == 'ok')} endpoint(s) within budget")
+
+
+@finance_cli.command('enforce')
+@click.option('--rule', 'rule_specs', multiple=True, metavar='RULE',
+              help='penalty:<days>:<amount> or block:<days> (repeatable; default: ENFORCEMENT_RULES).')
+@click.option('--dry-run', is_flag=True, help='Report what would be applied without writing.')
+@click.option('--today', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help='Evaluate as of this day (default: today, UTC).')
+@click.option('--admin-id', type=int, default=None, help='Admin recorded on penalties and action logs (default: none).')
+def enforce(rule_specs, dry_run, today, admin_id):
+    """Apply overdue penalties and registration blocks (schedule daily)."""
+    from services.enforcement import EnforcementService, parse_rules
+
+    try:
+        rules = parse_rules(','.join(rule_specs) if rule_specs else current_app.config.get('ENFORCEMENT_RULES', ''))
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint='--rule')
+    if not rules:
+        raise click.ClickException('No enforcement rules; set ENFORCEMENT_RULES or pass --rule')
+
+    summary = EnforcementService.run(
+        rules,
+        today=today.date() if today else None,
+        admin_id=admin_id,
+        dry_run=dry_run,
+        chunk_size=current_app.config.get('BULK_PENALTY_CHUNK_SIZE', 1000)
+    )
+    click.echo(f"{summary['today'].isoformat()}: {summary['overdue_count']} overdue student(s)"
+               f"{' (dry run)' if dry_run else ''}")
+    for row in summary['results']:
+        click.echo(f"{row['rule']:<24} matched={row['matched']:<6} applied={row['applied']}")
+
+
+@click.command('worker')
+@click.option('--processes', default=1, show_default=True, help='Worker processes to run.')
+@click.option('--poll-interval', default=2.0, show_default=True, help='Seconds to wait when the queue is empty.')
+@click.option('--once', is_flag=True, help='Run the queued jobs, then exit (single process).')
+@with_appcontext
+def worker(processes, poll_interval, once):
+    """Run background jobs queued with ?async=true."""
+    from services.job_queue import run_worker, run_worker_pool
+
+    if processes > 1 and not once:
+        run_worker_pool(processes, poll_interval=poll_interval)
+    else:
+        run_worker(current_app._get_current_object(), poll_interval=poll_interval, once=once)
@@ -17,3 +17,29 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "jwt-secret")
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=8)
+    # Dashboard metrics cache (utils/metrics_cache.py); set METRICS_CACHE_PATH to share it across workers
+    METRICS_CACHE_TTL = int(os.getenv("METRICS_CACHE_TTL", "60"))
+    METRICS_CACHE_STALE_TTL = int(os.getenv("METRICS_CACHE_STALE_TTL", "300"))
+    METRICS_CACHE_PATH = os.getenv("METRICS_CACHE_PATH", "")
+    # Bank statement file import (services/bank_matching.py); stay below the gunicorn timeout
+    BANK_IMPORT_BATCH_SIZE = int(os.getenv("BANK_IMPORT_BATCH_SIZE", "1000"))
+    BANK_IMPORT_TIME_BUDGET = float(os.getenv("BANK_IMPORT_TIME_BUDGET", "100"))
+    # Background jobs (services/job_queue.py, `flask worker`)
+    JOB_SPOOL_DIR = os.getenv("JOB_SPOOL_DIR", "")
+    JOB_HEARTBEAT_INTERVAL = int(os.getenv("JOB_HEARTBEAT_INTERVAL", "5"))
+    JOB_STALE_AFTER = int(os.getenv("JOB_STALE_AFTER", "300"))
+    # Per-endpoint SQL statement budgets (utils/query_budget.py); reject over-budget requests instead of logging them
+    QUERY_BUDGET_ENFORCE = os.getenv("QUERY_BUDGET_ENFORCE", "").lower() in ("1", "true", "yes")
+    # Request instrumentation (utils/request_metrics.py)
+    REQUEST_METRICS_WINDOW = int(os.getenv("REQUEST_METRICS_WINDOW", "1000"))
+    REQUEST_METRICS_SLOW_MS = int(os.getenv("REQUEST_METRICS_SLOW_MS", "1000"))
+    REQUEST_METRICS_SLOW_STATEMENTS = int(os.getenv("REQUEST_METRICS_SLOW_STATEMENTS", "3"))
+    REQUEST_METRICS_SERVER_TIMING = os.getenv("REQUEST_METRICS_SERVER_TIMING", "true").lower() in ("1", "true", "yes")
+    REQUEST_METRICS_LOG_LEVEL = os.getenv("REQUEST_METRICS_LOG_LEVEL", "INFO").upper()
+    # SQLite file sharing the per-route samples across gunicorn workers (empty = per process)
+    REQUEST_METRICS_PATH = os.getenv("REQUEST_METRICS_PATH", "")
+    # Students per INSERT batch and commit in bulk reminders/penalties (services/reminders.py, services/penalties.py)
+    BULK_REMINDER_CHUNK_SIZE = int(os.getenv("BULK_REMINDER_CHUNK_SIZE", "1000"))
+    BULK_PENALTY_CHUNK_SIZE = int(os.getenv("BULK_PENALTY_CHUNK_SIZE", "1000"))
+    # Overdue policy applied by `flask finance enforce` (services/enforcement.py), e.g. "penalty:30:50,block:60"
+    ENFORCEMENT_RULES = os.getenv("ENFORCEMENT_RULES", "")
@@ -9,6 +9,21 @@ flask db upgrade || echo "Migrations failed or already applied"
 echo "Running database schema fix..."
 python fix_railway_db.py || echo "Database fix failed or already applied"
 
+# Backfill / repair the per-student ledger summary table
+echo "Rebuilding student ledger..."
+flask finance rebuild-ledger || echo "Ledger rebuild failed"
+
+# Record today's finance snapshot (schedule `flask finance snapshot` daily as well)
+echo "Recording finance snapshot..."
+flask finance snapshot || echo "Finance snapshot failed"
+
+# Start the background job worker (runs ?async=true requests)
+echo "Starting job worker..."
+flask worker --processes ${JOB_WORKER_PROCESSES:-1} &
+
+# Share per-route request metrics across the gunicorn workers
+export REQUEST_METRICS_PATH=${REQUEST_METRICS_PATH:-/tmp/request_metrics.sqlite}
+
 # Start the application with gunicorn
 echo "Starting gunicorn server..."
 exec gunicorn --bind 0.0.0.0:${PORT:-5000} --workers 4 --timeout 120 'app:create_app()'
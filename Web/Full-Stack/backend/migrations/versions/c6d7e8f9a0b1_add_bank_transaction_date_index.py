@@ -0,0 +1,26 @@
+"""Add bank transaction date index for the reconciliation page
+
+Revision ID: c6d7e8f9a0b1
+Revises: b5c6d7e8f9a0
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c6d7e8f9a0b1'
+down_revision = 'b5c6d7e8f9a0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('bank_transactions', schema=None) as batch_op:
+        batch_op.create_index('idx_bank_txn_date', ['transaction_date'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('bank_transactions', schema=None) as batch_op:
+        batch_op.drop_index('idx_bank_txn_date')
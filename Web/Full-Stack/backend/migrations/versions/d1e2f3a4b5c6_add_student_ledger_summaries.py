@@ -0,0 +1,46 @@
+"""Add student_ledger_summaries table
+
+Revision ID: d1e2f3a4b5c6
+Revises: c5d8e9f1a2b3
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd1e2f3a4b5c6'
+down_revision = 'c5d8e9f1a2b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('student_ledger_summaries',
+    sa.Column('student_id', sa.Integer(), nullable=False),
+    sa.Column('faculty_id', sa.Integer(), nullable=True),
+    sa.Column('faculty_name', sa.String(length=150), nullable=True),
+    sa.Column('enrollment_count', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('first_enrollment_date', sa.DateTime(), nullable=True),
+    sa.Column('total_fees', sa.Float(), nullable=False, server_default='0'),
+    sa.Column('total_paid', sa.Float(), nullable=False, server_default='0'),
+    sa.Column('pending_amount', sa.Float(), nullable=False, server_default='0'),
+    sa.Column('total_penalties', sa.Float(), nullable=False, server_default='0'),
+    sa.Column('last_payment_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['faculty_id'], ['faculties.id'], ),
+    sa.ForeignKeyConstraint(['student_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('student_id')
+    )
+    with op.batch_alter_table('student_ledger_summaries', schema=None) as batch_op:
+        batch_op.create_index('idx_ledger_faculty', ['faculty_id'], unique=False)
+
+    # Rows are backfilled by `flask finance rebuild-ledger` (run from entrypoint.sh)
+
+
+def downgrade():
+    with op.batch_alter_table('student_ledger_summaries', schema=None) as batch_op:
+        batch_op.drop_index('idx_ledger_faculty')
+
+    op.drop_table('student_ledger_summaries')
@@ -0,0 +1,28 @@
+"""Add generated report indexes for keyset-paginated report history
+
+Revision ID: d7e8f9a0b1c2
+Revises: c6d7e8f9a0b1
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7e8f9a0b1c2'
+down_revision = 'c6d7e8f9a0b1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('generated_reports', schema=None) as batch_op:
+        batch_op.create_index('idx_report_generated', ['generated_at'], unique=False)
+        batch_op.create_index('idx_report_type_generated', ['report_type', 'generated_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('generated_reports', schema=None) as batch_op:
+        batch_op.drop_index('idx_report_type_generated')
+        batch_op.drop_index('idx_report_generated')
@@ -0,0 +1,35 @@
+"""Add finance_snapshots table
+
+Revision ID: e2f3a4b5c6d7
+Revises: d1e2f3a4b5c6
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2f3a4b5c6d7'
+down_revision = 'd1e2f3a4b5c6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('finance_snapshots',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('snapshot_date', sa.Date(), nullable=False),
+    sa.Column('total_collected', sa.Float(), nullable=False, server_default='0'),
+    sa.Column('pending_payments', sa.Float(), nullable=False, server_default='0'),
+    sa.Column('total_students', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('unpaid_students', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('snapshot_date')
+    )
+
+
+def downgrade():
+    op.drop_table('finance_snapshots')
@@ -0,0 +1,28 @@
+"""Add penalty idempotency key for rule-driven enforcement runs
+
+Revision ID: e8f9a0b1c2d3
+Revises: d7e8f9a0b1c2
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8f9a0b1c2d3'
+down_revision = 'd7e8f9a0b1c2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('penalties', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('idempotency_key', sa.String(length=100), nullable=True))
+        batch_op.create_unique_constraint('uq_penalty_idempotency_key', ['idempotency_key'])
+
+
+def downgrade():
+    with op.batch_alter_table('penalties', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_penalty_idempotency_key', type_='unique')
+        batch_op.drop_column('idempotency_key')
@@ -0,0 +1,58 @@
+"""Add composite indexes for payment, notification, action log, bank transaction and penalty access paths
+
+Revision ID: f3a4b5c6d7e8
+Revises: e2f3a4b5c6d7
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a4b5c6d7e8'
+down_revision = 'e2f3a4b5c6d7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('payments', schema=None) as batch_op:
+        batch_op.create_index('idx_payment_student_status', ['student_id', 'status'], unique=False)
+        batch_op.create_index('idx_payment_student_date', ['student_id', 'payment_date'], unique=False)
+        batch_op.create_index('idx_payment_status_date', ['status', 'payment_date'], unique=False)
+        batch_op.create_index('idx_payment_method_status_created', ['payment_method', 'status', 'created_at'], unique=False)
+        batch_op.create_index('idx_payment_date', ['payment_date'], unique=False)
+
+    with op.batch_alter_table('notifications', schema=None) as batch_op:
+        batch_op.create_index('idx_notification_student_created', ['student_id', 'created_at'], unique=False)
+
+    with op.batch_alter_table('action_logs', schema=None) as batch_op:
+        batch_op.create_index('idx_action_log_student_created', ['student_id', 'created_at'], unique=False)
+
+    with op.batch_alter_table('bank_transactions', schema=None) as batch_op:
+        batch_op.create_index('idx_bank_txn_status_date', ['status', 'transaction_date'], unique=False)
+
+    with op.batch_alter_table('penalties', schema=None) as batch_op:
+        batch_op.create_index('idx_penalty_student', ['student_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('penalties', schema=None) as batch_op:
+        batch_op.drop_index('idx_penalty_student')
+
+    with op.batch_alter_table('bank_transactions', schema=None) as batch_op:
+        batch_op.drop_index('idx_bank_txn_status_date')
+
+    with op.batch_alter_table('action_logs', schema=None) as batch_op:
+        batch_op.drop_index('idx_action_log_student_created')
+
+    with op.batch_alter_table('notifications', schema=None) as batch_op:
+        batch_op.drop_index('idx_notification_student_created')
+
+    with op.batch_alter_table('payments', schema=None) as batch_op:
+        batch_op.drop_index('idx_payment_date')
+        batch_op.drop_index('idx_payment_method_status_created')
+        batch_op.drop_index('idx_payment_status_date')
+        batch_op.drop_index('idx_payment_student_date')
+        batch_op.drop_index('idx_payment_student_status')
@@ -0,0 +1,34 @@
+"""Add due date and last reminder to student ledger summaries
+
+Revision ID: f9a0b1c2d3e4
+Revises: e8f9a0b1c2d3
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f9a0b1c2d3e4'
+down_revision = 'e8f9a0b1c2d3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('student_ledger_summaries', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('due_date', sa.Date(), nullable=True))
+        batch_op.add_column(sa.Column('last_reminder_at', sa.DateTime(), nullable=True))
+        batch_op.create_index('idx_ledger_due_date', ['due_date'], unique=False)
+        batch_op.create_index('idx_ledger_last_reminder', ['last_reminder_at'], unique=False)
+
+    # Values are backfilled by `flask finance rebuild-ledger` (run from entrypoint.sh)
+
+
+def downgrade():
+    with op.batch_alter_table('student_ledger_summaries', schema=None) as batch_op:
+        batch_op.drop_index('idx_ledger_last_reminder')
+        batch_op.drop_index('idx_ledger_due_date')
+        batch_op.drop_column('last_reminder_at')
+        batch_op.drop_column('due_date')
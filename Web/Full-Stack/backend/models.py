@@ -60,6 +60,11 @@ class User(db.Model):
     payments = db.relationship('Payment', back_populates='student', foreign_keys='Payment.student_id')
     notifications = db.relationship('Notification', back_populates='student', foreign_keys='Notification.student_id')
 
+    __table_args__ = (
+        db.Index('idx_user_admin_dues', 'is_admin', 'dues_balance'),  # Students by outstanding dues / amount range
+        db.Index('idx_user_last_name', 'last_name'),  # Reconciliation suggestions by payer name
+    )
+
     # Password hashing methods
     @staticmethod
     def generate_hash(password):
@@ -249,6 +254,15 @@ class Payment(db.Model):
     recorded_by_user = db.relationship('User', foreign_keys=[recorded_by])
     verified_by_user = db.relationship('User', foreign_keys=[verified_by])
 
+    __table_args__ = (
+        db.Index('idx_payment_student_status', 'student_id', 'status'),  # Per-student totals by status
+        db.Index('idx_payment_student_date', 'student_id', 'payment_date'),  # Per-student history / latest payment
+        db.Index('idx_payment_status_date', 'status', 'payment_date'),  # RECEIVED payments in a date range
+        db.Index('idx_payment_method_status_created', 'payment_method', 'status', 'created_at'),  # Pending transfer queue
+        db.Index('idx_payment_date', 'payment_date'),  # Recent payments feed, bank matching window
+        db.Index('idx_payment_reference', 'reference_number')  # Reconciliation suggestions by reference
+    )
+
     def to_dict(self, include_student=False):
         """Convert payment to dictionary representation.
         
@@ -294,6 +308,10 @@ class Notification(db.Model):
     # Relationships
     student = db.relationship('User', back_populates='notifications', foreign_keys=[student_id])
 
+    __table_args__ = (
+        db.Index('idx_notification_student_created', 'student_id', 'created_at'),
+    )
+
     def to_dict(self):
         """Convert notification to dictionary representation."""
         return {
@@ -323,6 +341,10 @@ class ActionLog(db.Model):
     student = db.relationship('User', foreign_keys=[student_id])
     performed_by_user = db.relationship('User', foreign_keys=[performed_by])
 
+    __table_args__ = (
+        db.Index('idx_action_log_student_created', 'student_id', 'created_at'),
+    )
+
     def to_dict(self):
         """Convert action log to dictionary representation."""
         return {
@@ -388,6 +410,11 @@ class BankTransaction(db.Model):
     matched_payment = db.relationship('Payment', foreign_keys=[matched_payment_id])
     matched_student = db.relationship('User', foreign_keys=[matched_student_id])
     matcher = db.relationship('User', foreign_keys=[matched_by])
+
+    __table_args__ = (
+        db.Index('idx_bank_txn_status_date', 'status', 'transaction_date'),
+        db.Index('idx_bank_txn_date', 'transaction_date'),  # Unfiltered reconciliation page, newest first
+    )
     
     def to_dict(self):
         """Convert bank transaction to dictionary representation."""
@@ -427,6 +454,11 @@ class GeneratedReport(db.Model):
     
     # Relationship
     generator = db.relationship('User', foreign_keys=[generated_by])
+
+    __table_args__ = (
+        db.Index('idx_report_generated', 'generated_at'),  # Report history, newest first
+        db.Index('idx_report_type_generated', 'report_type', 'generated_at'),  # History filtered by type
+    )
     
     def to_dict(self):
         """Convert generated report to dictionary representation."""
@@ -489,10 +521,16 @@ class Penalty(db.Model):
     applied_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)  # Admin who applied it
     applied_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
     notes = db.Column(db.Text, nullable=True)
+    idempotency_key = db.Column(db.String(100), nullable=True)  # Set by `flask finance enforce`, e.g. 'penalty-30d:42:2026-09-15'
     
     # Relationships
     student = db.relationship('User', foreign_keys=[student_id])
     applied_by_user = db.relationship('User', foreign_keys=[applied_by])
+
+    __table_args__ = (
+        db.Index('idx_penalty_student', 'student_id'),
+        db.UniqueConstraint('idempotency_key', name='uq_penalty_idempotency_key'),  # A rule never charges twice
+    )
     
     def to_dict(self):
         """Convert penalty to dictionary representation."""
@@ -506,3 +544,142 @@ class Penalty(db.Model):
             'notes': self.notes
         }
 
+
+
+# ============================================================================
+# STUDENT LEDGER SUMMARY MODEL - Per-student finance totals maintained on write
+# ============================================================================
+class StudentLedgerSummary(db.Model):
+    """
+    Materialized per-student totals derived from Enrollment, Payment and Penalty.
+    Refreshed by services.ledger.LedgerService in the same transaction as every
+    write to those tables, so finance views read one row per student instead of
+    re-aggregating raw rows. `flask finance rebuild-ledger` repairs any drift.
+    """
+    __tablename__ = "student_ledger_summaries"
+    student_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    faculty_id = db.Column(db.Integer, db.ForeignKey('faculties.id'), nullable=True)  # Faculty of the first enrollment's course
+    faculty_name = db.Column(db.String(150), nullable=True)  # Snapshot of the faculty name
+    enrollment_count = db.Column(db.Integer, nullable=False, default=0)
+    first_enrollment_date = db.Column(db.DateTime, nullable=True)
+    total_fees = db.Column(db.Float, nullable=False, default=0.0)  # Sum of enrollment course fees
+    total_paid = db.Column(db.Float, nullable=False, default=0.0)  # Sum of RECEIVED payments
+    pending_amount = db.Column(db.Float, nullable=False, default=0.0)  # Sum of PENDING payments
+    total_penalties = db.Column(db.Float, nullable=False, default=0.0)
+    last_payment_at = db.Column(db.DateTime, nullable=True)  # Latest RECEIVED payment date
+    due_date = db.Column(db.Date, nullable=True)  # User.payment_due_date, else first enrollment + 30 days
+    last_reminder_at = db.Column(db.DateTime, nullable=True)  # Latest PAYMENT_REMINDER notification
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+
+    # Relationships
+    student = db.relationship('User', foreign_keys=[student_id])
+    faculty = db.relationship('Faculty', foreign_keys=[faculty_id])
+
+    __table_args__ = (
+        db.Index('idx_ledger_faculty', 'faculty_id'),
+        db.Index('idx_ledger_due_date', 'due_date'),  # Overdue buckets and enforcement runs
+        db.Index('idx_ledger_last_reminder', 'last_reminder_at'),
+    )
+
+    def to_dict(self):
+        """Convert ledger summary to dictionary representation."""
+        return {
+            'student_id': self.student_id,
+            'faculty_id': self.faculty_id,
+            'faculty_name': self.faculty_name,
+            'enrollment_count': self.enrollment_count,
+            'first_enrollment_date': self.first_enrollment_date.isoformat() if self.first_enrollment_date else None,
+            'total_fees': self.total_fees,
+            'total_paid': self.total_paid,
+            'pending_amount': self.pending_amount,
+            'total_penalties': self.total_penalties,
+            'last_payment_at': self.last_payment_at.isoformat() if self.last_payment_at else None,
+            'due_date': self.due_date.isoformat() if self.due_date else None,
+            'last_reminder_at': self.last_reminder_at.isoformat() if self.last_reminder_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+
+# ============================================================================
+# FINANCE SNAPSHOT MODEL - Daily copy of the dashboard metrics for trends
+# ============================================================================
+class FinanceSnapshot(db.Model):
+    """
+    One row per day with the finance dashboard totals, written by the
+    `flask finance snapshot` job. Period-over-period changes are computed by
+    comparing against an earlier row instead of scanning history.
+    """
+    __tablename__ = "finance_snapshots"
+    id = db.Column(db.Integer, primary_key=True)
+    snapshot_date = db.Column(db.Date, unique=True, nullable=False)
+    total_collected = db.Column(db.Float, nullable=False, default=0.0)  # Sum of RECEIVED payments
+    pending_payments = db.Column(db.Float, nullable=False, default=0.0)  # Sum of student dues_balance
+    total_students = db.Column(db.Integer, nullable=False, default=0)
+    unpaid_students = db.Column(db.Integer, nullable=False, default=0)  # Students with dues_balance > 0
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+
+    def to_dict(self):
+        """Convert finance snapshot to dictionary representation."""
+        return {
+            'id': self.id,
+            'snapshot_date': self.snapshot_date.isoformat() if self.snapshot_date else None,
+            'total_collected': self.total_collected,
+            'pending_payments': self.pending_payments,
+            'total_students': self.total_students,
+            'unpaid_students': self.unpaid_students,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+
+# ============================================================================
+# JOB MODEL - Persistent queue for long-running finance operations
+# ============================================================================
+class Job(db.Model):
+    """
+    A queued request (report generation, statement import, bulk actions)
+    executed by `flask worker` instead of inside a gunicorn worker.
+    The payload describes the original request so the worker can run the
+    same endpoint code on behalf of the user who queued it.
+    """
+    __tablename__ = "jobs"
+    id = db.Column(db.String(36), primary_key=True)  # UUID
+    job_type = db.Column(db.String(100), nullable=False)  # Endpoint name, e.g. finance.bulk_reminder
+    status = db.Column(db.String(20), nullable=False, default='QUEUED')  # QUEUED, RUNNING, SUCCEEDED, FAILED
+    payload = db.Column(db.JSON, nullable=False)  # Method, path, query args, JSON body or spooled body file
+    result = db.Column(db.JSON, nullable=True)  # JSON response of the endpoint
+    result_status = db.Column(db.Integer, nullable=True)  # HTTP status the endpoint returned
+    error = db.Column(db.Text, nullable=True)
+    progress_current = db.Column(db.Integer, nullable=False, default=0)
+    progress_total = db.Column(db.Integer, nullable=True)
+    worker_id = db.Column(db.String(100), nullable=True)  # host:pid of the worker running it
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    started_at = db.Column(db.DateTime, nullable=True)
+    heartbeat_at = db.Column(db.DateTime, nullable=True)  # Last progress update from the worker
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('idx_job_status_created', 'status', 'created_at'),  # Queue polling
+        db.Index('idx_job_created_by_created', 'created_by', 'created_at'),  # "My jobs" listing
+    )
+
+    def to_dict(self, include_result=True):
+        """Convert job to dictionary representation."""
+        data = {
+            'id': self.id,
+            'job_type': self.job_type,
+            'status': self.status,
+            'progress_current': self.progress_current,
+            'progress_total': self.progress_total,
+            'result_status': self.result_status,
+            'error': self.error,
+            'created_by': self.created_by,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'heartbeat_at': self.heartbeat_at.isoformat() if self.heartbeat_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+        if include_result:
+            data['result'] = self.result
+        return data
@@ -2,6 +2,9 @@ from flask import Blueprint, request, jsonify
 from models import db, Course, User
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from functools import wraps
+from services.ledger import LedgerService
+from utils.serializers import course_with_faculty
+from utils.query_budget import query_budget
 
 
 courses_bp = Blueprint("courses", __name__)
@@ -42,6 +45,7 @@ def require_admin(fn):
 # ============================================================================
 @courses_bp.route("", methods=["GET"])
 @jwt_required(optional=True)
+@query_budget(4)
 def list_courses():
     """
     List all available courses, optionally filtered by faculty.
@@ -89,13 +93,13 @@ def list_courses():
                 # Silently continue if JWT check fails
                 pass
         
-        courses = query.all()
+        courses = course_with_faculty.load(query).all()
         
-        # Serialize courses using the model's to_dict method
+        # Serialize courses (faculty joined in by the serializer's load plan)
         serialized_courses = []
         for course in courses:
             try:
-                course_dict = course.to_dict(include_faculty=True)
+                course_dict = course_with_faculty(course)
                 serialized_courses.append(course_dict)
             except Exception as e:
                 # Include minimal course info if serialization fails
@@ -304,8 +308,12 @@ def delete_course(course_id, current_user=None):
     try:
         course = Course.query.get_or_404(course_id)
         
+        # Enrollments are deleted with the course, so their students' ledgers change
+        affected_students = [enrollment.student_id for enrollment in course.enrollments]
+        
         # Delete the course
         db.session.delete(course)
+        LedgerService.refresh_students(affected_students)
         db.session.commit()
         
         return jsonify({
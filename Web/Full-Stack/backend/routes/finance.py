@@ -1,14 +1,34 @@
-from flask import Blueprint, request, jsonify, send_file, Response, current_app
-from models import db, User, Payment, Enrollment, Notification, ActionLog, Course, Faculty, FeeStructure, BankTransaction, GeneratedReport, Penalty  # alyan's modification: Added Course, Faculty, FeeStructure, BankTransaction, GeneratedReport, and Penalty imports
+from flask import Blueprint, request, jsonify, send_file, Response, current_app, stream_with_context
+from models import db, User, Payment, Enrollment, Notification, ActionLog, Course, Faculty, FeeStructure, BankTransaction, GeneratedReport, Penalty, StudentLedgerSummary, Job  # alyan's modification: Added Course, Faculty, FeeStructure, BankTransaction, GeneratedReport, and Penalty imports
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime, timezone, timedelta
 from sqlalchemy import and_, func, desc, cast, String
+from sqlalchemy.orm import joinedload
 import json
+import math
 import os
 import uuid
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from utils.rbac import require_finance, require_admin  # SECURITY: Import role-based access control (require_admin is alias for backward compatibility)
+from utils.async_jobs import async_capable
+from services.finance_queries import FinanceQueries, DUE_STATUSES, IN_BATCH_SIZE
+from services.fee_calculator import FeeCalculator
+from services.bank_matching import BankMatchingService, IMPORT_BATCH_SIZE, MATCH_WINDOW_DAYS
+from services.match_suggestions import MatchSuggestionService
+from services.reminders import ReminderService, ReminderPartialFailure, REMINDER_CHUNK_SIZE
+from services.penalties import PenaltyService, PenaltyPartialFailure, PENALTY_CHUNK_SIZE
+from services.job_queue import report_progress
+from services.statement_parsers import STATEMENT_PARSERS, STATEMENT_EXTENSIONS, StatementParseError
+from services.ledger import LedgerService
+from services.aging import AgingService
+from services.snapshots import SnapshotService
+from utils.streaming import STREAM_FORMATS, iter_query_chunks, stream_rows
+from utils.metrics_cache import metrics_cache
+from utils.pagination import paginate, count_rows, count_mode_arg
+from utils.serializers import recent_payment, pending_payment, enrollment_with_course, bank_transaction_detail_plan
+from utils.query_budget import query_budget, record_batches
+from utils.request_metrics import request_metrics
 
 finance_bp = Blueprint("finance", __name__)
 
@@ -20,6 +40,7 @@ finance_bp = Blueprint("finance", __name__)
 @finance_bp.route("/dues", methods=["GET"])
 @jwt_required()
 @require_admin
+@query_budget(4)
 def get_outstanding_dues():
     """
     Lists all students with outstanding dues. Finance Department only.
@@ -28,6 +49,10 @@ def get_outstanding_dues():
     - min_amount: Filter students with dues >= min_amount (optional)
     - max_amount: Filter students with dues <= max_amount (optional)
     - sort_by: Sort by 'dues_balance' or 'username' (default: 'dues_balance')
+    - limit: Page size for cursor pagination (optional, default: all rows)
+    - cursor: Cursor returned as 'next_cursor' by the previous page (optional)
+    
+    Totals always cover every matching student, not just the current page.
     
     Returns:
     {
@@ -42,7 +67,8 @@ def get_outstanding_dues():
                 "total_enrollments": 1,
                 "last_payment_date": "2025-12-01T10:00:00"
             }
-        ]
+        ],
+        "next_cursor": null
     }
     """
     try:
@@ -50,53 +76,25 @@ def get_outstanding_dues():
         min_amount = request.args.get('min_amount', type=float)
         max_amount = request.args.get('max_amount', type=float)
         sort_by = request.args.get('sort_by', 'dues_balance')
+        limit = request.args.get('limit', type=int)
+        cursor = request.args.get('cursor', type=str)
         
-        # Query students with outstanding dues
-        query = User.query.filter(User.dues_balance > 0, User.is_admin == False)
-        
-        # Apply filters
-        if min_amount is not None:
-            query = query.filter(User.dues_balance >= min_amount)
-        if max_amount is not None:
-            query = query.filter(User.dues_balance <= max_amount)
-        
-        # Apply sorting
-        if sort_by == 'username':
-            query = query.order_by(User.username)
-        else:
-            query = query.order_by(User.dues_balance.desc())
-        
-        students = query.all()
-        
-        # Build response
-        student_list = []
-        total_outstanding = 0
+        if limit is not None and limit <= 0:
+            return jsonify({"error": "limit must be greater than 0"}), 400
         
-        for student in students:
-            # Get last payment date
-            last_payment = Payment.query.filter_by(student_id=student.id).order_by(
-                Payment.payment_date.desc()
-            ).first()
-            
-            # Count enrollments
-            enrollment_count = Enrollment.query.filter_by(student_id=student.id).count()
-            
-            student_list.append({
-                "user_id": student.id,
-                "username": student.username,
-                "email": student.email,
-                "dues_balance": student.dues_balance,
-                "total_enrollments": enrollment_count,
-                "last_payment_date": last_payment.payment_date.isoformat() if last_payment else None
-            })
-            
-            total_outstanding += student.dues_balance
+        # Enrollment counts and last payment dates come from one grouped query
+        try:
+            result = FinanceQueries.outstanding_dues(
+                min_amount=min_amount,
+                max_amount=max_amount,
+                sort_by=sort_by,
+                limit=limit,
+                cursor=cursor
+            )
+        except ValueError as cursor_error:
+            return jsonify({"error": str(cursor_error)}), 400
         
-        return jsonify({
-            "total_students_with_dues": len(students),
-            "total_outstanding_amount": total_outstanding,
-            "students": student_list
-        }), 200
+        return jsonify(result), 200
     
     except Exception as e:
         return jsonify({"error": f"Failed to retrieve dues: {str(e)}"}), 500
@@ -109,11 +107,15 @@ def get_outstanding_dues():
 @finance_bp.route("/unpaid-report", methods=["GET"])
 @jwt_required()
 @require_admin
+@query_budget(2, per_batch=2)
 def get_unpaid_report():
     """
     Generates a detailed report of students with outstanding dues.
     Used for 'Action based on unpaid report'.
     
+    Query Parameters:
+    - stream: 'ndjson' or 'csv' to stream one row per student instead (optional)
+    
     Returns:
     {
         "report_date": "2025-12-05T15:30:00",
@@ -128,6 +130,12 @@ def get_unpaid_report():
     }
     """
     try:
+        stream_format = request.args.get('stream', type=str)
+        if stream_format:
+            if stream_format not in STREAM_FORMATS:
+                return jsonify({"error": f"Unsupported stream format: {stream_format}"}), 400
+            return _stream_unpaid_report(stream_format)
+        
         # Get all students with outstanding dues
         # alyan's modification: Added error handling for initial query
         try:
@@ -156,104 +164,18 @@ def get_unpaid_report():
         moderate = []  # 1000 - 5000
         low = []       # < 1000
         
-        detailed_report = []
+        # Enrollments and recent payments are prefetched for all students in batches
+        # (the report is unpaginated, so its budget grows by two statements per batch)
+        record_batches(math.ceil(len(students) / IN_BATCH_SIZE))
+        detailed_report = FinanceQueries.unpaid_report_rows(students)
         total_outstanding = 0
         
-        for student in students:
-            # Get enrollment details with course info
-            # alyan's modification: Use outerjoin (LEFT JOIN) to handle students without enrollments
-            enrollment_details = []
-            try:
-                enrollments_data = db.session.query(
-                    Enrollment,
-                    Course
-                ).outerjoin(
-                    Course, Enrollment.course_id == Course.id
-                ).filter(
-                    Enrollment.student_id == student.id
-                ).all()
-                
-                for enrollment, course in enrollments_data:
-                    try:
-                        enrollment_details.append({
-                            "course_name": course.name if course and course.name else "Unknown Course",
-                            "course_fee": enrollment.course_fee if enrollment else 0.0,
-                            "enrollment_date": enrollment.enrollment_date.isoformat() if enrollment and enrollment.enrollment_date else None
-                        })
-                    except Exception as err:
-                        print(f"Warning: Error processing enrollment: {str(err)}")
-                        enrollment_details.append({
-                            "course_name": "Unknown Course",
-                            "course_fee": enrollment.course_fee if enrollment else 0.0,
-                            "enrollment_date": None
-                        })
-            except Exception as query_err:
-                print(f"Warning: Error querying enrollments for student {student.id}: {str(query_err)}")
-                # Fallback: try simple query without join
-                try:
-                    simple_enrollments = Enrollment.query.filter_by(student_id=student.id).all()
-                    for e in simple_enrollments:
-                        enrollment_details.append({
-                            "course_name": "Unknown Course",
-                            "course_fee": e.course_fee,
-                            "enrollment_date": e.enrollment_date.isoformat() if e.enrollment_date else None
-                        })
-                except Exception as fallback_err:
-                    print(f"Warning: Fallback query also failed: {str(fallback_err)}")
-                    enrollment_details = []
-            
-            # Get payment history
-            # alyan's modification: Added error handling for payment queries
-            recent_payments = []
-            try:
-                payments = Payment.query.filter_by(student_id=student.id).order_by(
-                    Payment.payment_date.desc()
-                ).limit(5).all()
-                
-                recent_payments = [
-                    {
-                        "amount": p.amount,
-                        "payment_date": p.payment_date.isoformat() if p.payment_date else None,
-                        "payment_method": p.payment_method or "UNKNOWN"
-                    }
-                    for p in payments
-                ]
-            except Exception as payment_err:
-                print(f"Warning: Error querying payments for student {student.id}: {str(payment_err)}")
-                recent_payments = []
-            
-            # alyan's modification: Added error handling for student data creation
-            try:
-                student_data = {
-                    "user_id": student.id,
-                    "username": student.username or "Unknown",
-                    "email": student.email or None,
-                    "dues_balance": float(student.dues_balance) if student.dues_balance else 0.0,
-                    "enrollments": enrollment_details,
-                    "recent_payments": recent_payments
-                }
-            except Exception as data_err:
-                print(f"Error creating student data for student {student.id}: {str(data_err)}")
-                # Create minimal student data
-                student_data = {
-                    "user_id": student.id,
-                    "username": str(student.username) if student.username else "Unknown",
-                    "email": str(student.email) if student.email else None,
-                    "dues_balance": 0.0,
-                    "enrollments": [],
-                    "recent_payments": []
-                }
-            
-            detailed_report.append(student_data)
+        buckets = {"critical": critical, "moderate": moderate, "low": low}
+        for student, student_data in zip(students, detailed_report):
             total_outstanding += student.dues_balance
             
             # Categorize
-            if student.dues_balance > 5000:
-                critical.append(student_data)
-            elif student.dues_balance >= 1000:
-                moderate.append(student_data)
-            else:
-                low.append(student_data)
+            buckets[FinanceQueries.dues_category(student.dues_balance)].append(student_data)
         
         return jsonify({
             "report_date": datetime.now(timezone.utc).isoformat(),
@@ -278,6 +200,44 @@ def get_unpaid_report():
         }), 500
 
 
+UNPAID_REPORT_CSV_FIELDS = [
+    "user_id", "username", "email", "dues_balance", "category",
+    "total_enrollments", "total_course_fees", "last_payment_date"
+]
+
+
+def _unpaid_report_csv_row(row):
+    """Flatten an unpaid report row (nested enrollments/payments) for CSV output."""
+    return {
+        "user_id": row["user_id"],
+        "username": row["username"],
+        "email": row["email"],
+        "dues_balance": row["dues_balance"],
+        "category": row["category"],
+        "total_enrollments": len(row["enrollments"]),
+        "total_course_fees": sum(e["course_fee"] or 0 for e in row["enrollments"]),
+        "last_payment_date": row["recent_payments"][0]["payment_date"] if row["recent_payments"] else None
+    }
+
+
+def _stream_unpaid_report(stream_format):
+    """
+    Stream the unpaid report one student per line.
+    Students are read through a server-side cursor; enrollments and recent
+    payments are prefetched per chunk, so memory stays bounded by the chunk size.
+    """
+    statement = FinanceQueries.unpaid_students_query().statement
+
+    def rows():
+        for chunk in iter_query_chunks(statement):
+            for student_data in FinanceQueries.unpaid_report_rows(chunk):
+                student_data["category"] = FinanceQueries.dues_category(student_data["dues_balance"])
+                yield student_data
+
+    filename = f"unpaid-report-{datetime.now(timezone.utc).strftime('%Y%m%d')}"
+    return stream_rows(rows(), stream_format, UNPAID_REPORT_CSV_FIELDS, filename, csv_mapper=_unpaid_report_csv_row)
+
+
 # ============================================================================
 # ENDPOINT: PUT /api/finance/action/contact/<student_id>
 # Description: Logs action: 'Contact the student for the due date'
@@ -466,6 +426,7 @@ def record_external_payment():
         )
         db.session.add(notification)
         
+        LedgerService.refresh_students([student_id])
         db.session.commit()
         
         return jsonify({
@@ -481,6 +442,11 @@ def record_external_payment():
         return jsonify({"error": f"Failed to record payment: {str(e)}"}), 500
 
 
+STATUS_REPORT_CSV_FIELDS = [
+    "user_id", "username", "email", "dues_balance", "total_fees", "total_enrollments", "status"
+]
+
+
 # ============================================================================
 # ENDPOINT: GET /api/finance/reports/status
 # Description: Generates 'report condition (Pass & Fail)' based on student Dues + Fees
@@ -488,6 +454,7 @@ def record_external_payment():
 @finance_bp.route("/reports/status", methods=["GET"])
 @jwt_required()
 @require_admin
+@query_budget(3)
 def get_status_report():
     """
     Generates a status report based on student dues and fees.
@@ -495,6 +462,7 @@ def get_status_report():
     
     Query Parameters:
     - threshold: Dues threshold for 'Fail' status (default: 0, meaning any outstanding dues = Fail)
+    - stream: 'ndjson' or 'csv' to stream one row per student instead (optional)
     
     Returns:
     {
@@ -509,33 +477,34 @@ def get_status_report():
     try:
         # Get threshold parameter
         threshold = request.args.get('threshold', default=0, type=float)
+        stream_format = request.args.get('stream', type=str)
         
-        # Get all students (excluding admins)
-        students = User.query.filter(User.is_admin == False).all()
+        # Enrollment counts and fee totals are aggregated in the same query
+        query = FinanceQueries.status_report_query()
+        
+        if stream_format:
+            if stream_format not in STREAM_FORMATS:
+                return jsonify({"error": f"Unsupported stream format: {stream_format}"}), 400
+            
+            def rows():
+                for chunk in iter_query_chunks(query.statement):
+                    for row in chunk:
+                        yield FinanceQueries.status_report_row(row, threshold)
+            
+            filename = f"status-report-{datetime.now(timezone.utc).strftime('%Y%m%d')}"
+            return stream_rows(rows(), stream_format, STATUS_REPORT_CSV_FIELDS, filename)
+        
+        students = query.all()
         
         pass_students = []
         fail_students = []
         
         for student in students:
-            # Get enrollment details
-            enrollments = Enrollment.query.filter_by(student_id=student.id).all()
-            total_fees = sum(e.course_fee for e in enrollments)
-            
-            student_data = {
-                "user_id": student.id,
-                "username": student.username,
-                "email": student.email,
-                "dues_balance": student.dues_balance,
-                "total_fees": total_fees,
-                "total_enrollments": len(enrollments)
-            }
-            
             # Determine status: Pass if dues <= threshold, Fail otherwise
-            if student.dues_balance <= threshold:
-                student_data["status"] = "PASS"
+            student_data = FinanceQueries.status_report_row(student, threshold)
+            if student_data["status"] == "PASS":
                 pass_students.append(student_data)
             else:
-                student_data["status"] = "FAIL"
                 fail_students.append(student_data)
         
         return jsonify({
@@ -559,6 +528,7 @@ def get_status_report():
 @finance_bp.route("/summary", methods=["GET"])
 @jwt_required()
 @require_admin
+@query_budget(5)
 def get_finance_summary():
     """
     Returns overall financial summary statistics for the dashboard.
@@ -572,83 +542,62 @@ def get_finance_summary():
         "total_students": 2847,
         "total_students_change": 5.3,
         "unpaid_students": 156,
-        "unpaid_students_change": -3.1
+        "unpaid_students_change": -3.1,
+        "comparison_date": "2025-11-05"
     }
     """
     try:
-        # Calculate current period stats
-        # Total collected = sum of all payments with status 'RECEIVED'
-        total_collected = db.session.query(func.sum(Payment.amount)).filter(
-            Payment.status == 'RECEIVED'
-        ).scalar() or 0.0
-        
-        # Pending payments = sum of all dues_balance from students
-        pending_payments = db.session.query(func.sum(User.dues_balance)).filter(
-            User.is_admin == False
-        ).scalar() or 0.0
-        
-        # Total students = count of all non-admin users
-        total_students = User.query.filter(User.is_admin == False).count()
-        
-        # Unpaid students = count of students where dues_balance > 0
-        unpaid_students = User.query.filter(
-            and_(User.dues_balance > 0, User.is_admin == False)
-        ).count()
-        
-        # Calculate previous period stats (30 days ago) for change percentages
-        thirty_days_ago = datetime.now(timezone.utc) - timedelta(days=30)
-        
-        # Previous period total collected
-        prev_total_collected = db.session.query(func.sum(Payment.amount)).filter(
-            and_(
-                Payment.status == 'RECEIVED',
-                Payment.payment_date < thirty_days_ago
-            )
-        ).scalar() or 0.0
-        
-        # Previous period unpaid students
-        # Note: We can't get historical unpaid count easily, so we'll use a simple calculation
-        # For now, we'll calculate change based on payment trends
-        prev_unpaid_students = unpaid_students  # Placeholder - would need historical data
-        
-        # Calculate change percentages
-        total_collected_change = 0.0
-        if prev_total_collected > 0:
-            total_collected_change = ((total_collected - prev_total_collected) / prev_total_collected) * 100
-        
-        # For pending payments change, we'll use a simple estimate
-        # In a real system, you'd track this over time
-        pending_payments_change = -8.2  # Placeholder
-        
-        # For student count change, calculate based on creation dates
-        prev_total_students = User.query.filter(
-            and_(
-                User.is_admin == False,
-                User.created_at < thirty_days_ago
-            )
-        ).count()
-        total_students_change = 0.0
-        if prev_total_students > 0:
-            total_students_change = ((total_students - prev_total_students) / prev_total_students) * 100
-        
-        # Unpaid students change (placeholder)
-        unpaid_students_change = -3.1  # Placeholder
-        
-        return jsonify({
-            "total_collected": float(total_collected),
-            "total_collected_change": round(total_collected_change, 1),
-            "pending_payments": float(pending_payments),
-            "pending_payments_change": round(pending_payments_change, 1),
-            "total_students": total_students,
-            "total_students_change": round(total_students_change, 1),
-            "unpaid_students": unpaid_students,
-            "unpaid_students_change": round(unpaid_students_change, 1)
-        }), 200
+        summary = metrics_cache.get_or_compute(
+            'finance_summary',
+            _compute_finance_summary,
+            tags=SUMMARY_CACHE_TABLES
+        )
+        return jsonify(summary), 200
     
     except Exception as e:
         return jsonify({"error": f"Failed to retrieve finance summary: {str(e)}"}), 500
 
 
+# Tables whose writes invalidate the cached dashboard summary
+SUMMARY_CACHE_TABLES = ('payments', 'users', 'enrollments', 'penalties', 'finance_snapshots')
+
+
+def _compute_finance_summary():
+    """
+    Aggregate the dashboard summary: live totals compared with the daily
+    snapshot taken 30 days ago (see `flask finance snapshot`).
+    """
+    thirty_days_ago = datetime.now(timezone.utc) - timedelta(days=30)
+    previous = SnapshotService.latest_on_or_before(thirty_days_ago.date())
+    
+    if previous:
+        current = FinanceQueries.summary_metrics()
+        prev_total_collected = previous.total_collected
+        prev_pending_payments = previous.pending_payments
+        prev_total_students = previous.total_students
+        prev_unpaid_students = previous.unpaid_students
+    else:
+        # No snapshot old enough yet: collected and student counts can still be
+        # reconstructed from payment/creation dates; dues history cannot
+        current = FinanceQueries.summary_metrics(history_cutoff=thirty_days_ago)
+        prev_total_collected = current["collected_before_cutoff"]
+        prev_pending_payments = None
+        prev_total_students = current["students_before_cutoff"]
+        prev_unpaid_students = None
+    
+    return {
+        "total_collected": current["total_collected"],
+        "total_collected_change": round(SnapshotService.percent_change(current["total_collected"], prev_total_collected), 1),
+        "pending_payments": current["pending_payments"],
+        "pending_payments_change": round(SnapshotService.percent_change(current["pending_payments"], prev_pending_payments), 1),
+        "total_students": current["total_students"],
+        "total_students_change": round(SnapshotService.percent_change(current["total_students"], prev_total_students), 1),
+        "unpaid_students": current["unpaid_students"],
+        "unpaid_students_change": round(SnapshotService.percent_change(current["unpaid_students"], prev_unpaid_students), 1),
+        "comparison_date": previous.snapshot_date.isoformat() if previous else None
+    }
+
+
 # ============================================================================
 # ENDPOINT: GET /api/finance/payments/recent
 # Description: Returns list of recent payments with student and faculty info
@@ -656,13 +605,16 @@ def get_finance_summary():
 @finance_bp.route("/payments/recent", methods=["GET"])
 @jwt_required()
 @require_admin
+@query_budget(5)
 def get_recent_payments():
     """
     Returns list of recent payments with student and faculty info.
     
     Query Parameters:
     - limit: Number of records to return (default: 10)
-    - offset: Pagination offset (default: 0)
+    - cursor: Cursor returned as 'next_cursor' by the previous page (optional)
+    - offset: Pagination offset, when no cursor is given (default: 0)
+    - count: 'exact', 'estimate' or 'none' (default: exact for offset pages, estimate for cursor pages)
     
     Returns:
     {
@@ -677,65 +629,49 @@ def get_recent_payments():
                 "status": "Paid"
             }
         ],
-        "total_count": 100
+        "total_count": 100,
+        "total_count_estimated": false,
+        "has_more": true,
+        "next_cursor": "WyIyMDI1LTEyLTEwVDA5OjAwOjAwIiw0Ml0"
     }
     """
     try:
         # Get query parameters
         limit = request.args.get('limit', default=10, type=int)
         offset = request.args.get('offset', default=0, type=int)
+        cursor = request.args.get('cursor', type=str)
+        
+        if limit <= 0:
+            return jsonify({"error": "limit must be greater than 0"}), 400
         
-        # Query recent payments with student info
-        payments_query = db.session.query(
+        # Query recent payments with student info (faculty via the serializer's load plan)
+        payments_query = recent_payment.load(db.session.query(
             Payment,
             User
         ).join(
             User, Payment.student_id == User.id
         ).filter(
             User.is_admin == False
-        ).order_by(
-            Payment.payment_date.desc()
-        )
+        ))
         
-        # Get total count
-        total_count = payments_query.count()
-        
-        # Apply pagination
-        payments_data = payments_query.offset(offset).limit(limit).all()
+        try:
+            total_count, estimated = count_rows(payments_query, count_mode_arg(request.args, keyset=bool(cursor)))
+            payments_data, has_more, next_cursor = paginate(
+                payments_query, Payment.payment_date, Payment.id, limit,
+                cursor=cursor, offset=offset, nullable=True,
+                row_key=lambda row: (row[0].payment_date, row[0].id)
+            )
+        except ValueError as page_error:
+            return jsonify({"error": str(page_error)}), 400
         
-        # Build response
-        payments_list = []
-        for payment, student in payments_data:
-            # Get student's enrollments to determine faculty
-            enrollment = Enrollment.query.filter_by(student_id=student.id).first()
-            faculty = "Unknown"
-            if enrollment and enrollment.course and enrollment.course.faculty:
-                faculty = enrollment.course.faculty.name
-            
-            # Format date
-            payment_date = payment.payment_date.strftime('%b %d, %Y') if payment.payment_date else 'N/A'
-            
-            # Determine status
-            status = "Paid"
-            if payment.status == 'PENDING':
-                status = "Pending"
-            elif payment.status == 'FAILED':
-                status = "Failed"
-            
-            payments_list.append({
-                "id": f"PAY-{payment.id}",  # alyan's modification: Use unique payment ID instead of student ID
-                "payment_id": payment.id,  # alyan's modification: Include actual payment ID
-                "student_id": student.id,
-                "student_name": student.username,
-                "faculty": faculty,
-                "amount": payment.amount,
-                "date": payment_date,
-                "status": status
-            })
+        payments_list = recent_payment.many(payments_data)
         
         return jsonify({
             "payments": payments_list,
-            "total_count": total_count
+            "total_count": total_count,
+            "total_count_estimated": estimated,
+            "has_more": has_more,
+            "next_cursor": next_cursor
         }), 200
     
     except Exception as e:
@@ -749,6 +685,7 @@ def get_recent_payments():
 @finance_bp.route("/payments/by-faculty", methods=["GET"])
 @jwt_required()
 @require_admin
+@query_budget(3)
 def get_payments_by_faculty():
     """
     Returns payment collection progress grouped by faculty/department.
@@ -767,23 +704,10 @@ def get_payments_by_faculty():
     }
     """
     try:
-        # Helper function to get faculty name from course
-        def get_faculty_from_course(course):
-            if course and course.faculty:
-                return course.faculty.name
-            return "Unknown"
-        
-        # Get all enrollments with course info
+        # One grouped query over ACTIVE enrollments and the ledger's student totals
         # alyan's modification: Added error handling for database query
         try:
-            enrollments = db.session.query(
-                Enrollment,
-                Course
-            ).join(
-                Course, Enrollment.course_id == Course.id
-            ).filter(
-                Enrollment.status == 'ACTIVE'
-            ).all()
+            faculty_totals = FinanceQueries.payments_by_faculty()
         except Exception as query_error:
             print(f"Database query error: {str(query_error)}")
             # Return empty result if query fails
@@ -793,49 +717,21 @@ def get_payments_by_faculty():
                 "error": str(query_error)
             }), 200
         
-        # Group by faculty
-        faculty_data = {}
         faculty_colors = {
             "Engineering": "#10b981",
             "Computer Science": "#fbbf24",
             "Digital Arts": "#3b82f6",
             "Business Informatics": "#10b981"
         }
-        
-        for enrollment, course in enrollments:
-            faculty = get_faculty_from_course(course)  # alyan's modification: Pass course object instead of name
-            
-            if faculty not in faculty_data:
-                faculty_data[faculty] = {
-                    "name": faculty,
-                    "collected": 0.0,
-                    "total": 0.0,
-                    "color": faculty_colors.get(faculty, "#10b981")
-                }
-            
-            # Add to total expected fees
-            faculty_data[faculty]["total"] += enrollment.course_fee
-            
-            # Get payments for this student
-            student_payments = Payment.query.filter_by(
-                student_id=enrollment.student_id,
-                status='RECEIVED'
-            ).all()
-            
-            # Calculate collected amount for this enrollment
-            # This is a simplified calculation - in reality, you'd need to track
-            # which payments correspond to which enrollments
-            total_paid = sum(p.amount for p in student_payments)
-            total_fees = sum(
-                e.course_fee for e in Enrollment.query.filter_by(
-                    student_id=enrollment.student_id
-                ).all()
-            )
-            
-            # Proportionally allocate payments to this enrollment
-            if total_fees > 0:
-                enrollment_collected = (enrollment.course_fee / total_fees) * total_paid
-                faculty_data[faculty]["collected"] += enrollment_collected
+        faculty_data = {
+            row.name: {
+                "name": row.name,
+                "collected": float(row.collected or 0.0),
+                "total": float(row.total or 0.0),
+                "color": faculty_colors.get(row.name, "#10b981")
+            }
+            for row in faculty_totals
+        }
         
         # Build response with percentages
         faculties_list = []
@@ -874,15 +770,19 @@ def get_payments_by_faculty():
 @finance_bp.route("/bank-reconciliation", methods=["GET"])
 @jwt_required()
 @require_admin
+@query_budget(4)
 def get_bank_reconciliation():
     """
     Returns bank transactions with reconciliation status and summary (alyan's modification).
     
     Query Parameters:
     - limit: Number of records to return (default: 50)
-    - offset: Pagination offset (default: 0)
+    - cursor: Cursor returned as 'next_cursor' by the previous page (optional)
+    - offset: Pagination offset, when no cursor is given (default: 0)
     - status: Filter by status ('matched' or 'unmatched') (optional)
     
+    The summary counts come from per-status totals, so no count query runs.
+    
     Returns:
     {
         "summary": {
@@ -891,42 +791,54 @@ def get_bank_reconciliation():
             "unmatched": 2,
             "total_amount": 24950
         },
-        "transactions": [...]
+        "transactions": [...],
+        "has_more": false,
+        "next_cursor": null
     }
     """
     try:
         # Get query parameters
         limit = request.args.get('limit', default=50, type=int)
         offset = request.args.get('offset', default=0, type=int)
+        cursor = request.args.get('cursor', type=str)
         status_filter = request.args.get('status', type=str)
         
-        # Build query
-        query = BankTransaction.query
+        if limit <= 0:
+            return jsonify({"error": "limit must be greater than 0"}), 400
         
-        # Apply status filter
-        if status_filter:
-            if status_filter.lower() == 'matched':
-                query = query.filter(BankTransaction.status == 'Matched')
-            elif status_filter.lower() == 'unmatched':
-                query = query.filter(BankTransaction.status == 'Unmatched')
-        
-        # Get total count before pagination
-        total_count = query.count()
-        
-        # Apply pagination and ordering
-        transactions = query.order_by(desc(BankTransaction.transaction_date)).offset(offset).limit(limit).all()
+        # Counts per status: one GROUP BY, cached until bank_transactions changes
+        summary = dict(metrics_cache.get_or_compute(
+            'bank_reconciliation_summary',
+            FinanceQueries.bank_reconciliation_summary,
+            tags=('bank_transactions',)
+        ))
+        by_status = summary.pop('by_status')
+
+        # Build query (student names come from the same SELECT)
+        query = BankTransaction.query.options(joinedload(BankTransaction.matched_student))
         
-        # Calculate summary statistics
-        all_transactions = BankTransaction.query.all()
-        total_amount = sum(t.amount for t in all_transactions)
-        matched_count = sum(1 for t in all_transactions if t.status == 'Matched')
-        unmatched_count = sum(1 for t in all_transactions if t.status == 'Unmatched')
-        pending_count = sum(1 for t in all_transactions if t.status == 'Pending')
+        # Apply status filter
+        if status_filter and status_filter.lower() == 'matched':
+            query = query.filter(BankTransaction.status == 'Matched')
+            summary['total'] = by_status.get('Matched', 0)
+        elif status_filter and status_filter.lower() == 'unmatched':
+            query = query.filter(BankTransaction.status == 'Unmatched')
+            summary['total'] = by_status.get('Unmatched', 0)
+        
+        # Newest first; id keeps same-day rows in a stable order across pages
+        try:
+            transactions, has_more, next_cursor = paginate(
+                query, BankTransaction.transaction_date, BankTransaction.id, limit,
+                cursor=cursor, offset=offset,
+                row_key=lambda txn: (txn.transaction_date, txn.id)
+            )
+        except ValueError as cursor_error:
+            return jsonify({"error": str(cursor_error)}), 400
         
         # Format transactions
         transactions_list = []
         for txn in transactions:
-            transaction_data = {
+            transactions_list.append({
                 'id': txn.id,
                 'bank_ref': txn.bank_ref,
                 'amount': txn.amount,
@@ -935,28 +847,14 @@ def get_bank_reconciliation():
                 'status': txn.status,
                 'matched_payment_id': txn.matched_payment_id,
                 'student_id': f"STD-{txn.matched_student_id:03d}" if txn.matched_student_id else None,
-                'student_name': None
-            }
-            
-            # Get student name if matched
-            if txn.matched_student_id:
-                student = User.query.get(txn.matched_student_id)
-                if student:
-                    transaction_data['student_name'] = student.username
-            
-            transactions_list.append(transaction_data)
-        
-        summary = {
-            'total': total_count,
-            'matched': matched_count,
-            'unmatched': unmatched_count,
-            'pending': pending_count,
-            'total_amount': total_amount
-        }
+                'student_name': txn.matched_student.username if txn.matched_student else None
+            })
         
         return jsonify({
             'summary': summary,
-            'transactions': transactions_list
+            'transactions': transactions_list,
+            'has_more': has_more,
+            'next_cursor': next_cursor
         }), 200
     
     except Exception as e:
@@ -974,16 +872,19 @@ def get_bank_reconciliation():
 @finance_bp.route("/students", methods=["GET"])
 @jwt_required()
 @require_admin
+@query_budget(5)
 def get_all_students():
     """
     Returns all students with their payment information for the Student List page.
     
     Query Parameters:
     - search: Search by name or student ID (optional)
-    - faculty: Filter by faculty (optional)
+    - faculty: Filter by faculty name (the student's faculty, or their first course's faculty when none is assigned) (optional)
     - status: Filter by payment status - Paid/Pending/Unpaid (optional)
     - limit: Number of records to return (default: 50)
-    - offset: Pagination offset (default: 0)
+    - cursor: Cursor returned as 'next_cursor' by the previous page (optional)
+    - offset: Pagination offset, when no cursor is given (default: 0)
+    - count: 'exact', 'estimate' or 'none' (default: exact for offset pages, estimate for cursor pages)
     
     Returns:
     {
@@ -1001,6 +902,9 @@ def get_all_students():
             }
         ],
         "total_count": 100,
+        "total_count_estimated": false,
+        "has_more": true,
+        "next_cursor": "WzUwXQ",
         "faculties": ["Engineering", "Computer Science", "Digital Arts", "Business Informatics"]
     }
     """
@@ -1011,9 +915,40 @@ def get_all_students():
         status_filter = request.args.get('status', type=str)
         limit = request.args.get('limit', default=50, type=int)
         offset = request.args.get('offset', default=0, type=int)
+        cursor = request.args.get('cursor', type=str)
+        
+        if limit <= 0:
+            return jsonify({"error": "limit must be greater than 0"}), 400
+        
+        # Totals come from the ledger summary (no ledger row = nothing enrolled or paid yet)
+        dues = func.coalesce(User.dues_balance, 0)
+        paid = func.coalesce(StudentLedgerSummary.total_paid, 0)
+        
+        # Status logic (evaluated in SQL so it can be filtered and counted):
+        # - "Paid": dues == 0 (fully paid)
+        # - "Pending": dues > 0 AND paid > 0 (partially paid)
+        # - "Unpaid": paid == 0 (no payment made)
+        payment_status = LedgerService.payment_status_case(dues, paid)
+        
+        # Faculty is the student's own faculty, falling back to the faculty of
+        # their first course for students without one assigned
+        faculty_name = func.coalesce(Faculty.name, StudentLedgerSummary.faculty_name, 'Unknown')
         
         # Base query: Get all non-admin users
-        query = User.query.filter(User.is_admin == False)
+        query = db.session.query(
+            User.id,
+            User.username,
+            User.email,
+            dues.label('dues'),
+            func.coalesce(StudentLedgerSummary.total_fees, 0).label('total_fees'),
+            paid.label('paid'),
+            faculty_name.label('faculty'),
+            payment_status.label('status')
+        ).outerjoin(
+            Faculty, Faculty.id == User.faculty_id
+        ).outerjoin(
+            StudentLedgerSummary, StudentLedgerSummary.student_id == User.id
+        ).filter(User.is_admin == False)
         
         # Apply search filter
         if search:
@@ -1036,15 +971,35 @@ def get_all_students():
             
             query = query.filter(db.or_(*search_filters))
         
-        # Get total count before pagination
-        total_count = query.count()
+        # Apply faculty filter (by User.faculty_id, so it can use the foreign key index)
+        if faculty_filter and faculty_filter.lower() not in ['all', 'all faculties']:
+            unassigned_match = db.and_(
+                User.faculty_id.is_(None),
+                func.coalesce(StudentLedgerSummary.faculty_name, 'Unknown') == faculty_filter
+            )
+            selected_faculty = Faculty.query.filter_by(name=faculty_filter).first()
+            if selected_faculty:
+                query = query.filter(db.or_(User.faculty_id == selected_faculty.id, unassigned_match))
+            else:
+                query = query.filter(unassigned_match)
+        
+        # Apply status filter
+        if status_filter:
+            query = query.filter(payment_status == status_filter.capitalize())
         
-        # Apply pagination
-        students = query.offset(offset).limit(limit).all()
+        # Total after filtering, then the page in id order
+        try:
+            total_count, estimated = count_rows(query, count_mode_arg(request.args, keyset=bool(cursor)))
+            students, has_more, next_cursor = paginate(
+                query, None, User.id, limit,
+                cursor=cursor, offset=offset, descending=False,
+                row_key=lambda student: (student.id,)
+            )
+        except ValueError as page_error:
+            return jsonify({"error": str(page_error)}), 400
         
         # Get all unique faculties from Faculty table for the filter dropdown
         # alyan's modification: Fixed to query Faculty table directly since Course.faculty is now a relationship
-        from models import Faculty
         all_faculties = Faculty.query.all()
         faculties_list = [f.name for f in all_faculties]
         
@@ -1052,63 +1007,24 @@ def get_all_students():
         students_list = []
         
         for student in students:
-            # Calculate total fees from enrollments
-            enrollments = Enrollment.query.filter_by(student_id=student.id).all()
-            total_fees = sum(e.course_fee for e in enrollments) if enrollments else 0.0
-            
-            # Calculate paid amount from payments
-            payments = Payment.query.filter_by(
-                student_id=student.id,
-                status='RECEIVED'
-            ).all()
-            paid_amount = sum(p.amount for p in payments) if payments else 0.0
-            
-            # Get dues balance
-            dues = float(student.dues_balance) if student.dues_balance else 0.0
-            
-            # Determine faculty from first enrollment's course
-            faculty = "Unknown"
-            if enrollments:
-                first_enrollment = enrollments[0]
-                if first_enrollment.course and first_enrollment.course.faculty:
-                    faculty = first_enrollment.course.faculty.name  # Default
-            
-            # Determine status
-            # Status logic:
-            # - "Paid": dues == 0 (fully paid)
-            # - "Pending": dues > 0 AND paid > 0 (partially paid)
-            # - "Unpaid": paid == 0 (no payment made)
-            if dues == 0:
-                status = "Paid"
-            elif paid_amount > 0:
-                status = "Pending"
-            else:
-                status = "Unpaid"
-            
-            # Apply filters
-            if faculty_filter and faculty_filter.lower() not in ['all', 'all faculties']:
-                if faculty != faculty_filter:
-                    continue
-            
-            if status_filter:
-                if status.lower() != status_filter.lower():
-                    continue
-            
             students_list.append({
                 "id": f"STD-{str(student.id).zfill(3)}",
                 "user_id": student.id,
                 "name": student.username or "Unknown",
                 "email": student.email or None,
-                "faculty": faculty,
-                "totalFees": round(total_fees, 2),
-                "paid": round(paid_amount, 2),
-                "dues": round(dues, 2),
-                "status": status
+                "faculty": student.faculty,
+                "totalFees": round(student.total_fees, 2),
+                "paid": round(student.paid, 2),
+                "dues": round(student.dues, 2),
+                "status": student.status
             })
         
         return jsonify({
             "students": students_list,
             "total_count": total_count,
+            "total_count_estimated": estimated,
+            "has_more": has_more,
+            "next_cursor": next_cursor,
             "faculties": sorted(faculties_list)  # alyan's modification: Return sorted list of faculties
         }), 200
     
@@ -1130,6 +1046,7 @@ def get_all_students():
 @finance_bp.route("/students/<int:student_id>", methods=["GET"])
 @jwt_required()
 @require_admin
+@query_budget(8)
 def get_student_details(student_id):
     """
     Returns detailed information for a specific student.
@@ -1151,7 +1068,8 @@ def get_student_details(student_id):
         },
         "enrollments": [...],
         "payments": [...],
-        "notifications": [...]
+        "notifications": [...],
+        "activity": [...]
     }
     """
     try:
@@ -1163,56 +1081,23 @@ def get_student_details(student_id):
         if student.is_admin:
             return jsonify({"error": "Cannot view admin user details"}), 400
         
-        # Calculate total fees from enrollments
-        enrollments = Enrollment.query.filter_by(student_id=student.id).all()
-        total_fees = sum(e.course_fee for e in enrollments) if enrollments else 0.0
-        
-        # Calculate paid amount from payments
-        payments = Payment.query.filter_by(
-            student_id=student.id,
-            status='RECEIVED'
-        ).all()
-        paid_amount = sum(p.amount for p in payments) if payments else 0.0
+        # Totals and faculty snapshot come from the ledger summary
+        ledger = StudentLedgerSummary.query.get(student.id)
+        total_fees = ledger.total_fees if ledger else 0.0
+        paid_amount = ledger.total_paid if ledger else 0.0
+        faculty = ledger.faculty_name if ledger and ledger.faculty_name else "Unknown"
         
         # Get dues balance
         dues = float(student.dues_balance) if student.dues_balance else 0.0
         
-        # Determine faculty from enrollments
-        faculty = "Unknown"
-        if enrollments:
-            first_enrollment = enrollments[0]
-            if first_enrollment.course and first_enrollment.course.faculty:
-                faculty = first_enrollment.course.faculty.name  # Default
-        
         # Determine status
-        if dues == 0:
-            status = "Paid"
-        elif paid_amount > 0:
-            status = "Pending"
-        else:
-            status = "Unpaid"
+        status = LedgerService.payment_status(dues, paid_amount)
         
-        # Build enrollments list
-        enrollments_list = []
-        for enrollment in enrollments:
-            try:
-                course_name = enrollment.course.name if enrollment.course else "Unknown Course"
-                enrollments_list.append({
-                    "id": enrollment.id,
-                    "course_name": course_name,
-                    "course_fee": enrollment.course_fee,
-                    "enrollment_date": enrollment.enrollment_date.isoformat() if enrollment.enrollment_date else None,
-                    "status": enrollment.status
-                })
-            except Exception as err:
-                print(f"Warning: Error processing enrollment {enrollment.id}: {str(err)}")
-                enrollments_list.append({
-                    "id": enrollment.id,
-                    "course_name": "Unknown Course",
-                    "course_fee": enrollment.course_fee,
-                    "enrollment_date": enrollment.enrollment_date.isoformat() if enrollment.enrollment_date else None,
-                    "status": enrollment.status
-                })
+        # Build enrollments list (courses joined in by the serializer's load plan)
+        enrollments = enrollment_with_course.load(
+            Enrollment.query.filter_by(student_id=student.id)
+        ).all()
+        enrollments_list = enrollment_with_course.many(enrollments)
         
         # Build payments list
         all_payments = Payment.query.filter_by(student_id=student.id).order_by(
@@ -1245,6 +1130,20 @@ def get_student_details(student_id):
                 "read": notification.is_read
             })
         
+        # Build activity list (audit trail of actions on the student)
+        activity_list = []
+        action_logs = ActionLog.query.filter_by(student_id=student.id).order_by(
+            ActionLog.created_at.desc()
+        ).limit(10).all()  # Get last 10 actions
+        
+        for action_log in action_logs:
+            activity_list.append({
+                "id": action_log.id,
+                "type": action_log.action_type,
+                "description": action_log.action_description,
+                "date": action_log.created_at.isoformat() if action_log.created_at else None
+            })
+        
         # Build student data
         student_data = {
             "id": f"STD-{str(student.id).zfill(3)}",
@@ -1263,7 +1162,8 @@ def get_student_details(student_id):
             "student": student_data,
             "enrollments": enrollments_list,
             "payments": payments_list,
-            "notifications": notifications_list
+            "notifications": notifications_list,
+            "activity": activity_list
         }), 200
     
     except Exception as e:
@@ -1288,6 +1188,7 @@ def get_student_details(student_id):
 @finance_bp.route("/fee-structure", methods=["GET"])
 @jwt_required()
 @require_admin
+@query_budget(4)
 def get_fee_structure():
     """
     Returns all fee categories with their items grouped by category.
@@ -1591,6 +1492,64 @@ def calculate_fees():
         }), 500
 
 
+# Upper bound on quotes accepted by one batch request
+MAX_FEE_QUOTES_PER_BATCH = 5000
+
+
+# ============================================================================
+# ENDPOINT: POST /api/finance/calculate-fees/batch
+# Description: Price many enrollments against the active fee schedule at once
+# ============================================================================
+@finance_bp.route("/calculate-fees/batch", methods=["POST"])
+@jwt_required()
+@require_admin
+def calculate_fees_batch():
+    """
+    Quote fees for many (student, courses, bus) combinations in one call.
+    The fee schedule and course credits are loaded once for the whole batch.
+
+    Request Body:
+    - quotes: [{"student_id": 12, "course_ids": [1, 4], "include_bus": true}, ...]
+    - include_breakdown: Include line items in every quote (default: false)
+    """
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "No data provided"}), 400
+
+        quotes = data.get('quotes')
+        if not isinstance(quotes, list) or not quotes:
+            return jsonify({"error": "quotes must be a non-empty list"}), 400
+        if len(quotes) > MAX_FEE_QUOTES_PER_BATCH:
+            return jsonify({"error": f"At most {MAX_FEE_QUOTES_PER_BATCH} quotes per request"}), 400
+
+        parsed = []
+        for index, quote in enumerate(quotes):
+            if not isinstance(quote, dict):
+                return jsonify({"error": f"quotes[{index}] must be an object"}), 400
+            course_ids = quote.get('course_ids')
+            if not isinstance(course_ids, list):
+                return jsonify({"error": f"quotes[{index}].course_ids must be a list"}), 400
+            try:
+                course_ids = [int(course_id) for course_id in course_ids]
+            except (TypeError, ValueError):
+                return jsonify({"error": f"quotes[{index}].course_ids must contain integers"}), 400
+            parsed.append((quote.get('student_id'), course_ids, bool(quote.get('include_bus', False))))
+
+        results = FeeCalculator.quote_many(parsed, include_breakdown=bool(data.get('include_breakdown', False)))
+
+        return jsonify({
+            "quotes": results,
+            "count": len(results),
+            "grand_total": sum(result['total'] for result in results)
+        }), 200
+
+    except Exception as e:
+        return jsonify({
+            "error": f"Failed to calculate fees: {str(e)}"
+        }), 500
+
+
 # ============================================================================
 # BANK RECONCILIATION PAGE ENDPOINTS (alyan's modification)
 # ============================================================================
@@ -1602,96 +1561,48 @@ def calculate_fees():
 @finance_bp.route("/bank-reconciliation/sync", methods=["POST"])
 @jwt_required()
 @require_admin
+@async_capable
 def sync_bank_data():
     """
     Syncs/imports bank transactions from CSV file or manual entries.
     Automatically attempts to match transactions based on amount/reference.
+
+    File import (CSV, MT940 or CAMT.053), parsed incrementally:
+    - multipart/form-data with a `file` part (and optional `format` field), or
+    - the raw statement as the request body with ?source=file&format=...
+    Add ?stream=ndjson (raw body only) to receive one progress line per
+    committed batch.
     """
+    if request.files or request.args.get('source') == 'file':
+        return _import_statement_file()
+
     try:
         data = request.get_json()
         if not data:
             return jsonify({"error": "No data provided"}), 400
         
         source = data.get('source')  # 'file' or 'manual'
-        imported_count = 0
-        auto_matched = 0
-        unmatched = 0
-        duplicates_skipped = 0
+        counts = {"imported_count": 0, "auto_matched": 0, "unmatched": 0, "duplicates_skipped": 0}
         
         if source == 'manual':
             transactions_data = data.get('transactions', [])
             if not transactions_data:
                 return jsonify({"error": "No transactions provided"}), 400
             
-            for txn_data in transactions_data:
-                bank_ref = txn_data.get('bank_ref')
-                amount = float(txn_data.get('amount', 0))
-                date_str = txn_data.get('date')
-                description = txn_data.get('description', '')
-                
-                if not bank_ref or not amount or not date_str:
-                    continue
-                
-                # Check for duplicates
-                existing = BankTransaction.query.filter_by(bank_ref=bank_ref).first()
-                if existing:
-                    duplicates_skipped += 1
-                    continue
-                
-                # Parse date
-                try:
-                    transaction_date = datetime.strptime(date_str, '%Y-%m-%d').replace(tzinfo=timezone.utc)
-                except:
-                    transaction_date = datetime.now(timezone.utc)
-                
-                # Create bank transaction
-                bank_txn = BankTransaction(
-                    bank_ref=bank_ref,
-                    amount=amount,
-                    transaction_date=transaction_date,
-                    bank_description=description,
-                    status='Unmatched'
-                )
-                
-                # Try to auto-match
-                matched = False
-                # Match by amount and date (within 7 days)
-                payment = Payment.query.filter(
-                    Payment.amount == amount,
-                    Payment.payment_date >= transaction_date - timedelta(days=7),
-                    Payment.payment_date <= transaction_date + timedelta(days=7)
-                ).first()
-                
-                if payment:
-                    bank_txn.matched_payment_id = payment.id
-                    bank_txn.matched_student_id = payment.student_id
-                    bank_txn.status = 'Matched'
-                    bank_txn.matched_at = datetime.now(timezone.utc)
-                    bank_txn.matched_by = get_jwt_identity()
-                    bank_txn.notes = 'Auto-matched by system'
-                    auto_matched += 1
-                    matched = True
-                else:
-                    unmatched += 1
-                
-                db.session.add(bank_txn)
-                imported_count += 1
+            # Duplicate check, candidate lookup and insert are set-based,
+            # so the query count does not grow with the statement size
+            counts = BankMatchingService.import_lines(transactions_data, matched_by=get_jwt_identity())
         
         elif source == 'file':
-            # For CSV file upload, would need to parse base64 data
-            # For now, return error suggesting manual entry
             return jsonify({
-                "error": "CSV file upload not yet implemented. Please use manual entry."
-            }), 501
+                "error": "Upload the statement as multipart/form-data (file) or as the request body with ?source=file&format=csv|mt940|camt053"
+            }), 400
         
         db.session.commit()
         
         return jsonify({
             "msg": "Bank data synced successfully",
-            "imported_count": imported_count,
-            "auto_matched": auto_matched,
-            "unmatched": unmatched,
-            "duplicates_skipped": duplicates_skipped
+            **counts
         }), 200
         
     except Exception as e:
@@ -1705,6 +1616,91 @@ def sync_bank_data():
         }), 500
 
 
+def _import_statement_file():
+    """
+    Stream a statement upload through its parser into
+    BankMatchingService.import_stream, committing batch by batch.
+    """
+    upload = request.files.get('file')
+    if upload is not None:
+        statement = upload.stream
+        filename = upload.filename or ''
+        statement_format = request.form.get('format') or request.args.get('format')
+    else:
+        statement = request.stream
+        filename = ''
+        statement_format = request.args.get('format')
+
+    if not statement_format and '.' in filename:
+        statement_format = STATEMENT_EXTENSIONS.get(filename.rsplit('.', 1)[1].lower())
+    statement_format = (statement_format or '').lower().replace('.', '')
+    if statement_format not in STATEMENT_PARSERS:
+        return jsonify({
+            "error": f"Unsupported statement format. Use one of: {', '.join(STATEMENT_PARSERS)}"
+        }), 400
+
+    stream_format = request.args.get('stream')
+    if stream_format and stream_format != 'ndjson':
+        return jsonify({"error": "Progress can only be streamed as ndjson"}), 400
+    if stream_format and upload is not None:
+        # Uploaded form files are closed once the view returns, before a
+        # streamed body would read them; the raw-body upload has no such limit
+        return jsonify({"error": "Progress streaming requires the statement as the raw request body (?source=file&format=...)"}), 400
+
+    progress_updates = BankMatchingService.import_stream(
+        STATEMENT_PARSERS[statement_format](statement),
+        matched_by=get_jwt_identity(),
+        batch_size=current_app.config.get('BANK_IMPORT_BATCH_SIZE', IMPORT_BATCH_SIZE),
+        time_budget=current_app.config.get('BANK_IMPORT_TIME_BUDGET')
+    )
+
+    def summary(progress):
+        if progress["completed"]:
+            progress["msg"] = "Bank statement imported successfully"
+        else:
+            progress["msg"] = "Time budget reached; upload the same statement again to continue (imported lines are skipped)"
+        return progress
+
+    if stream_format == 'ndjson':
+        def generate():
+            progress = {}
+            try:
+                for progress in progress_updates:
+                    current_app.logger.info(f"Bank statement import progress: {progress}")
+                    report_progress(progress["lines_read"])
+                    yield json.dumps(progress) + "\n"
+                yield json.dumps(summary(dict(progress))) + "\n"
+            except StatementParseError as e:
+                db.session.rollback()
+                yield json.dumps({"error": str(e), **progress}) + "\n"
+            except Exception as e:
+                db.session.rollback()
+                yield json.dumps({"error": f"Failed to import bank statement: {str(e)}", **progress}) + "\n"
+
+        return Response(
+            stream_with_context(generate()),
+            mimetype=STREAM_FORMATS['ndjson'],
+            headers={'X-Accel-Buffering': 'no'}
+        )
+
+    progress = {}
+    try:
+        for progress in progress_updates:
+            current_app.logger.info(f"Bank statement import progress: {progress}")
+            report_progress(progress["lines_read"])
+        return jsonify(summary(progress)), 200
+
+    except StatementParseError as e:
+        db.session.rollback()
+        return jsonify({"error": str(e), **progress}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            "error": f"Failed to import bank statement: {str(e)}",
+            **progress
+        }), 500
+
+
 # ============================================================================
 # ENDPOINT: GET /api/finance/bank-reconciliation/<transaction_id>
 # Description: Get detailed information for a specific bank transaction
@@ -1712,12 +1708,16 @@ def sync_bank_data():
 @finance_bp.route("/bank-reconciliation/<int:transaction_id>", methods=["GET"])
 @jwt_required()
 @require_admin
+@query_budget(4)
 def get_bank_transaction_details(transaction_id):
     """
     Returns detailed information for a specific bank transaction.
     """
     try:
-        transaction = BankTransaction.query.get(transaction_id)
+        # Matcher, matched payment (with its student) and matched student load in one statement
+        transaction = BankTransaction.query.options(*bank_transaction_detail_plan).filter_by(
+            id=transaction_id
+        ).first()
         if not transaction:
             return jsonify({"error": "Transaction not found"}), 404
         
@@ -1735,15 +1735,15 @@ def get_bank_transaction_details(transaction_id):
         
         # Get matcher info
         if transaction.matched_by:
-            matcher = User.query.get(transaction.matched_by)
+            matcher = transaction.matcher
             transaction_data['matched_by'] = matcher.username if matcher else None
         
         # Get matched payment info
         matched_payment_data = None
         if transaction.matched_payment_id:
-            payment = Payment.query.get(transaction.matched_payment_id)
+            payment = transaction.matched_payment
             if payment:
-                student = User.query.get(payment.student_id)
+                student = payment.student
                 matched_payment_data = {
                     'id': payment.id,
                     'student_id': payment.student_id,
@@ -1759,7 +1759,7 @@ def get_bank_transaction_details(transaction_id):
         # Get student info
         student_data = None
         if transaction.matched_student_id:
-            student = User.query.get(transaction.matched_student_id)
+            student = transaction.matched_student
             if student:
                 # Calculate dues and total paid
                 total_paid = db.session.query(func.sum(Payment.amount)).filter(
@@ -1875,6 +1875,7 @@ def match_bank_transaction(transaction_id):
             transaction.matched_by = current_user_id
             transaction.notes = data.get('notes', 'New payment created from bank transaction')
             
+            LedgerService.refresh_students([student_id])
             db.session.commit()
             
             return jsonify({
@@ -1901,6 +1902,68 @@ def match_bank_transaction(transaction_id):
         }), 500
 
 
+# ============================================================================
+# ENDPOINT: POST /api/finance/bank-reconciliation/auto-match
+# Description: Match all unmatched bank transactions to payments in one run
+# ============================================================================
+@finance_bp.route("/bank-reconciliation/auto-match", methods=["POST"])
+@jwt_required()
+@require_admin
+@async_capable
+def auto_match_bank_transactions():
+    """
+    Reconcile every Unmatched bank transaction against payments no
+    transaction is matched to yet. Each payment is used at most once;
+    reference number hits are taken first, then amount and date proximity.
+
+    Request Body (optional):
+    - dry_run: Only return the proposed batch for review (default: true)
+    - window_days: Maximum days between transaction and payment (default: 7, max: 90)
+    - transaction_ids: Restrict the run to these transactions, e.g. the
+      ones approved from a dry run
+
+    Returns:
+    - matches: Proposed (or applied) pairs with match_type reference/amount_date
+    - matched_count, reference_matches, unmatched_count, dry_run
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        dry_run = bool(data.get('dry_run', True))
+        window_days = data.get('window_days', MATCH_WINDOW_DAYS)
+        transaction_ids = data.get('transaction_ids')
+
+        if not isinstance(window_days, int) or not 0 <= window_days <= 90:
+            return jsonify({"error": "window_days must be an integer between 0 and 90"}), 400
+        if transaction_ids is not None and (
+            not isinstance(transaction_ids, list) or not all(isinstance(i, int) for i in transaction_ids)
+        ):
+            return jsonify({"error": "transaction_ids must be a list of integers"}), 400
+
+        result = BankMatchingService.auto_match(
+            window_days=window_days,
+            transaction_ids=transaction_ids,
+            dry_run=dry_run,
+            matched_by=get_jwt_identity()
+        )
+        if not dry_run:
+            db.session.commit()
+
+        return jsonify({
+            "msg": "Auto-match preview generated" if dry_run else "Auto-match completed",
+            **result
+        }), 200
+
+    except Exception as e:
+        db.session.rollback()
+        import traceback
+        error_trace = traceback.format_exc()
+        print(f"ERROR in auto_match_bank_transactions: {str(e)}")
+        print(f"Traceback: {error_trace}")
+        return jsonify({
+            "error": f"Failed to auto-match transactions: {str(e)}"
+        }), 500
+
+
 # ============================================================================
 # ENDPOINT: GET /api/finance/bank-reconciliation/suggestions/<transaction_id>
 # Description: Get matching suggestions for an unmatched transaction
@@ -1908,83 +1971,40 @@ def match_bank_transaction(transaction_id):
 @finance_bp.route("/bank-reconciliation/suggestions/<int:transaction_id>", methods=["GET"])
 @jwt_required()
 @require_admin
+@query_budget(10)
 def get_matching_suggestions(transaction_id):
     """
-    Returns AI/algorithm-based suggestions for matching an unmatched transaction.
+    Returns algorithm-based suggestions for matching an unmatched transaction.
+
+    Candidates come from indexed lookups (students whose dues are within 10%
+    of the amount, payments with the same amount within 7 days, and
+    reference/description tokens matching students or payment references),
+    so latency does not grow with the number of students owing money.
+
+    Query Parameters:
+        limit (int): Suggestions per page (default 10, max 50)
+        offset (int): Suggestions to skip (default 0)
+        candidates_limit (int): Students with dues per page, closest amount first (default 20, max 100)
+        candidates_offset (int): Students with dues to skip (default 0)
     """
     try:
         transaction = BankTransaction.query.get(transaction_id)
         if not transaction:
             return jsonify({"error": "Transaction not found"}), 404
-        
-        suggestions = []
-        
-        # Get students with outstanding dues
-        students_with_dues = User.query.filter(
-            User.dues_balance > 0,
-            User.is_admin == False
-        ).all()
-        
-        unmatched_students = []
-        for student in students_with_dues:
-            unmatched_students.append({
-                'student_id': student.id,
-                'student_name': student.username,
-                'dues_balance': student.dues_balance
-            })
-            
-            # Check for exact amount match
-            if abs(student.dues_balance - transaction.amount) < 0.01:
-                suggestions.append({
-                    'type': 'student',
-                    'student_id': student.id,
-                    'student_name': student.username,
-                    'student_email': student.email,
-                    'dues_balance': student.dues_balance,
-                    'match_confidence': 'HIGH',
-                    'reason': 'Exact amount match with outstanding dues'
-                })
-            # Check for similar amount (within 10%)
-            elif abs(student.dues_balance - transaction.amount) / transaction.amount <= 0.1:
-                suggestions.append({
-                    'type': 'student',
-                    'student_id': student.id,
-                    'student_name': student.username,
-                    'student_email': student.email,
-                    'dues_balance': student.dues_balance,
-                    'match_confidence': 'MEDIUM',
-                    'reason': f'Similar amount (within 10%) - Dues: ${student.dues_balance}, Transaction: ${transaction.amount}'
-                })
-        
-        # Check for payments with similar amount and date
-        if transaction.transaction_date:
-            date_range_start = transaction.transaction_date - timedelta(days=7)
-            date_range_end = transaction.transaction_date + timedelta(days=7)
-            
-            similar_payments = Payment.query.filter(
-                Payment.amount == transaction.amount,
-                Payment.payment_date >= date_range_start,
-                Payment.payment_date <= date_range_end,
-                Payment.status == 'RECEIVED'
-            ).all()
-            
-            for payment in similar_payments:
-                student = User.query.get(payment.student_id)
-                if student:
-                    suggestions.append({
-                        'type': 'payment',
-                        'payment_id': payment.id,
-                        'student_name': student.username,
-                        'amount': payment.amount,
-                        'payment_date': payment.payment_date.strftime('%Y-%m-%d') if payment.payment_date else None,
-                        'match_confidence': 'HIGH',
-                        'reason': 'Exact amount and date match'
-                    })
-        
-        # Sort suggestions by confidence
-        confidence_order = {'HIGH': 1, 'MEDIUM': 2, 'LOW': 3}
-        suggestions.sort(key=lambda x: confidence_order.get(x.get('match_confidence', 'LOW'), 3))
-        
+
+        limit = min(max(request.args.get('limit', default=10, type=int), 1), 50)
+        offset = max(request.args.get('offset', default=0, type=int), 0)
+        candidates_limit = min(max(request.args.get('candidates_limit', default=20, type=int), 1), 100)
+        candidates_offset = max(request.args.get('candidates_offset', default=0, type=int), 0)
+
+        result = MatchSuggestionService.suggest(
+            transaction,
+            offset=offset,
+            limit=limit,
+            candidates_offset=candidates_offset,
+            candidates_limit=candidates_limit
+        )
+
         return jsonify({
             'transaction': {
                 'id': transaction.id,
@@ -1992,8 +2012,7 @@ def get_matching_suggestions(transaction_id):
                 'amount': transaction.amount,
                 'date': transaction.transaction_date.strftime('%Y-%m-%d') if transaction.transaction_date else None
             },
-            'suggestions': suggestions[:10],  # Limit to top 10
-            'unmatched_students': unmatched_students
+            **result
         }), 200
         
     except Exception as e:
@@ -2013,6 +2032,7 @@ def get_matching_suggestions(transaction_id):
 @finance_bp.route("/reports/types", methods=["GET"])
 @jwt_required()
 @require_admin
+@query_budget(3)
 def get_report_types():
     """
     Returns available report types and configuration options (alyan's modification).
@@ -2056,6 +2076,13 @@ def get_report_types():
                 "description": "Summary of all financial transactions and metrics",
                 "icon": "document",
                 "available_formats": ["pdf", "excel", "json"]
+            },
+            {
+                "id": "ar_aging",
+                "name": "Receivables Aging",
+                "description": "Outstanding charges by age (0-30, 31-60, 61-90, 90+ days) per faculty",
+                "icon": "chart",
+                "available_formats": ["pdf", "excel", "json"]
             }
         ]
         
@@ -2077,6 +2104,7 @@ def get_report_types():
 @finance_bp.route("/reports/generate", methods=["POST"])
 @jwt_required()
 @require_admin
+@async_capable
 def generate_report():
     """
     Generates a custom report based on parameters (alyan's modification).
@@ -2138,6 +2166,12 @@ def generate_report():
             report_data, summary = _generate_university_level_report(start_date, end_date)
         elif report_type == 'finance_overview':
             report_data, summary = _generate_finance_overview_report(start_date, end_date)
+        elif report_type == 'ar_aging':
+            try:
+                as_of = datetime.fromisoformat(end_date).date() if end_date else None
+            except (TypeError, ValueError):
+                return jsonify({"error": f"Invalid end_date: {end_date} (expected YYYY-MM-DD)"}), 400
+            report_data, summary = _generate_ar_aging_report(faculty, as_of)
         else:
             return jsonify({"error": f"Unknown report type: {report_type}"}), 400
         
@@ -2373,34 +2407,50 @@ def download_report(report_id):
 @finance_bp.route("/reports/history", methods=["GET"])
 @jwt_required()
 @require_admin
+@query_budget(4)
 def get_report_history():
     """
     Returns list of recently generated reports (alyan's modification).
     
     Query Parameters:
     - limit: Number of records (default: 10)
-    - offset: Pagination offset (default: 0)
+    - cursor: Cursor returned as 'next_cursor' by the previous page (optional)
+    - offset: Pagination offset, when no cursor is given (default: 0)
     - report_type: Filter by type (optional)
+    - count: 'exact', 'estimate' or 'none' (default: exact for offset pages, estimate for cursor pages)
     """
     try:
         limit = request.args.get('limit', default=10, type=int)
         offset = request.args.get('offset', default=0, type=int)
+        cursor = request.args.get('cursor', type=str)
         report_type_filter = request.args.get('report_type', type=str)
         
+        if limit <= 0:
+            return jsonify({"error": "limit must be greater than 0"}), 400
+        
         query = GeneratedReport.query
         
         if report_type_filter:
             query = query.filter(GeneratedReport.report_type == report_type_filter)
         
-        total_count = query.count()
-        reports = query.order_by(desc(GeneratedReport.generated_at)).offset(offset).limit(limit).all()
+        try:
+            total_count, estimated = count_rows(query, count_mode_arg(request.args, keyset=bool(cursor)))
+            reports, has_more, next_cursor = paginate(
+                query, GeneratedReport.generated_at, GeneratedReport.id, limit,
+                cursor=cursor, offset=offset, nullable=True,
+                row_key=lambda report: (report.generated_at, report.id)
+            )
+        except ValueError as page_error:
+            return jsonify({"error": str(page_error)}), 400
         
         reports_list = [report.to_dict() for report in reports]
         
         return jsonify({
             "reports": reports_list,
             "total_count": total_count,
-            "has_more": (offset + limit) < total_count
+            "total_count_estimated": estimated,
+            "has_more": has_more,
+            "next_cursor": next_cursor
         }), 200
         
     except Exception as e:
@@ -2732,13 +2782,24 @@ def _generate_student_level_report(faculty, start_date, end_date):
     
     if faculty and faculty != 'All Faculties':
         # Filter by faculty through enrollments
-        student_ids = db.session.query(Enrollment.student_id).join(Course).filter(
-            Course.faculty == faculty
+        student_ids = db.session.query(Enrollment.student_id).join(Course).join(
+            Faculty, Course.faculty_id == Faculty.id
+        ).filter(
+            Faculty.name == faculty
         ).distinct().all()
         student_ids = [s[0] for s in student_ids]
         query = query.filter(User.id.in_(student_ids))
     
-    students = query.all()
+    # Whole-history totals are materialized in the ledger; date-bounded
+    # reports still aggregate the raw rows that fall inside the range
+    use_ledger = not start_date and not end_date
+    if use_ledger:
+        rows = query.add_entity(StudentLedgerSummary).outerjoin(
+            StudentLedgerSummary, StudentLedgerSummary.student_id == User.id
+        ).all()
+    else:
+        rows = [(student, None) for student in query.all()]
+    students = [student for student, _ in rows]
     
     data = []
     total_fees = 0
@@ -2748,45 +2809,52 @@ def _generate_student_level_report(faculty, start_date, end_date):
     pending_count = 0
     unpaid_count = 0
     
-    for student in students:
-        # Get enrollments
-        enrollments = Enrollment.query.filter(Enrollment.student_id == student.id)
-        if start_date:
-            enrollments = enrollments.filter(Enrollment.enrollment_date >= start_date)
-        if end_date:
-            enrollments = enrollments.filter(Enrollment.enrollment_date <= end_date)
-        
-        enrollments_list = enrollments.all()
-        student_total_fees = sum(e.course_fee for e in enrollments_list)
-        
-        # Get payments
-        payments = Payment.query.filter(
-            Payment.student_id == student.id,
-            Payment.status == 'RECEIVED'
-        )
-        if start_date:
-            payments = payments.filter(Payment.payment_date >= start_date)
-        if end_date:
-            payments = payments.filter(Payment.payment_date <= end_date)
-        
-        payments_list = payments.all()
-        student_paid = sum(p.amount for p in payments_list)
+    for student, ledger in rows:
         student_dues = student.dues_balance
         
-        # Get faculty from first enrollment
-        faculty_name = None
-        if enrollments_list:
-            first_enrollment = enrollments_list[0]
-            if first_enrollment.course and first_enrollment.course.faculty:
-                faculty_name = first_enrollment.course.faculty.name
-        
-        # Get last payment date
-        last_payment_date = None
-        if payments_list:
-            last_payment = max(payments_list, key=lambda p: p.payment_date)
-            last_payment_date = last_payment.payment_date.strftime('%Y-%m-%d')
+        if use_ledger:
+            student_total_fees = ledger.total_fees if ledger else 0
+            student_paid = ledger.total_paid if ledger else 0
+            faculty_name = ledger.faculty_name if ledger else None
+            last_payment_date = ledger.last_payment_at.strftime('%Y-%m-%d') if ledger and ledger.last_payment_at else None
+        else:
+            # Get enrollments
+            enrollments = Enrollment.query.filter(Enrollment.student_id == student.id)
+            if start_date:
+                enrollments = enrollments.filter(Enrollment.enrollment_date >= start_date)
+            if end_date:
+                enrollments = enrollments.filter(Enrollment.enrollment_date <= end_date)
+            
+            enrollments_list = enrollments.all()
+            student_total_fees = sum(e.course_fee for e in enrollments_list)
+            
+            # Get payments
+            payments = Payment.query.filter(
+                Payment.student_id == student.id,
+                Payment.status == 'RECEIVED'
+            )
+            if start_date:
+                payments = payments.filter(Payment.payment_date >= start_date)
+            if end_date:
+                payments = payments.filter(Payment.payment_date <= end_date)
+            
+            payments_list = payments.all()
+            student_paid = sum(p.amount for p in payments_list)
+            
+            # Get faculty from first enrollment
+            faculty_name = None
+            if enrollments_list:
+                first_enrollment = enrollments_list[0]
+                if first_enrollment.course and first_enrollment.course.faculty:
+                    faculty_name = first_enrollment.course.faculty.name
+            
+            # Get last payment date
+            last_payment_date = None
+            if payments_list:
+                last_payment = max(payments_list, key=lambda p: p.payment_date)
+                last_payment_date = last_payment.payment_date.strftime('%Y-%m-%d')
         
-        status = "Paid" if student_dues == 0 else ("Pending" if student_paid > 0 else "Unpaid")
+        status = LedgerService.payment_status(student_dues, student_paid)
         
         data.append({
             "student_id": f"STD-{student.id:03d}",
@@ -2875,6 +2943,14 @@ def _generate_finance_overview_report(start_date, end_date):
     }
 
 
+def _generate_ar_aging_report(faculty, as_of):
+    """
+    Generate receivables aging report data, as of the given date (None: today).
+    Payments are applied FIFO to the oldest charges in one streaming pass.
+    """
+    return AgingService.report(as_of=as_of, faculty=faculty)
+
+
 # ============================================================================
 # UNPAID STUDENTS PAGE ENDPOINTS (alyan's modification)
 # ============================================================================
@@ -2886,10 +2962,23 @@ def _generate_finance_overview_report(start_date, end_date):
 @finance_bp.route("/unpaid-students", methods=["GET"])
 @jwt_required()
 @require_admin
+@query_budget(4)
 def get_unpaid_students():
     """
     Returns unpaid students with all required fields for the page (alyan's modification).
     
+    Due dates (the student's payment_due_date, else 30 days after the first
+    enrollment) and the latest reminder are kept on the ledger summary, so the
+    statuses are computed in SQL: one query for the page, one grouped count
+    for the summary.
+    
+    Query Parameters:
+    - status: Only students with this status - Overdue/Due Today/Due Soon/Unpaid (optional)
+    - limit: Page size for cursor pagination (optional, default: all rows)
+    - cursor: Cursor returned as 'next_cursor' by the previous page (optional)
+    
+    The summary always covers every unpaid student, whatever the filter or page.
+    
     Returns:
     {
         "summary": {
@@ -2914,125 +3003,35 @@ def get_unpaid_students():
                 "is_blocked": false,
                 "last_reminder_sent": "2025-12-01"
             }
-        ]
+        ],
+        "next_cursor": null
     }
     """
     try:
-        from datetime import datetime, timedelta, timezone
+        status_filter = request.args.get('status', type=str)
+        limit = request.args.get('limit', type=int)
+        cursor = request.args.get('cursor', type=str)
         
-        # Get all students with outstanding dues
-        students = User.query.filter(
-            User.is_admin == False,
-            User.dues_balance > 0
-        ).all()
+        if limit is not None and limit <= 0:
+            return jsonify({"error": "limit must be greater than 0"}), 400
         
-        today = datetime.now(timezone.utc).date()
-        students_list = []
-        overdue_count = 0
-        due_today_count = 0
-        due_soon_count = 0
+        status = None
+        if status_filter and status_filter.lower() != 'all':
+            status = status_filter.replace('-', ' ').replace('_', ' ').title()
+            if status not in DUE_STATUSES:
+                return jsonify({"error": f"status must be one of: {', '.join(DUE_STATUSES)}"}), 400
         
-        for student in students:
-            # Get enrollments to determine faculty and calculate due date
-            enrollments = Enrollment.query.filter_by(student_id=student.id).all()
-            
-            # Determine faculty from first enrollment's course
-            faculty = "Unknown"
-            if enrollments:
-                first_enrollment = enrollments[0]
-                if first_enrollment.course and first_enrollment.course.faculty:
-                    faculty = first_enrollment.course.faculty.name  # Default
-            
-            # Calculate due date (30 days from first enrollment, or use payment_due_date if set)
-            # alyan's modification: Use getattr to safely access new fields that may not exist yet
-            due_date = None
-            days_overdue = 0
-            status = "Unpaid"
-            
-            payment_due_date = getattr(student, 'payment_due_date', None)
-            if payment_due_date:
-                if isinstance(payment_due_date, datetime):
-                    due_date = payment_due_date.date()
-                elif hasattr(payment_due_date, 'date'):
-                    due_date = payment_due_date.date()
-                else:
-                    # Try to parse as date string or use as-is
-                    try:
-                        due_date = datetime.fromisoformat(str(payment_due_date)).date()
-                    except:
-                        due_date = None
-            elif enrollments:
-                first_enrollment_date = enrollments[0].enrollment_date
-                if first_enrollment_date:
-                    if isinstance(first_enrollment_date, datetime):
-                        due_date = (first_enrollment_date + timedelta(days=30)).date()
-                    elif hasattr(first_enrollment_date, 'date'):
-                        due_date = (first_enrollment_date + timedelta(days=30)).date()
-                    else:
-                        # Try to parse and add 30 days
-                        try:
-                            if isinstance(first_enrollment_date, str):
-                                parsed_date = datetime.fromisoformat(first_enrollment_date)
-                                due_date = (parsed_date + timedelta(days=30)).date()
-                            else:
-                                due_date = None
-                        except:
-                            due_date = None
-            
-            if due_date:
-                days_overdue = (today - due_date).days
-                
-                if days_overdue > 0:
-                    status = "Overdue"
-                    overdue_count += 1
-                elif days_overdue == 0:
-                    status = "Due Today"
-                    due_today_count += 1
-                elif days_overdue >= -7:
-                    status = "Due Soon"
-                    due_soon_count += 1
-                else:
-                    status = "Unpaid"
-            
-            # Get last reminder sent date (from notifications)
-            # alyan's modification: Use notification_type instead of type
-            last_reminder = Notification.query.filter_by(
-                student_id=student.id,
-                notification_type='PAYMENT_REMINDER'
-            ).order_by(Notification.created_at.desc()).first()
-            
-            last_reminder_sent = None
-            if last_reminder and last_reminder.created_at:
-                last_reminder_sent = last_reminder.created_at.date().isoformat() if isinstance(last_reminder.created_at, datetime) else str(last_reminder.created_at)
-            
-            students_list.append({
-                "id": student.id,
-                "user_id": student.id,
-                "name": student.username,
-                "student_id": f"STD-{str(student.id).zfill(3)}",
-                "email": student.email,
-                "faculty": faculty,
-                "outstanding": float(student.dues_balance),
-                "due_date": due_date.isoformat() if due_date else None,
-                "days_overdue": days_overdue,
-                "status": status,
-                "is_blocked": getattr(student, 'is_blocked', False),  # alyan's modification: Safely access new field
-                "last_reminder_sent": last_reminder_sent
-            })
-        
-        # Calculate summary
-        total_outstanding = sum(float(s.dues_balance) for s in students)
+        try:
+            result = FinanceQueries.unpaid_students_page(
+                datetime.now(timezone.utc).date(),
+                status=status,
+                limit=limit,
+                cursor=cursor
+            )
+        except ValueError as cursor_error:
+            return jsonify({"error": str(cursor_error)}), 400
         
-        return jsonify({
-            "summary": {
-                "unpaid_count": len(students),
-                "total_outstanding": total_outstanding,
-                "overdue_count": overdue_count,
-                "due_today_count": due_today_count,
-                "due_soon_count": due_soon_count
-            },
-            "students": students_list
-        }), 200
+        return jsonify(result), 200
         
     except Exception as e:
         current_app.logger.error(f"Error fetching unpaid students: {str(e)}", exc_info=True)
@@ -3120,6 +3119,7 @@ def apply_penalty(student_id):
         )
         db.session.add(action_log)
         
+        LedgerService.refresh_students([student_id])
         db.session.commit()
         
         return jsonify({
@@ -3239,9 +3239,13 @@ def block_student(student_id):
 @finance_bp.route("/action/bulk-reminder", methods=["POST"])
 @jwt_required()
 @require_admin
+@async_capable
 def bulk_reminder():
     """
     Send reminders to multiple students (alyan's modification).
+    Reminders are written in chunks of BULK_REMINDER_CHUNK_SIZE students, each
+    committed on its own; for term-wide runs use ?async=true and poll the job
+    for progress.
     
     Request Body:
     {
@@ -3269,28 +3273,17 @@ def bulk_reminder():
     }
     """
     try:
-        from datetime import datetime, timezone
         from flask_jwt_extended import get_jwt_identity
         
         data = request.get_json()
         if not data:
             return jsonify({"error": "Request body is required"}), 400
         
-        student_ids_input = data.get('student_ids', [])
+        student_ids = data.get('student_ids', [])
         message_template = data.get('message_template', 'default')
         contact_method = data.get('contact_method', 'EMAIL')
         
-        # Get list of student IDs
-        if student_ids_input == "all":
-            # Get all unpaid students
-            students = User.query.filter(
-                User.is_admin == False,
-                User.dues_balance > 0
-            ).all()
-            student_ids = [s.id for s in students]
-        elif isinstance(student_ids_input, list):
-            student_ids = student_ids_input
-        else:
+        if student_ids != "all" and not isinstance(student_ids, list):
             return jsonify({"error": "student_ids must be a list or 'all'"}), 400
         
         if not student_ids:
@@ -3301,78 +3294,37 @@ def bulk_reminder():
         if not admin_id:
             return jsonify({"error": "Authentication required"}), 401
         
-        sent_count = 0
-        failed_count = 0
-        notifications_created = 0
-        details = []
-        
-        for student_id in student_ids:
-            try:
-                student = User.query.get(student_id)
-                if not student or student.is_admin:
-                    details.append({"student_id": student_id, "status": "failed", "reason": "Student not found"})
-                    failed_count += 1
-                    continue
-                
-                # Get dues balance safely
-                dues_balance = float(student.dues_balance) if student.dues_balance else 0.0
-                
-                # Create notification
-                message = f"Reminder: You have outstanding dues of ${dues_balance:.2f}. Please make a payment to avoid penalties."
-                if message_template == "urgent":
-                    message = f"URGENT: You have outstanding dues of ${dues_balance:.2f}. Payment is overdue. Please contact the finance office immediately."
-                
-                notification = Notification(
-                    student_id=student_id,
-                    notification_type='PAYMENT_REMINDER',  # alyan's modification: Use notification_type instead of type
-                    message=message,
-                    is_read=False
-                )
-                db.session.add(notification)
-                notifications_created += 1
-                
-                # Log action (alyan's modification: Use correct ActionLog fields)
-                try:
-                    action_log = ActionLog(
-                        student_id=student_id,
-                        action_type='BULK_REMINDER',
-                        action_description=f"Sent {contact_method} reminder to student {student.username} (ID: {student_id}). Template: {message_template}",
-                        performed_by=admin_id
-                    )
-                    db.session.add(action_log)
-                except Exception as log_error:
-                    # If ActionLog fails, continue without logging
-                    current_app.logger.warning(f"Failed to log action for student {student_id}: {str(log_error)}")
-                
-                details.append({"student_id": student_id, "status": "sent"})
-                sent_count += 1
-                
-            except Exception as e:
-                current_app.logger.error(f"Error sending reminder to student {student_id}: {str(e)}", exc_info=True)
-                details.append({"student_id": student_id, "status": "failed", "reason": str(e)})
-                failed_count += 1
-        
+        # Targets are selected in one query ("all") or one IN query per chunk, and the
+        # notifications/action logs are bulk-inserted and committed per chunk
         try:
-            db.session.commit()
-        except Exception as commit_error:
-            db.session.rollback()
-            current_app.logger.error(f"Error committing bulk reminders: {str(commit_error)}", exc_info=True)
+            result = ReminderService.send_bulk(
+                student_ids,
+                admin_id=int(admin_id),
+                message_template=message_template,
+                contact_method=contact_method,
+                chunk_size=current_app.config.get('BULK_REMINDER_CHUNK_SIZE', REMINDER_CHUNK_SIZE)
+            )
+        except ReminderPartialFailure as partial:
+            current_app.logger.error(f"Error committing bulk reminders: {str(partial.error)}", exc_info=True)
             return jsonify({
                 "error": "Failed to save reminders",
-                "details": str(commit_error),
+                "details": str(partial.error),
                 "partial_results": {
-                    "sent_count": sent_count,
-                    "failed_count": failed_count,
-                    "notifications_created": notifications_created
+                    "sent_count": partial.sent_count,
+                    "failed_count": partial.failed_count,
+                    "notifications_created": partial.sent_count
                 }
             }), 500
         
+        if student_ids == "all" and not result["details"]:
+            return jsonify({"error": "No students to send reminders to"}), 400
+        
         return jsonify({
             "msg": "Bulk reminders sent successfully",
-            "sent_count": sent_count,
-            "failed_count": failed_count,
-            "notifications_created": notifications_created,
-            "details": details
+            "sent_count": result["sent_count"],
+            "failed_count": result["failed_count"],
+            "notifications_created": result["sent_count"],
+            "details": result["details"]
         }), 200
         
     except Exception as e:
@@ -3388,9 +3340,13 @@ def bulk_reminder():
 @finance_bp.route("/action/bulk-penalty", methods=["POST"])
 @jwt_required()
 @require_admin
+@async_capable
 def bulk_penalty():
     """
     Apply penalties to multiple students (alyan's modification).
+    Students without outstanding dues are skipped; a student listed twice is
+    charged once. Balances are incremented atomically in chunks of
+    BULK_PENALTY_CHUNK_SIZE students, each committed on its own.
     
     Request Body:
     {
@@ -3411,7 +3367,6 @@ def bulk_penalty():
     }
     """
     try:
-        from datetime import datetime, timezone
         from flask_jwt_extended import get_jwt_identity
         
         data = request.get_json()
@@ -3431,73 +3386,32 @@ def bulk_penalty():
         # Get current admin user
         admin_id = get_jwt_identity()
         
-        applied_count = 0
-        total_penalties = 0
-        details = []
-        
-        for student_id in student_ids:
-            try:
-                student = User.query.get(student_id)
-                if not student or student.is_admin:
-                    details.append({"student_id": student_id, "status": "failed", "reason": "Student not found"})
-                    continue
-                
-                # Only apply to students who are overdue (have dues > 0)
-                if student.dues_balance <= 0:
-                    details.append({"student_id": student_id, "status": "skipped", "reason": "No outstanding dues"})
-                    continue
-                
-                # Create penalty record
-                penalty = Penalty(
-                    student_id=student_id,
-                    amount=float(penalty_amount),
-                    penalty_type=penalty_type,
-                    applied_by=admin_id,
-                    notes=f"Bulk penalty application"
-                )
-                db.session.add(penalty)
-                
-                # Update student's dues balance
-                old_dues = float(student.dues_balance)
-                student.dues_balance = old_dues + float(penalty_amount)
-                
-                # Create notification for student
-                notification = Notification(
-                    student_id=student_id,
-                    notification_type='PENALTY_APPLIED',  # alyan's modification: Use notification_type instead of type
-                    message=f"Late fee penalty of ${penalty_amount} has been applied to your account.",
-                    is_read=False
-                )
-                db.session.add(notification)
-                
-                # Log action (alyan's modification: Use correct ActionLog fields)
-                action_log = ActionLog(
-                    student_id=student_id,
-                    action_type='BULK_PENALTY',
-                    action_description=f"Applied ${penalty_amount} penalty ({penalty_type}) to student {student.username} (ID: {student_id})",
-                    performed_by=admin_id
-                )
-                db.session.add(action_log)
-                
-                details.append({
-                    "student_id": student_id,
-                    "penalty_amount": float(penalty_amount),
-                    "new_dues": float(student.dues_balance)
-                })
-                applied_count += 1
-                total_penalties += float(penalty_amount)
-                
-            except Exception as e:
-                current_app.logger.error(f"Error applying penalty to student {student_id}: {str(e)}")
-                details.append({"student_id": student_id, "status": "failed", "reason": str(e)})
-        
-        db.session.commit()
+        # One atomic UPDATE per chunk charges every eligible student; penalties,
+        # notifications and action logs are multi-row inserts in the same transaction
+        try:
+            result = PenaltyService.apply_bulk(
+                student_ids,
+                amount=penalty_amount,
+                penalty_type=penalty_type,
+                admin_id=int(admin_id),
+                chunk_size=current_app.config.get('BULK_PENALTY_CHUNK_SIZE', PENALTY_CHUNK_SIZE)
+            )
+        except PenaltyPartialFailure as partial:
+            current_app.logger.error(f"Error applying bulk penalties: {str(partial.error)}", exc_info=True)
+            return jsonify({
+                "error": "Failed to apply bulk penalties",
+                "details": str(partial.error),
+                "partial_results": {
+                    "applied_count": partial.applied_count,
+                    "total_penalties": partial.total_penalties
+                }
+            }), 500
         
         return jsonify({
             "msg": "Bulk penalties applied successfully",
-            "applied_count": applied_count,
-            "total_penalties": total_penalties,
-            "details": details
+            "applied_count": result["applied_count"],
+            "total_penalties": result["total_penalties"],
+            "details": result["details"]
         }), 200
         
     except Exception as e:
@@ -3513,6 +3427,7 @@ def bulk_penalty():
 @finance_bp.route("/action/bulk-block", methods=["POST"])
 @jwt_required()
 @require_admin
+@async_capable
 def bulk_block():
     """
     Block registrations for multiple students (alyan's modification).
@@ -3555,7 +3470,8 @@ def bulk_block():
         blocked_count = 0
         details = []
         
-        for student_id in student_ids:
+        for position, student_id in enumerate(student_ids, start=1):
+            report_progress(position, len(student_ids))
             try:
                 student = User.query.get(student_id)
                 if not student or student.is_admin:
@@ -3628,6 +3544,7 @@ def bulk_block():
 @finance_bp.route("/payments/pending", methods=["GET"])
 @jwt_required()
 @require_admin
+@query_budget(3)
 def get_pending_payments():
     """
     Get all pending bank transfer payments that need verification.
@@ -3635,19 +3552,13 @@ def get_pending_payments():
     """
     try:
         # Query pending bank transfer payments
-        pending_payments = Payment.query.filter_by(
+        pending_payments = pending_payment.load(Payment.query.filter_by(
             payment_method='BANK_TRANSFER',
             status='PENDING'
-        ).order_by(Payment.created_at.desc()).all()
+        )).order_by(Payment.created_at.desc()).all()
         
-        # Format response with student details
-        payments_list = []
-        for payment in pending_payments:
-            payment_dict = payment.to_dict(include_student=True)
-            # Add student balance for context
-            if payment.student:
-                payment_dict['student_balance'] = payment.student.dues_balance
-            payments_list.append(payment_dict)
+        # Format response with student details and balance
+        payments_list = pending_payment.many(pending_payments)
         
         return jsonify({
             "pending_payments": payments_list,
@@ -3721,6 +3632,7 @@ def verify_payment(payment_id):
         )
         db.session.add(action_log)
         
+        LedgerService.refresh_students([payment.student_id])
         db.session.commit()
         
         return jsonify({
@@ -3791,6 +3703,8 @@ def reject_payment(payment_id):
         )
         db.session.add(action_log)
         
+        # Rejected transfers no longer count towards the pending amount
+        LedgerService.refresh_students([payment.student_id])
         db.session.commit()
         
         return jsonify({
@@ -3879,6 +3793,7 @@ def get_payment_proof(payment_id):
 # ============================================================================
 @finance_bp.route("/student-fees", methods=["GET"])
 @jwt_required()
+@query_budget(7)
 def get_student_fees():
     """
     Calculate total fees based on enrolled courses and additional fees.
@@ -3990,3 +3905,148 @@ def get_student_fees():
         import traceback
         traceback.print_exc()
         return jsonify({"error": f"Failed to calculate fees: {str(e)}"}), 500
+
+
+# ============================================================================
+# BACKGROUND JOBS
+# ============================================================================
+
+# Valid values for the ?status= filter of GET /api/finance/jobs
+JOB_STATUSES = ('QUEUED', 'RUNNING', 'SUCCEEDED', 'FAILED')
+
+
+# ============================================================================
+# ENDPOINT: GET /api/finance/jobs/<job_id>
+# Description: Status, progress and result of a background job
+# ============================================================================
+@finance_bp.route("/jobs/<job_id>", methods=["GET"])
+@jwt_required()
+@require_admin
+def get_job(job_id):
+    """
+    Returns a job queued by an ?async=true request.
+    While it runs, progress_current/progress_total are refreshed every few
+    seconds; once finished, result holds the endpoint's JSON response and
+    result_status its HTTP status.
+    """
+    try:
+        job = db.session.get(Job, job_id)
+        if not job:
+            return jsonify({"error": "Job not found"}), 404
+
+        return jsonify(job.to_dict()), 200
+
+    except Exception as e:
+        return jsonify({
+            "error": f"Failed to fetch job: {str(e)}"
+        }), 500
+
+
+# ============================================================================
+# ENDPOINT: GET /api/finance/jobs
+# Description: Recent background jobs, newest first
+# ============================================================================
+@finance_bp.route("/jobs", methods=["GET"])
+@jwt_required()
+@require_admin
+@query_budget(3)
+def get_jobs():
+    """
+    Lists recent background jobs (without their results).
+
+    Query Parameters:
+    - status: QUEUED, RUNNING, SUCCEEDED or FAILED (optional)
+    - mine: true to list only jobs queued by the current user
+    - limit: Number of jobs to return (default: 50, max: 200)
+    """
+    try:
+        status = request.args.get('status')
+        limit = min(request.args.get('limit', default=50, type=int), 200)
+
+        if status and status not in JOB_STATUSES:
+            return jsonify({"error": f"status must be one of: {', '.join(JOB_STATUSES)}"}), 400
+
+        query = Job.query
+        if status:
+            query = query.filter(Job.status == status)
+        if request.args.get('mine', '').lower() == 'true':
+            query = query.filter(Job.created_by == int(get_jwt_identity()))
+
+        jobs = query.order_by(Job.created_at.desc(), Job.id).limit(limit).all()
+
+        return jsonify({
+            "jobs": [job.to_dict(include_result=False) for job in jobs]
+        }), 200
+
+    except Exception as e:
+        return jsonify({
+            "error": f"Failed to fetch jobs: {str(e)}"
+        }), 500
+
+
+# ============================================================================
+# ENDPOINT: GET /api/finance/metrics/requests
+# Description: Per-route request duration, DB time and SQL statement percentiles
+# ============================================================================
+@finance_bp.route("/metrics/requests", methods=["GET"])
+@jwt_required()
+@require_admin
+@query_budget(3)
+def get_request_metrics():
+    """
+    Percentiles over the most recent requests of each route, as recorded by
+    utils/request_metrics.py. With REQUEST_METRICS_PATH set ("shared": true)
+    the windows hold the requests of every worker; otherwise only those of
+    the worker that answered (pid).
+    
+    Query Parameters:
+    - route: Only routes containing this text, e.g. "/payments" (optional)
+    
+    Returns:
+    {
+        "pid": 4242,
+        "shared": true,
+        "window": 1000,
+        "routes": [
+            {
+                "route": "GET /api/finance/payments/recent",
+                "requests": 120,
+                "errors": 0,
+                "duration_ms": {"p50": 18.2, "p90": 31.0, "p95": 40.7, "p99": 88.1, "max": 120.4},
+                "db_ms": {"p50": 6.1, "p90": 9.8, "p95": 12.0, "p99": 20.3, "max": 35.9},
+                "statements": {"p50": 4, "p90": 4, "p95": 4, "p99": 4, "max": 4},
+                "slowest_statements": [
+                    {"ms": 35.1, "statement": "SELECT payments.id ...", "path": "/api/finance/payments/recent"}
+                ]
+            }
+        ]
+    }
+    """
+    try:
+        return jsonify({
+            "pid": os.getpid(),
+            "shared": request_metrics.store_path is not None,
+            "window": request_metrics.window,
+            "routes": request_metrics.report(request.args.get('route'))
+        }), 200
+
+    except Exception as e:
+        return jsonify({
+            "error": f"Failed to fetch request metrics: {str(e)}"
+        }), 500
+
+
+# ============================================================================
+# ENDPOINT: DELETE /api/finance/metrics/requests
+# Description: Clear the recorded request metrics
+# ============================================================================
+@finance_bp.route("/metrics/requests", methods=["DELETE"])
+@jwt_required()
+@require_admin
+def reset_request_metrics():
+    """
+    Drops the recorded samples (e.g. before measuring a change): those of
+    every worker with the shared store, else only the answering worker's.
+    """
+    request_metrics.reset()
+    return jsonify({"message": "Request metrics reset", "pid": os.getpid()}), 200
@@ -4,6 +4,9 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime, timezone
 import os
 from werkzeug.utils import secure_filename
+from services.ledger import LedgerService
+from utils.serializers import student_enrollment
+from utils.query_budget import query_budget
 
 students_bp = Blueprint("students", __name__)
 
@@ -110,6 +113,7 @@ def enroll_course():
         db.session.add(enrollment)
         db.session.add(notification)
         db.session.add(action_log)
+        LedgerService.refresh_students([student_id])
         db.session.commit()
         
         return jsonify({
@@ -182,6 +186,7 @@ def drop_course(course_id):
         
         db.session.delete(enrollment)
         db.session.add(notification)
+        LedgerService.refresh_students([student_id])
         db.session.commit()
         
         return jsonify({
@@ -327,6 +332,7 @@ def make_payment():
             )
             db.session.add(notification)
             
+            LedgerService.refresh_students([student_id])
             db.session.commit()
             
             response_data = {
@@ -357,6 +363,7 @@ def make_payment():
 # ============================================================================
 @students_bp.route("/status", methods=["GET"])
 @jwt_required()
+@query_budget(8)
 def get_student_status():
     """
     Retrieve student's enrollment status and current dues_balance.
@@ -395,19 +402,10 @@ def get_student_status():
             return jsonify({"error": "Student not found"}), 404
         
         # Fetch enrollments
-        enrollments = Enrollment.query.filter_by(student_id=student_id).all()
-        enrollment_list = [
-            {
-                "id": e.id,
-                "course_id": e.course_id,
-                "course_name": e.course.name,
-                "credits": e.course.credits,
-                "course_fee": e.course_fee,
-                "enrollment_date": e.enrollment_date.isoformat(),
-                "status": e.status
-            }
-            for e in enrollments if hasattr(e, 'course') and e.course is not None
-        ]
+        enrollments = student_enrollment.load(Enrollment.query.filter_by(student_id=student_id)).all()
+        enrollment_list = student_enrollment.many(
+            e for e in enrollments if hasattr(e, 'course') and e.course is not None
+        )
         
         # Calculate totals
         total_course_fees = sum(e.course_fee for e in enrollments if hasattr(e, 'course_fee'))
@@ -459,6 +457,7 @@ def get_student_status():
 # ============================================================================
 @students_bp.route("/payments", methods=["GET"])
 @jwt_required()
+@query_budget(3)
 def get_payment_history():
     """
     Retrieve payment history for the authenticated student.
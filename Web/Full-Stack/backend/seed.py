@@ -8,6 +8,7 @@ Usage:
 
 from app import create_app, db
 from models import User, Course, Enrollment, Payment, Notification, ActionLog, Faculty, FeeStructure, Penalty
+from services.ledger import LedgerService
 from datetime import datetime, timedelta
 from sqlalchemy import text
 import random
@@ -474,6 +475,15 @@ def seed_database():
         db.session.commit()
         print(f"✓ Created {len(action_logs)} action logs")
         
+        # ====================================================================
+        # Build Student Ledger
+        # ====================================================================
+        # The rows above were inserted directly, so compute the ledger summary
+        # table (fee/payment totals, due dates) from them in one pass
+        print("\nBuilding student ledger...")
+        ledger_rows = LedgerService.rebuild()
+        print(f"✓ Built ledger for {ledger_rows} students")
+        
         # ====================================================================
         # Print Summary
         # ====================================================================
@@ -0,0 +1,202 @@
+"""
+Receivables Aging Service
+=========================
+Accounts-receivable aging (0-30 / 31-60 / 61-90 / 90+ days) per faculty and
+for the whole university.
+
+Charges are enrollment fees (dropped enrollments excluded) and penalties;
+credits are RECEIVED payments. Each student's payments are allocated FIFO
+to their oldest charges, and whatever remains open of a charge is aged by
+the days between its date and the as-of date. Overpayments are reported as
+unapplied credit.
+
+The report is a streaming merge of two queries, both read through
+server-side cursors: students ordered by id with their payment totals, and
+charges ordered by (student, date). Only one student's charges are held at
+a time, so a run reads every row once with memory bounded by the largest
+student, however many years of data there are.
+"""
+
+from datetime import datetime, time, timedelta, timezone
+
+from models import User, Enrollment, Penalty, Payment, Faculty, StudentLedgerSummary
+from sqlalchemy import func, or_, select, union_all
+from services.job_queue import report_progress
+from utils.streaming import iter_query_chunks
+
+
+# Bucket keys and the oldest age (in days) each one holds, youngest first
+AGING_BUCKETS = (
+    ('0_30', 30),
+    ('31_60', 60),
+    ('61_90', 90),
+    ('over_90', None),
+)
+
+
+def aging_bucket(age_days):
+    """Bucket key for a charge that is age_days old."""
+    for bucket, max_age in AGING_BUCKETS:
+        if max_age is None or age_days <= max_age:
+            return bucket
+
+
+def allocate_fifo(charges, paid, as_of):
+    """
+    Apply a student's payments to their charges, oldest first, and age what
+    remains open.
+
+    Args:
+        charges (list): (charged_at, amount) ordered oldest first
+        paid (float): Total received from the student
+        as_of (date): Day the ages are measured to
+
+    Returns:
+        tuple: ({bucket: open amount}, unapplied credit)
+    """
+    buckets = {bucket: 0.0 for bucket, _ in AGING_BUCKETS}
+    credit = paid
+    for charged_at, amount in charges:
+        applied = min(credit, amount)
+        credit -= applied
+        if amount > applied:
+            buckets[aging_bucket((as_of - charged_at.date()).days)] += amount - applied
+    return buckets, credit
+
+
+def _rows(statement):
+    """Rows of a statement, read chunk by chunk through a server-side cursor."""
+    for chunk in iter_query_chunks(statement):
+        yield from chunk
+
+
+class AgingService:
+    """
+    Streaming receivables aging report.
+    """
+
+    @staticmethod
+    def _statements(as_of, faculty=None):
+        """(students, charges) SELECTs for the merge, both ordered by student."""
+        cutoff = datetime.combine(as_of + timedelta(days=1), time.min)
+
+        # Faculty as on the student list: the student's own, else their first course's
+        faculty_name = func.coalesce(Faculty.name, StudentLedgerSummary.faculty_name, 'Unknown')
+        student_filters = [User.is_admin == False]
+        if faculty and faculty != 'All Faculties':
+            student_filters.append(faculty_name == faculty)
+
+        paid = select(
+            Payment.student_id,
+            func.sum(Payment.amount).label('paid')
+        ).where(
+            Payment.status == 'RECEIVED',
+            Payment.payment_date < cutoff
+        ).group_by(Payment.student_id).subquery()
+
+        students = select(
+            User.id,
+            faculty_name.label('faculty'),
+            func.coalesce(paid.c.paid, 0).label('paid')
+        ).outerjoin(
+            Faculty, Faculty.id == User.faculty_id
+        ).outerjoin(
+            StudentLedgerSummary, StudentLedgerSummary.student_id == User.id
+        ).outerjoin(
+            paid, paid.c.student_id == User.id
+        ).where(*student_filters).order_by(User.id)
+
+        enrollment_charges = select(
+            Enrollment.student_id.label('student_id'),
+            Enrollment.enrollment_date.label('charged_at'),
+            Enrollment.course_fee.label('amount')
+        ).where(
+            or_(Enrollment.status.is_(None), Enrollment.status != 'DROPPED'),
+            Enrollment.enrollment_date < cutoff
+        )
+        penalty_charges = select(
+            Penalty.student_id.label('student_id'),
+            Penalty.applied_at.label('charged_at'),
+            Penalty.amount.label('amount')
+        ).where(Penalty.applied_at < cutoff)
+        if len(student_filters) > 1:
+            selected = select(User.id).outerjoin(
+                Faculty, Faculty.id == User.faculty_id
+            ).outerjoin(
+                StudentLedgerSummary, StudentLedgerSummary.student_id == User.id
+            ).where(*student_filters)
+            enrollment_charges = enrollment_charges.where(Enrollment.student_id.in_(selected))
+            penalty_charges = penalty_charges.where(Penalty.student_id.in_(selected))
+
+        charge_rows = union_all(enrollment_charges, penalty_charges).subquery()
+        charges = select(charge_rows).order_by(charge_rows.c.student_id, charge_rows.c.charged_at)
+        return students, charges
+
+    @staticmethod
+    def report(as_of=None, faculty=None):
+        """
+        Receivables aging per faculty and in total.
+
+        Args:
+            as_of (date): Day to age to; later charges and payments are
+                ignored (default: today, UTC)
+            faculty (str): Only this faculty ('All Faculties' or None for all)
+
+        Returns:
+            tuple: (faculty rows ordered by name, university totals), each with
+                students (with an open balance), the bucket amounts, total_open,
+                unapplied_credit and net_receivable
+        """
+        as_of = as_of or datetime.now(timezone.utc).date()
+        students_statement, charges_statement = AgingService._statements(as_of, faculty)
+
+        def empty():
+            totals = {bucket: 0.0 for bucket, _ in AGING_BUCKETS}
+            totals.update(students=0, unapplied_credit=0.0)
+            return totals
+
+        faculties = {}
+        charges = _rows(charges_statement)
+        charge = next(charges, None)
+        for position, student in enumerate(_rows(students_statement), start=1):
+            # Skip charges of users outside the student stream (other faculties, admins)
+            while charge is not None and charge.student_id < student.id:
+                charge = next(charges, None)
+            student_charges = []
+            while charge is not None and charge.student_id == student.id:
+                student_charges.append((charge.charged_at, float(charge.amount or 0)))
+                charge = next(charges, None)
+
+            if not student_charges and not student.paid:
+                continue
+            buckets, credit = allocate_fifo(student_charges, float(student.paid), as_of)
+
+            totals = faculties.setdefault(student.faculty, empty())
+            for bucket, amount in buckets.items():
+                totals[bucket] += amount
+            totals['unapplied_credit'] += credit
+            if any(buckets.values()):
+                totals['students'] += 1
+
+            if position % 1000 == 0:
+                report_progress(position)
+
+        def finish(totals):
+            row = {bucket: round(totals[bucket], 2) for bucket, _ in AGING_BUCKETS}
+            total_open = sum(totals[bucket] for bucket, _ in AGING_BUCKETS)
+            row.update(
+                students=totals['students'],
+                total_open=round(total_open, 2),
+                unapplied_credit=round(totals['unapplied_credit'], 2),
+                net_receivable=round(total_open - totals['unapplied_credit'], 2)
+            )
+            return row
+
+        university = empty()
+        for totals in faculties.values():
+            for key in university:
+                university[key] += totals[key]
+
+        rows = [dict(faculty=name, **finish(totals)) for name, totals in sorted(faculties.items())]
+        summary = dict(as_of=as_of.isoformat(), **finish(university))
+        return rows, summary
@@ -0,0 +1,468 @@
+"""
+Bank Matching Service
+=====================
+Imports bank statement lines and auto-matches them to payments.
+
+Instead of two queries per statement line (duplicate check and candidate
+lookup), an import runs a fixed number of queries per batch of lines:
+- one IN query to find bank_refs that were already imported,
+- one range query preloading every unmatched payment in the statement's
+  date window into an in-memory index,
+- one bulk INSERT for the new BankTransaction rows.
+
+Transactions still Unmatched after import can be reconciled together with
+auto_match, which pairs them with unreconciled payments in one pass over
+both sides sorted by (amount, date).
+"""
+
+import time
+from collections import defaultdict
+from datetime import datetime, timezone, timedelta
+from itertools import islice
+
+from models import db, Payment, BankTransaction
+from sqlalchemy import insert, update
+from services.finance_queries import batched
+from services.match_suggestions import tokenize
+
+
+# A statement line matches payments dated within this many days of it
+MATCH_WINDOW_DAYS = 7
+
+# Statement lines imported (and committed) per transaction by import_stream
+IMPORT_BATCH_SIZE = 1000
+
+
+def amount_cents(amount):
+    """Amount as integer cents, so float noise cannot break equality."""
+    return int(round(float(amount) * 100))
+
+
+def _naive_utc(value):
+    """Drop tzinfo (after converting to UTC) to compare with DB datetimes."""
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class PaymentMatchIndex:
+    """
+    In-memory index of unmatched payment candidates keyed by
+    (amount in cents, payment day). Each payment can be handed out once.
+    """
+
+    def __init__(self, payments, window_days=MATCH_WINDOW_DAYS):
+        """
+        Args:
+            payments (iterable): Rows with id, student_id, amount,
+                payment_date and reference_number
+            window_days (int): Maximum distance between statement and payment dates
+        """
+        self.window = timedelta(days=window_days)
+        self.window_days = window_days
+        self._buckets = defaultdict(list)
+        self._taken = set()
+        for payment in payments:
+            if payment.payment_date is None:
+                continue
+            payment_date = _naive_utc(payment.payment_date)
+            key = (amount_cents(payment.amount), payment_date.date().toordinal())
+            self._buckets[key].append((payment.id, payment.student_id, payment_date, payment.reference_number))
+
+    @classmethod
+    def for_window(cls, start, end, window_days=MATCH_WINDOW_DAYS):
+        """
+        Load every payment dated in [start - window, end + window] that no
+        bank transaction has been matched to yet, in one query.
+
+        Args:
+            start (datetime): Earliest statement line date
+            end (datetime): Latest statement line date
+            window_days (int): Matching window in days
+
+        Returns:
+            PaymentMatchIndex
+        """
+        window = timedelta(days=window_days)
+        already_matched = db.session.query(BankTransaction.matched_payment_id).filter(
+            BankTransaction.matched_payment_id.isnot(None)
+        )
+        payments = db.session.query(
+            Payment.id,
+            Payment.student_id,
+            Payment.amount,
+            Payment.payment_date,
+            Payment.reference_number
+        ).filter(
+            Payment.payment_date >= _naive_utc(start) - window,
+            Payment.payment_date <= _naive_utc(end) + window,
+            ~Payment.id.in_(already_matched)
+        ).order_by(Payment.id).all()
+        return cls(payments, window_days=window_days)
+
+    def match(self, amount, transaction_date, reference_text=''):
+        """
+        Take the best candidate for a statement line, if any.
+
+        A payment whose reference_number appears in the line's reference
+        text wins; otherwise the payment closest in time, then the oldest id.
+
+        Args:
+            amount (float): Statement amount
+            transaction_date (datetime): Statement date
+            reference_text (str): bank_ref and description of the line
+
+        Returns:
+            tuple: (payment_id, student_id) or None
+        """
+        cents = amount_cents(amount)
+        transaction_date = _naive_utc(transaction_date)
+        day = transaction_date.date().toordinal()
+        reference_text = (reference_text or '').lower()
+
+        best = None
+        best_rank = None
+        for bucket_day in range(day - self.window_days, day + self.window_days + 1):
+            for candidate in self._buckets.get((cents, bucket_day), ()):
+                payment_id, _, payment_date, reference = candidate
+                if payment_id in self._taken or abs(payment_date - transaction_date) > self.window:
+                    continue
+                reference_hit = bool(reference) and reference.lower() in reference_text
+                rank = (not reference_hit, abs(payment_date - transaction_date), payment_id)
+                if best_rank is None or rank < best_rank:
+                    best, best_rank = candidate, rank
+
+        if best is None:
+            return None
+        self._taken.add(best[0])
+        return best[0], best[1]
+
+
+def match_sorted(transactions, payments, window_days=MATCH_WINDOW_DAYS):
+    """
+    Pair transactions with payments of the same amount dated within
+    window_days of each other, using each payment at most once.
+
+    Both lists must be sorted by (cents, date, id). A single merge pass
+    walks them together: within an amount, the earliest transaction takes
+    the earliest payment still in its window. On a time line this greedy
+    order yields the largest possible number of pairs and never crosses
+    pairs, so dates stay as close as the pairing allows.
+
+    Args:
+        transactions (list): (cents, date, id, ...) tuples
+        payments (list): (cents, date, id, ...) tuples
+        window_days (int): Maximum distance between the two dates
+
+    Returns:
+        list: (transaction, payment) pairs
+    """
+    window = timedelta(days=window_days)
+    pairs = []
+    i = j = 0
+    while i < len(transactions) and j < len(payments):
+        transaction, payment = transactions[i], payments[j]
+        if transaction[0] != payment[0]:
+            if transaction[0] < payment[0]:
+                i += 1
+            else:
+                j += 1
+        elif payment[1] < transaction[1] - window:
+            j += 1  # Too old for this and every later transaction of the amount
+        elif payment[1] > transaction[1] + window:
+            i += 1  # No payment left in this transaction's window
+        else:
+            pairs.append((transaction, payment))
+            i += 1
+            j += 1
+    return pairs
+
+
+class BankMatchingService:
+    """
+    Statement import with set-based duplicate detection and auto-matching.
+    """
+
+    @staticmethod
+    def parse_line(line):
+        """
+        Normalize one statement line.
+
+        Args:
+            line (dict): {'bank_ref', 'amount', 'date' (YYYY-MM-DD), 'description'}
+
+        Returns:
+            dict: bank_ref, amount, transaction_date, description;
+                None when bank_ref, amount or date is missing
+        """
+        bank_ref = line.get('bank_ref')
+        amount = float(line.get('amount', 0))
+        date_str = line.get('date')
+        if not bank_ref or not amount or not date_str:
+            return None
+
+        try:
+            transaction_date = datetime.strptime(date_str, '%Y-%m-%d').replace(tzinfo=timezone.utc)
+        except (TypeError, ValueError):
+            transaction_date = datetime.now(timezone.utc)
+
+        return {
+            'bank_ref': str(bank_ref),
+            'amount': amount,
+            'transaction_date': transaction_date,
+            'description': line.get('description', '') or ''
+        }
+
+    @staticmethod
+    def existing_refs(bank_refs):
+        """Return the subset of bank_refs already stored, one IN query per batch."""
+        found = set()
+        for batch in batched(sorted(set(bank_refs))):
+            found.update(
+                ref for (ref,) in db.session.query(BankTransaction.bank_ref).filter(
+                    BankTransaction.bank_ref.in_(batch)
+                ).all()
+            )
+        return found
+
+    @staticmethod
+    def import_lines(lines, matched_by=None):
+        """
+        Import statement lines: skip invalid lines and known bank_refs,
+        auto-match the rest against unmatched payments and bulk-insert them.
+        The caller commits.
+
+        Args:
+            lines (iterable): Raw statement line dicts (see parse_line)
+            matched_by: Identity recorded on auto-matched rows
+
+        Returns:
+            dict: imported_count, auto_matched, unmatched, duplicates_skipped
+        """
+        parsed = [line for line in (BankMatchingService.parse_line(raw) for raw in lines) if line]
+        counts = {"imported_count": 0, "auto_matched": 0, "unmatched": 0, "duplicates_skipped": 0}
+        if not parsed:
+            return counts
+
+        seen = BankMatchingService.existing_refs(line['bank_ref'] for line in parsed)
+        new_lines = []
+        for line in parsed:
+            if line['bank_ref'] in seen:
+                counts["duplicates_skipped"] += 1
+                continue
+            seen.add(line['bank_ref'])
+            new_lines.append(line)
+        if not new_lines:
+            return counts
+
+        dates = [line['transaction_date'] for line in new_lines]
+        index = PaymentMatchIndex.for_window(min(dates), max(dates))
+
+        now = datetime.now(timezone.utc)
+        rows = []
+        for line in new_lines:
+            row = {
+                'bank_ref': line['bank_ref'],
+                'amount': line['amount'],
+                'transaction_date': line['transaction_date'],
+                'bank_description': line['description'],
+                'status': 'Unmatched',
+                'matched_payment_id': None,
+                'matched_student_id': None,
+                'matched_at': None,
+                'matched_by': None,
+                'notes': None
+            }
+            match = index.match(line['amount'], line['transaction_date'], f"{line['bank_ref']} {line['description']}")
+            if match:
+                row.update({
+                    'matched_payment_id': match[0],
+                    'matched_student_id': match[1],
+                    'status': 'Matched',
+                    'matched_at': now,
+                    'matched_by': matched_by,
+                    'notes': 'Auto-matched by system'
+                })
+                counts["auto_matched"] += 1
+            else:
+                counts["unmatched"] += 1
+            rows.append(row)
+
+        db.session.execute(insert(BankTransaction), rows)
+        counts["imported_count"] = len(rows)
+        return counts
+
+    @staticmethod
+    def import_stream(lines, matched_by=None, batch_size=IMPORT_BATCH_SIZE, time_budget=None):
+        """
+        Import a (possibly very large) iterator of statement lines in
+        batches, committing after each one so memory and transaction size
+        stay bounded. Yields a progress dict after every committed batch.
+
+        Stopping early (time budget or error) leaves the committed batches
+        in place; uploading the same statement again skips them as
+        duplicates, so an import can simply be repeated until complete.
+
+        Args:
+            lines (iterable): Raw statement line dicts, consumed lazily
+            matched_by: Identity recorded on auto-matched rows
+            batch_size (int): Lines per transaction
+            time_budget (float): Seconds after which no new batch is started
+
+        Yields:
+            dict: Running totals (imported_count, auto_matched, unmatched,
+                duplicates_skipped, lines_read, batches) plus 'completed',
+                which is True on the final progress update only
+        """
+        started = time.monotonic()
+        lines = iter(lines)
+        progress = {
+            "imported_count": 0, "auto_matched": 0, "unmatched": 0, "duplicates_skipped": 0,
+            "lines_read": 0, "batches": 0, "completed": False
+        }
+
+        batch = list(islice(lines, batch_size))
+        if not batch:
+            progress["completed"] = True
+            yield progress
+            return
+
+        while batch:
+            counts = BankMatchingService.import_lines(batch, matched_by=matched_by)
+            db.session.commit()
+
+            for key, value in counts.items():
+                progress[key] += value
+            progress["lines_read"] += len(batch)
+            progress["batches"] += 1
+
+            batch = list(islice(lines, batch_size))
+            progress["completed"] = not batch
+            yield dict(progress)
+
+            # Batches of already-imported lines cost one lookup, so a repeated
+            # upload always gets past them before the budget can stop it
+            if batch and counts["imported_count"] and time_budget is not None \
+                    and time.monotonic() - started > time_budget:
+                return
+
+    @staticmethod
+    def auto_match(window_days=MATCH_WINDOW_DAYS, transaction_ids=None, dry_run=True, matched_by=None):
+        """
+        Reconcile all Unmatched bank transactions against payments that no
+        transaction is matched to yet.
+
+        Pairs whose payment reference_number appears in the bank reference
+        or description are taken first (same amount, within the window).
+        The rest are paired by match_sorted. The result is the full batch
+        of proposed matches; unless dry_run, it is written with one bulk
+        UPDATE. The caller commits.
+
+        Args:
+            window_days (int): Maximum days between transaction and payment
+            transaction_ids (list): Only consider these transactions (e.g.
+                the ones approved from a dry run)
+            dry_run (bool): Only return the proposed matches
+            matched_by: Identity recorded on the matched rows
+
+        Returns:
+            dict: matches (one entry per pair), matched_count,
+                reference_matches, unmatched_count, dry_run
+        """
+        window = timedelta(days=window_days)
+        query = db.session.query(
+            BankTransaction.id,
+            BankTransaction.amount,
+            BankTransaction.transaction_date,
+            BankTransaction.bank_ref,
+            BankTransaction.bank_description
+        ).filter(BankTransaction.status == 'Unmatched')
+        if transaction_ids is not None:
+            query = query.filter(BankTransaction.id.in_(transaction_ids or [0]))
+        transactions = [
+            (amount_cents(row.amount), _naive_utc(row.transaction_date), row.id, row.bank_ref, row.bank_description)
+            for row in query.all() if row.transaction_date is not None
+        ]
+        result = {"matches": [], "matched_count": 0, "reference_matches": 0, "dry_run": dry_run}
+        if not transactions:
+            result["unmatched_count"] = 0
+            return result
+
+        already_matched = db.session.query(BankTransaction.matched_payment_id).filter(
+            BankTransaction.matched_payment_id.isnot(None)
+        )
+        payments = [
+            (amount_cents(row.amount), _naive_utc(row.payment_date), row.id, row.student_id, row.reference_number)
+            for row in db.session.query(
+                Payment.id,
+                Payment.student_id,
+                Payment.amount,
+                Payment.payment_date,
+                Payment.reference_number
+            ).filter(
+                Payment.payment_date >= min(t[1] for t in transactions) - window,
+                Payment.payment_date <= max(t[1] for t in transactions) + window,
+                ~Payment.id.in_(already_matched)
+            ).all()
+        ]
+
+        # Reference pass: a payment reference quoted on the statement wins
+        by_reference = defaultdict(list)
+        for payment in payments:
+            if payment[4]:
+                by_reference[(payment[4].lower(), payment[0])].append(payment)
+        pairs = []
+        taken_transactions, taken_payments = set(), set()
+        for transaction in sorted(transactions, key=lambda t: t[2]):
+            for token in sorted(tokenize(transaction[3], transaction[4])):
+                candidates = [
+                    p for p in by_reference.get((token, transaction[0]), ())
+                    if p[2] not in taken_payments and abs(p[1] - transaction[1]) <= window
+                ]
+                if candidates:
+                    payment = min(candidates, key=lambda p: (abs(p[1] - transaction[1]), p[2]))
+                    pairs.append((transaction, payment, 'reference'))
+                    taken_transactions.add(transaction[2])
+                    taken_payments.add(payment[2])
+                    break
+        result["reference_matches"] = len(pairs)
+
+        # Amount/date pass over both sides sorted by (cents, date, id)
+        remaining_transactions = sorted(t for t in transactions if t[2] not in taken_transactions)
+        remaining_payments = sorted(p for p in payments if p[2] not in taken_payments)
+        pairs.extend(
+            (transaction, payment, 'amount_date')
+            for transaction, payment in match_sorted(remaining_transactions, remaining_payments, window_days)
+        )
+        pairs.sort(key=lambda pair: pair[0][2])
+
+        now = datetime.now(timezone.utc)
+        rows = []
+        for transaction, payment, match_type in pairs:
+            result["matches"].append({
+                "transaction_id": transaction[2],
+                "bank_ref": transaction[3],
+                "amount": transaction[0] / 100,
+                "transaction_date": transaction[1].strftime('%Y-%m-%d'),
+                "payment_id": payment[2],
+                "student_id": payment[3],
+                "payment_date": payment[1].strftime('%Y-%m-%d'),
+                "reference_number": payment[4],
+                "days_apart": abs(payment[1] - transaction[1]).days,
+                "match_type": match_type
+            })
+            rows.append({
+                'id': transaction[2],
+                'matched_payment_id': payment[2],
+                'matched_student_id': payment[3],
+                'status': 'Matched',
+                'matched_at': now,
+                'matched_by': matched_by,
+                'notes': 'Auto-matched by reconciliation run'
+            })
+
+        result["matched_count"] = len(rows)
+        result["unmatched_count"] = len(transactions) - len(rows)
+        if rows and not dry_run:
+            db.session.execute(update(BankTransaction), rows)
+        return result
@@ -0,0 +1,265 @@
+"""
+Enforcement Service
+===================
+Rule-driven late fees and registration blocks for overdue students.
+
+Rules are written as "penalty:<days>:<amount>" (charge amount once a
+student is that many days overdue) and "block:<days>" (block registration),
+comma separated, e.g. ENFORCEMENT_RULES="penalty:30:50,penalty:60:100,block:90".
+
+A run loads every student with outstanding dues who is past the shortest
+rule's threshold in one query over the ledger's indexed due_date (id, due
+date, block flag), computes days overdue once, and matches all rules
+against that list in memory. Penalties go through PenaltyService.apply_bulk (one atomic
+UPDATE and multi-row inserts per chunk); blocks are one UPDATE per chunk.
+
+Every penalty carries the idempotency key "<rule>:<student_id>:<due date>",
+so running the command again, the same day or a week later, never charges
+a student twice for the same rule and due date. A later due date (next
+term) makes the student eligible again. Blocks are idempotent by nature:
+students who are already blocked are left alone.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from models import db, User, Penalty, Notification, ActionLog, StudentLedgerSummary
+from sqlalchemy import insert, or_, update
+from services.finance_queries import batched
+from services.penalties import PenaltyService, PENALTY_CHUNK_SIZE
+
+
+class EnforcementRule:
+    """One "N days overdue -> action" rule."""
+
+    def __init__(self, action, days, amount=None):
+        self.action = action
+        self.days = days
+        self.amount = amount
+
+    @property
+    def name(self):
+        """Stable rule name used in idempotency keys, e.g. 'penalty-30d'."""
+        return f"{self.action}-{self.days}d"
+
+    def __str__(self):
+        if self.action == 'penalty':
+            return f"penalty:{self.days}:{self.amount}"
+        return f"block:{self.days}"
+
+
+def _number(text):
+    value = float(text)
+    return int(value) if value.is_integer() else value
+
+
+def parse_rules(spec):
+    """
+    Parse a comma-separated rule list.
+
+    Args:
+        spec (str): e.g. "penalty:30:50,block:60"
+
+    Returns:
+        list: EnforcementRule objects, in the given order
+
+    Raises:
+        ValueError: If a rule is malformed
+    """
+    rules = []
+    for item in spec.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        parts = [part.strip() for part in item.split(':')]
+        try:
+            action = parts[0].lower()
+            if action == 'penalty' and len(parts) == 3:
+                rule = EnforcementRule(action, int(parts[1]), _number(parts[2]))
+                valid = rule.amount > 0
+            elif action == 'block' and len(parts) == 2:
+                rule = EnforcementRule(action, int(parts[1]))
+                valid = True
+            else:
+                valid = False
+        except ValueError:
+            valid = False
+        if not valid or rule.days < 0:
+            raise ValueError(f"Invalid enforcement rule '{item}': expected penalty:<days>:<amount> or block:<days>")
+        rules.append(rule)
+    return rules
+
+
+class EnforcementService:
+    """
+    Scheduled penalty and blocking policy.
+    """
+
+    @staticmethod
+    def overdue_students(min_days, today):
+        """
+        Students with outstanding dues at least min_days overdue.
+
+        Returns:
+            list: (student_id, due_date, days_overdue, is_blocked) ordered by id
+        """
+        rows = db.session.query(
+            User.id,
+            StudentLedgerSummary.due_date,
+            User.is_blocked
+        ).join(
+            StudentLedgerSummary, StudentLedgerSummary.student_id == User.id
+        ).filter(
+            User.is_admin == False,
+            User.dues_balance > 0,
+            StudentLedgerSummary.due_date <= today - timedelta(days=min_days)
+        ).order_by(User.id).all()
+
+        return [(row.id, row.due_date, (today - row.due_date).days, bool(row.is_blocked)) for row in rows]
+
+    @staticmethod
+    def evaluate(rules, today=None):
+        """
+        Match every rule against the overdue students.
+
+        Penalties whose idempotency key already exists are left out, so the
+        plan only holds work a run would still do.
+
+        Args:
+            rules (list): EnforcementRule objects
+            today (date): Reference day (default: today, UTC)
+
+        Returns:
+            dict: today, overdue_count and plan, a list of
+                (rule, {student_id: idempotency key or days overdue}) in rule order
+        """
+        today = today or datetime.now(timezone.utc).date()
+        if not rules:
+            return {"today": today, "overdue_count": 0, "plan": []}
+
+        students = EnforcementService.overdue_students(min(rule.days for rule in rules), today)
+
+        plan = []
+        for rule in rules:
+            matched = [student for student in students if student[2] >= rule.days]
+            if rule.action == 'penalty':
+                targets = {
+                    student_id: f"{rule.name}:{student_id}:{due_date.isoformat()}"
+                    for student_id, due_date, _, _ in matched
+                }
+                for keys in batched(list(targets.values())):
+                    applied = db.session.query(Penalty.student_id).filter(Penalty.idempotency_key.in_(keys)).all()
+                    for row in applied:
+                        targets.pop(row.student_id, None)
+            else:
+                targets = {student_id: days for student_id, _, days, is_blocked in matched if not is_blocked}
+            plan.append((rule, targets))
+
+        # A student reaching several block thresholds is blocked once, by the longest one
+        claimed = set()
+        for rule, targets in sorted(plan, key=lambda item: -item[0].days):
+            if rule.action == 'block':
+                for student_id in claimed & set(targets):
+                    del targets[student_id]
+                claimed.update(targets)
+
+        return {"today": today, "overdue_count": len(students), "plan": plan}
+
+    @staticmethod
+    def _block(student_ids, reason, admin_id, chunk_size):
+        """
+        Block registration of the given students that are not blocked yet,
+        with one UPDATE per chunk. Returns the number of students blocked.
+        """
+        blocked_count = 0
+        now = datetime.now(timezone.utc)
+        for chunk in batched(student_ids, chunk_size):
+            unblocked = (
+                User.id.in_(chunk),
+                User.is_admin == False,
+                or_(User.is_blocked == False, User.is_blocked.is_(None))
+            )
+            statement = update(User).where(*unblocked).values(
+                is_blocked=True, blocked_at=now, blocked_reason=reason
+            ).execution_options(synchronize_session=False)
+            try:
+                if db.engine.dialect.update_returning:
+                    rows = db.session.execute(statement.returning(User.id, User.username)).all()
+                else:
+                    # No UPDATE ... RETURNING (MySQL): lock the rows to block, then update them
+                    rows = db.session.query(User.id, User.username).filter(*unblocked).with_for_update().all()
+                    if rows:
+                        db.session.execute(statement)
+
+                if rows:
+                    db.session.execute(insert(Notification), [
+                        {
+                            'student_id': row.id,
+                            'notification_type': 'REGISTRATION_BLOCKED',
+                            'message': f"Your registration has been blocked due to: {reason}",
+                            'is_read': False
+                        }
+                        for row in rows
+                    ])
+                    db.session.execute(insert(ActionLog), [
+                        {
+                            'student_id': row.id,
+                            'action_type': 'AUTO_BLOCK',
+                            'action_description': f"Blocked registration (REGISTRATION) for student {row.username} (ID: {row.id}): {reason}",
+                            'performed_by': admin_id
+                        }
+                        for row in rows
+                    ])
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            blocked_count += len(rows)
+        return blocked_count
+
+    @staticmethod
+    def run(rules, today=None, admin_id=None, dry_run=False, chunk_size=PENALTY_CHUNK_SIZE):
+        """
+        Evaluate the rules and apply the resulting penalties and blocks.
+
+        Args:
+            rules (list): EnforcementRule objects
+            today (date): Reference day (default: today, UTC)
+            admin_id (int): Recorded as applied_by/performed_by (None = system)
+            dry_run (bool): Only report what would be done
+            chunk_size (int): Students per UPDATE and transaction
+
+        Returns:
+            dict: today, overdue_count and results, one
+                {"rule", "matched", "applied"} per rule ("applied" is 0 on a dry run)
+
+        Raises:
+            PenaltyPartialFailure: A penalty chunk failed; earlier chunks stay committed
+        """
+        evaluation = EnforcementService.evaluate(rules, today)
+        results = []
+        for rule, targets in evaluation["plan"]:
+            applied = 0
+            if targets and not dry_run:
+                if rule.action == 'penalty':
+                    result = PenaltyService.apply_bulk(
+                        list(targets),
+                        amount=rule.amount,
+                        penalty_type='LATE_FEE',
+                        admin_id=admin_id,
+                        notes=f"Automatic penalty: {rule.days} days overdue",
+                        chunk_size=chunk_size,
+                        action_type='AUTO_PENALTY',
+                        idempotency_keys=targets
+                    )
+                    applied = result["applied_count"]
+                else:
+                    applied = EnforcementService._block(
+                        list(targets), f"Outstanding dues over {rule.days} days", admin_id, chunk_size
+                    )
+            results.append({"rule": str(rule), "matched": len(targets), "applied": applied})
+
+        return {
+            "today": evaluation["today"],
+            "overdue_count": evaluation["overdue_count"],
+            "results": results
+        }
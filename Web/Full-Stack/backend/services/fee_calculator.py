@@ -6,6 +6,7 @@ This ensures consistency between Finance configuration and Student charges.
 """
 
 from models import db, FeeStructure, Course
+from services.finance_queries import batched
 from datetime import datetime, timezone, timedelta
 
 
@@ -45,83 +46,148 @@ class FeeCalculator:
                 ]
             }
         """
-        # Get all active fee structures
-        tuition_fees = FeeStructure.query.filter_by(
-            category='tuition',
-            is_active=True
-        ).order_by(FeeStructure.display_order).all()
-        
-        bus_fees = FeeStructure.query.filter_by(
-            category='bus',
-            is_active=True
-        ).order_by(FeeStructure.display_order).all()
-        
+        schedule = FeeCalculator.load_fee_schedule()
+
         # Get courses and calculate total credits
         courses = Course.query.filter(Course.id.in_(course_ids)).all()
         total_credits = sum(course.credits for course in courses)
-        
-        # Initialize totals
+
+        quote = FeeCalculator._quote(schedule, total_credits, include_bus, with_breakdown=True)
+        quote['courses'] = [
+            {
+                'id': course.id,
+                'name': course.name,
+                'credits': course.credits
+            }
+            for course in courses
+        ]
+        return quote
+
+    @staticmethod
+    def load_fee_schedule():
+        """
+        Load the active fee schedule in one query.
+
+        Returns:
+            dict: {
+                'tuition': [FeeStructure, ...],  # Active tuition fees in display order
+                'bus': [FeeStructure, ...]       # Active bus fees in display order
+            }
+        """
+        fees = FeeStructure.query.filter(
+            FeeStructure.is_active == True,
+            FeeStructure.category.in_(['tuition', 'bus'])
+        ).order_by(FeeStructure.display_order).all()
+
+        return {
+            'tuition': [fee for fee in fees if fee.category == 'tuition'],
+            'bus': [fee for fee in fees if fee.category == 'bus']
+        }
+
+    @staticmethod
+    def _quote(schedule, total_credits, include_bus, with_breakdown=False):
+        """
+        Price one enrollment against a preloaded fee schedule.
+        Pure arithmetic, so it can be applied to any number of quotes.
+        """
         tuition_total = 0
         registration_total = 0
+        bus_total = 0
         breakdown = []
-        
-        # Calculate tuition fees
-        for fee in tuition_fees:
+
+        for fee in schedule['tuition']:
             if fee.is_per_credit:
                 # Per-credit fee: multiply by total credits
                 subtotal = fee.amount * total_credits
                 tuition_total += subtotal
-                breakdown.append({
-                    'category': 'tuition',
-                    'name': fee.name,
-                    'amount': fee.amount,
-                    'quantity': total_credits,
-                    'is_per_credit': True,
-                    'subtotal': subtotal
-                })
+                quantity = total_credits
             else:
                 # Fixed fee: add as-is
-                registration_total += fee.amount
+                subtotal = fee.amount
+                registration_total += subtotal
+                quantity = 1
+            if with_breakdown:
                 breakdown.append({
                     'category': 'tuition',
                     'name': fee.name,
                     'amount': fee.amount,
-                    'quantity': 1,
-                    'is_per_credit': False,
-                    'subtotal': fee.amount
+                    'quantity': quantity,
+                    'is_per_credit': bool(fee.is_per_credit),
+                    'subtotal': subtotal
                 })
-        
+
         # Calculate bus fees (if opted in)
-        bus_total = 0
         if include_bus:
-            for fee in bus_fees:
+            for fee in schedule['bus']:
                 bus_total += fee.amount
-                breakdown.append({
-                    'category': 'bus',
-                    'name': fee.name,
-                    'amount': fee.amount,
-                    'quantity': 1,
-                    'is_per_credit': False,
-                    'subtotal': fee.amount
-                })
-        
-        return {
+                if with_breakdown:
+                    breakdown.append({
+                        'category': 'bus',
+                        'name': fee.name,
+                        'amount': fee.amount,
+                        'quantity': 1,
+                        'is_per_credit': False,
+                        'subtotal': fee.amount
+                    })
+
+        quote = {
             'tuition_fees': tuition_total,
             'registration_fees': registration_total,
             'bus_fees': bus_total,
             'total': tuition_total + registration_total + bus_total,
-            'total_credits': total_credits,
-            'breakdown': breakdown,
-            'courses': [
-                {
-                    'id': course.id,
-                    'name': course.name,
-                    'credits': course.credits
-                }
-                for course in courses
-            ]
+            'total_credits': total_credits
         }
-    
+        if with_breakdown:
+            quote['breakdown'] = breakdown
+        return quote
+
+    @staticmethod
+    def quote_many(quotes, include_breakdown=False):
+        """
+        Price many enrollments at once (e.g. registration week).
+        The fee schedule is loaded once and course credits are fetched with
+        one IN query per batch of distinct course IDs, so the number of SQL
+        statements does not grow with the number of quotes.
+
+        Args:
+            quotes (iterable): (student_id, course_ids, include_bus) tuples
+            include_breakdown (bool): Include line items in every quote
+
+        Returns:
+            list: One dict per input, in input order: {
+                'student_id': int or None,
+                'course_ids': [int, ...],          # Deduplicated, input order
+                'unknown_course_ids': [int, ...],  # IDs with no matching course
+                'tuition_fees', 'registration_fees', 'bus_fees',
+                'total', 'total_credits'           # As in calculate_enrollment_fees
+                'breakdown': [...]                 # Only with include_breakdown
+            }
+        """
+        quotes = [
+            (student_id, list(dict.fromkeys(course_ids or [])), bool(include_bus))
+            for student_id, course_ids, include_bus in quotes
+        ]
+
+        schedule = FeeCalculator.load_fee_schedule()
+
+        credits = {}
+        all_course_ids = {course_id for _, course_ids, _ in quotes for course_id in course_ids}
+        for batch in batched(sorted(all_course_ids)):
+            for course_id, course_credits in db.session.query(
+                Course.id, Course.credits
+            ).filter(Course.id.in_(batch)).all():
+                credits[course_id] = course_credits or 0
+
+        results = []
+        for student_id, course_ids, include_bus in quotes:
+            total_credits = sum(credits.get(course_id, 0) for course_id in course_ids)
+            quote = FeeCalculator._quote(schedule, total_credits, include_bus, with_breakdown=include_breakdown)
+            quote['student_id'] = student_id
+            quote['course_ids'] = course_ids
+            quote['unknown_course_ids'] = [course_id for course_id in course_ids if course_id not in credits]
+            results.append(quote)
+        return results
+
     @staticmethod
     def calculate_single_course_fee(course_id, include_bus=False):
         """
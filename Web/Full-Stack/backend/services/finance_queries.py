@@ -0,0 +1,563 @@
+"""
+Finance Query Service
+=====================
+Set-based queries backing the finance endpoints.
+Each method answers a whole endpoint with a fixed number of SQL statements
+instead of issuing follow-up queries for every student in the result.
+"""
+
+from datetime import timedelta
+
+from models import db, User, Payment, Enrollment, Course, Faculty, BankTransaction, StudentLedgerSummary
+from sqlalchemy import and_, case, func
+from utils.pagination import encode_cursor, decode_cursor, keyset_filter, paginate
+
+
+# Maximum number of ids bound into a single IN (...) clause
+IN_BATCH_SIZE = 1000
+
+# Payment is due this many days after the first enrollment unless the
+# student has an explicit payment_due_date
+DUE_DAYS_AFTER_ENROLLMENT = 30
+
+# Dues falling due within this many days are "Due Soon"
+DUE_SOON_DAYS = 7
+
+# Buckets of due_status_case(), as accepted by ?status= on /unpaid-students
+DUE_STATUSES = ('Overdue', 'Due Today', 'Due Soon', 'Unpaid')
+
+
+def batched(ids, size=IN_BATCH_SIZE):
+    """Yield successive slices of ids for IN (...) prefetch queries."""
+    ids = list(ids)
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def due_date_of(payment_due_date, first_enrollment_date):
+    """Date a student's dues are due (None without due date or enrollment)."""
+    if payment_due_date:
+        return payment_due_date.date()
+    if first_enrollment_date:
+        return (first_enrollment_date + timedelta(days=DUE_DAYS_AFTER_ENROLLMENT)).date()
+    return None
+
+
+def due_status_case(due_column, today):
+    """
+    SQL CASE bucketing a due date column relative to today: "Overdue",
+    "Due Today", "Due Soon" (within a week) or "Unpaid" (later or no date).
+    """
+    return case(
+        (due_column < today, 'Overdue'),
+        (due_column == today, 'Due Today'),
+        (due_column <= today + timedelta(days=DUE_SOON_DAYS), 'Due Soon'),
+        else_='Unpaid'
+    )
+
+
+class FinanceQueries:
+    """
+    Aggregated read queries for the Finance portal.
+    """
+
+    @staticmethod
+    def enrollments_by_student(student_ids):
+        """
+        Prefetch enrollments (with course names) for many students at once.
+
+        Args:
+            student_ids (iterable): Student IDs to load
+
+        Returns:
+            dict: {student_id: [(Enrollment, course_name or None), ...]}
+        """
+        result = {student_id: [] for student_id in student_ids}
+        for batch in batched(result.keys()):
+            rows = db.session.query(
+                Enrollment,
+                Course.name
+            ).outerjoin(
+                Course, Enrollment.course_id == Course.id
+            ).filter(
+                Enrollment.student_id.in_(batch)
+            ).order_by(
+                Enrollment.student_id, Enrollment.id
+            ).all()
+
+            for enrollment, course_name in rows:
+                result[enrollment.student_id].append((enrollment, course_name))
+        return result
+
+    @staticmethod
+    def recent_payments_by_student(student_ids, per_student=5):
+        """
+        Prefetch the most recent payments for many students at once.
+        Uses ROW_NUMBER() partitioned by student so each batch is one query.
+
+        Args:
+            student_ids (iterable): Student IDs to load
+            per_student (int): Number of payments to keep per student
+
+        Returns:
+            dict: {student_id: [Payment, ...]} newest first
+        """
+        result = {student_id: [] for student_id in student_ids}
+        for batch in batched(result.keys()):
+            ranked = db.session.query(
+                Payment.id.label('payment_id'),
+                func.row_number().over(
+                    partition_by=Payment.student_id,
+                    order_by=(Payment.payment_date.desc(), Payment.id.desc())
+                ).label('position')
+            ).filter(
+                Payment.student_id.in_(batch)
+            ).subquery()
+
+            payments = db.session.query(Payment).join(
+                ranked, ranked.c.payment_id == Payment.id
+            ).filter(
+                ranked.c.position <= per_student
+            ).order_by(
+                Payment.student_id, ranked.c.position
+            ).all()
+
+            for payment in payments:
+                result[payment.student_id].append(payment)
+        return result
+
+    @staticmethod
+    def unpaid_report_rows(students, recent_payment_limit=5):
+        """
+        Build unpaid-report rows for a list of students using two prefetch
+        queries per IN batch (enrollments and recent payments).
+
+        Args:
+            students (list): User objects (or rows with id, username, email
+                and dues_balance) with outstanding dues
+            recent_payment_limit (int): Recent payments to include per student
+
+        Returns:
+            list: Report rows in the same order as students
+        """
+        student_ids = [student.id for student in students]
+        enrollments = FinanceQueries.enrollments_by_student(student_ids)
+        payments = FinanceQueries.recent_payments_by_student(student_ids, per_student=recent_payment_limit)
+
+        rows = []
+        for student in students:
+            rows.append({
+                "user_id": student.id,
+                "username": student.username or "Unknown",
+                "email": student.email or None,
+                "dues_balance": float(student.dues_balance) if student.dues_balance else 0.0,
+                "enrollments": [
+                    {
+                        "course_name": course_name or "Unknown Course",
+                        "course_fee": enrollment.course_fee,
+                        "enrollment_date": enrollment.enrollment_date.isoformat() if enrollment.enrollment_date else None
+                    }
+                    for enrollment, course_name in enrollments[student.id]
+                ],
+                "recent_payments": [
+                    {
+                        "amount": p.amount,
+                        "payment_date": p.payment_date.isoformat() if p.payment_date else None,
+                        "payment_method": p.payment_method or "UNKNOWN"
+                    }
+                    for p in payments[student.id]
+                ]
+            })
+        return rows
+
+    @staticmethod
+    def last_payment_subquery():
+        """
+        Latest payment date per student.
+
+        Returns:
+            Subquery with columns (student_id, last_payment_date)
+        """
+        return db.session.query(
+            Payment.student_id.label('student_id'),
+            func.max(Payment.payment_date).label('last_payment_date')
+        ).group_by(Payment.student_id).subquery()
+
+    @staticmethod
+    def enrollment_totals_subquery():
+        """
+        Number of enrollments and sum of enrollment fees per student.
+
+        Returns:
+            Subquery with columns (student_id, total_enrollments, total_fees)
+        """
+        return db.session.query(
+            Enrollment.student_id.label('student_id'),
+            func.count(Enrollment.id).label('total_enrollments'),
+            func.sum(Enrollment.course_fee).label('total_fees')
+        ).group_by(Enrollment.student_id).subquery()
+
+    @staticmethod
+    def dues_category(dues_balance):
+        """
+        Bucket used by the unpaid report: critical (> 5000),
+        moderate (1000 - 5000) or low (< 1000).
+        """
+        if dues_balance > 5000:
+            return 'critical'
+        elif dues_balance >= 1000:
+            return 'moderate'
+        return 'low'
+
+    @staticmethod
+    def unpaid_students_query():
+        """
+        Column query over students with outstanding dues, largest first.
+        Selects only the columns unpaid_report_rows needs so it can be streamed.
+        """
+        return db.session.query(
+            User.id,
+            User.username,
+            User.email,
+            User.dues_balance
+        ).filter(
+            User.dues_balance > 0,
+            User.is_admin == False
+        ).order_by(User.dues_balance.desc(), User.id.desc())
+
+    @staticmethod
+    def unpaid_students_page(today, status=None, limit=None, cursor=None):
+        """
+        Students with outstanding dues for the Unpaid Students page, with
+        their due-date bucket, in id order.
+
+        Due dates and the latest reminder are read from the ledger summary
+        and bucketed by due_status_case() in SQL, so the page is one query
+        and the summary counts one grouped aggregate.
+
+        Args:
+            today (date): Reference day for the buckets
+            status (str): Only students in this DUE_STATUSES bucket (optional)
+            limit (int): Page size for keyset pagination (None returns every row)
+            cursor (str): Cursor returned with the previous page
+
+        Returns:
+            dict: {
+                'summary': {...},   # Across all unpaid students, whatever the status filter
+                'students': [...],  # Current page
+                'next_cursor': str or None
+            }
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        filters = [User.is_admin == False, User.dues_balance > 0]
+        due_status = due_status_case(StudentLedgerSummary.due_date, today)
+
+        buckets = db.session.query(
+            due_status.label('status'),
+            func.count(User.id),
+            func.coalesce(func.sum(User.dues_balance), 0.0)
+        ).outerjoin(
+            StudentLedgerSummary, StudentLedgerSummary.student_id == User.id
+        ).filter(*filters).group_by(due_status).all()
+        counts = {bucket: count for bucket, count, _ in buckets}
+
+        query = db.session.query(
+            User.id,
+            User.username,
+            User.email,
+            User.dues_balance,
+            User.is_blocked,
+            StudentLedgerSummary.faculty_name,
+            StudentLedgerSummary.due_date,
+            StudentLedgerSummary.last_reminder_at,
+            due_status.label('status')
+        ).outerjoin(
+            StudentLedgerSummary, StudentLedgerSummary.student_id == User.id
+        ).filter(*filters)
+        if status:
+            query = query.filter(due_status == status)
+
+        if limit is not None:
+            rows, _, next_cursor = paginate(
+                query, None, User.id, limit, cursor=cursor, descending=False,
+                row_key=lambda row: (row.id,)
+            )
+        else:
+            rows, next_cursor = query.order_by(User.id).all(), None
+
+        students = [
+            {
+                "id": row.id,
+                "user_id": row.id,
+                "name": row.username,
+                "student_id": f"STD-{str(row.id).zfill(3)}",
+                "email": row.email,
+                "faculty": row.faculty_name or "Unknown",
+                "outstanding": float(row.dues_balance),
+                "due_date": row.due_date.isoformat() if row.due_date else None,
+                "days_overdue": (today - row.due_date).days if row.due_date else 0,
+                "status": row.status,
+                "is_blocked": row.is_blocked,
+                "last_reminder_sent": row.last_reminder_at.date().isoformat() if row.last_reminder_at else None
+            }
+            for row in rows
+        ]
+
+        return {
+            "summary": {
+                "unpaid_count": sum(counts.values()),
+                "total_outstanding": float(sum(total for _, _, total in buckets)),
+                "overdue_count": counts.get('Overdue', 0),
+                "due_today_count": counts.get('Due Today', 0),
+                "due_soon_count": counts.get('Due Soon', 0)
+            },
+            "students": students,
+            "next_cursor": next_cursor
+        }
+
+    @staticmethod
+    def status_report_query():
+        """
+        Every student with their enrollment count and total fees in one query.
+        """
+        totals = FinanceQueries.enrollment_totals_subquery()
+        return db.session.query(
+            User.id,
+            User.username,
+            User.email,
+            User.dues_balance,
+            func.coalesce(totals.c.total_fees, 0).label('total_fees'),
+            func.coalesce(totals.c.total_enrollments, 0).label('total_enrollments')
+        ).outerjoin(
+            totals, totals.c.student_id == User.id
+        ).filter(
+            User.is_admin == False
+        ).order_by(User.id)
+
+    @staticmethod
+    def status_report_row(row, threshold):
+        """
+        Build one Pass/Fail status report row.
+
+        Args:
+            row: Row from status_report_query
+            threshold (float): Dues above this amount mean FAIL
+
+        Returns:
+            dict: Report row including its "status"
+        """
+        return {
+            "user_id": row.id,
+            "username": row.username,
+            "email": row.email,
+            "dues_balance": row.dues_balance,
+            "total_fees": row.total_fees,
+            "total_enrollments": row.total_enrollments,
+            "status": "PASS" if row.dues_balance <= threshold else "FAIL"
+        }
+
+    @staticmethod
+    def summary_metrics(history_cutoff=None):
+        """
+        Dashboard totals in two aggregate queries (payments, students).
+
+        Args:
+            history_cutoff (datetime): When given, also return the collected
+                total and student count as they stood at that moment
+                (RECEIVED payments dated / students created before it)
+
+        Returns:
+            dict: total_collected, pending_payments, total_students,
+                unpaid_students (+ collected_before_cutoff and
+                students_before_cutoff when history_cutoff is given)
+        """
+        received = Payment.status == 'RECEIVED'
+        payment_columns = [func.sum(case((received, Payment.amount), else_=0))]
+        if history_cutoff is not None:
+            payment_columns.append(
+                func.sum(case((and_(received, Payment.payment_date < history_cutoff), Payment.amount), else_=0))
+            )
+        payment_totals = db.session.query(*payment_columns).one()
+
+        student_columns = [
+            func.sum(User.dues_balance),
+            func.count(User.id),
+            func.sum(case((User.dues_balance > 0, 1), else_=0))
+        ]
+        if history_cutoff is not None:
+            student_columns.append(func.sum(case((User.created_at < history_cutoff, 1), else_=0)))
+        student_totals = db.session.query(*student_columns).filter(User.is_admin == False).one()
+
+        metrics = {
+            "total_collected": float(payment_totals[0] or 0.0),
+            "pending_payments": float(student_totals[0] or 0.0),
+            "total_students": int(student_totals[1] or 0),
+            "unpaid_students": int(student_totals[2] or 0)
+        }
+        if history_cutoff is not None:
+            metrics["collected_before_cutoff"] = float(payment_totals[1] or 0.0)
+            metrics["students_before_cutoff"] = int(student_totals[3] or 0)
+        return metrics
+
+    @staticmethod
+    def payments_by_faculty():
+        """
+        Fees and collected amount of ACTIVE enrollments per faculty in one
+        grouped query.
+
+        Each enrollment collects its share of the student's RECEIVED
+        payments, prorated by its fee over the student's total fees.
+        (Simplified allocation - in reality, you'd need to track which
+        payments correspond to which enrollments.) Student totals come from
+        the ledger.
+
+        Returns:
+            list: Rows of (name, total, collected); courses without a
+                faculty are grouped as 'Unknown'
+        """
+        faculty_group = func.coalesce(Faculty.name, 'Unknown')
+        enrollment_collected = case(
+            (
+                StudentLedgerSummary.total_fees > 0,
+                Enrollment.course_fee / StudentLedgerSummary.total_fees * StudentLedgerSummary.total_paid
+            ),
+            else_=0
+        )
+        return db.session.query(
+            faculty_group.label('name'),
+            func.sum(Enrollment.course_fee).label('total'),
+            func.sum(enrollment_collected).label('collected')
+        ).join(
+            Course, Enrollment.course_id == Course.id
+        ).outerjoin(
+            Faculty, Course.faculty_id == Faculty.id
+        ).outerjoin(
+            StudentLedgerSummary, StudentLedgerSummary.student_id == Enrollment.student_id
+        ).filter(
+            Enrollment.status == 'ACTIVE'
+        ).group_by(faculty_group).all()
+
+    @staticmethod
+    def bank_reconciliation_summary():
+        """
+        Bank transaction counts and amount per status in one GROUP BY query.
+
+        Returns:
+            dict: total, matched, unmatched, pending, total_amount and
+                by_status ({status: count}, including any other status)
+        """
+        rows = db.session.query(
+            BankTransaction.status,
+            func.count(BankTransaction.id),
+            func.coalesce(func.sum(BankTransaction.amount), 0.0)
+        ).group_by(BankTransaction.status).all()
+
+        by_status = {status: int(count) for status, count, _ in rows}
+        return {
+            "total": sum(by_status.values()),
+            "matched": by_status.get('Matched', 0),
+            "unmatched": by_status.get('Unmatched', 0),
+            "pending": by_status.get('Pending', 0),
+            "total_amount": float(sum(amount for _, _, amount in rows)),
+            "by_status": by_status
+        }
+
+    @staticmethod
+    def outstanding_dues(min_amount=None, max_amount=None, sort_by='dues_balance', limit=None, cursor=None):
+        """
+        List students with outstanding dues together with their enrollment
+        count and last payment date, in one grouped LEFT JOIN query.
+
+        Args:
+            min_amount (float): Only include dues >= min_amount
+            max_amount (float): Only include dues <= max_amount
+            sort_by (str): 'dues_balance' (descending) or 'username' (ascending)
+            limit (int): Page size for keyset pagination (None returns every row)
+            cursor (str): Cursor returned with the previous page
+
+        Returns:
+            dict: {
+                'total_students_with_dues': int,   # Across all pages
+                'total_outstanding_amount': float, # Across all pages
+                'students': [...],                 # Current page
+                'next_cursor': str or None
+            }
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        filters = [User.dues_balance > 0, User.is_admin == False]
+        if min_amount is not None:
+            filters.append(User.dues_balance >= min_amount)
+        if max_amount is not None:
+            filters.append(User.dues_balance <= max_amount)
+
+        # Server-side totals over the whole filtered set (independent of the page)
+        total_students, total_outstanding = db.session.query(
+            func.count(User.id),
+            func.coalesce(func.sum(User.dues_balance), 0.0)
+        ).filter(*filters).one()
+
+        last_payment = FinanceQueries.last_payment_subquery()
+        enrollment_counts = FinanceQueries.enrollment_totals_subquery()
+
+        query = db.session.query(
+            User.id,
+            User.username,
+            User.email,
+            User.dues_balance,
+            func.coalesce(enrollment_counts.c.total_enrollments, 0).label('total_enrollments'),
+            last_payment.c.last_payment_date
+        ).outerjoin(
+            enrollment_counts, enrollment_counts.c.student_id == User.id
+        ).outerjoin(
+            last_payment, last_payment.c.student_id == User.id
+        ).filter(*filters)
+
+        # Username pages ascend, dues pages descend; id breaks ties either way
+        if sort_by == 'username':
+            sort_column, descending = User.username, False
+            query = query.order_by(User.username.asc(), User.id.asc())
+        else:
+            sort_column, descending = User.dues_balance, True
+            query = query.order_by(User.dues_balance.desc(), User.id.desc())
+
+        if cursor:
+            last_value, last_id = decode_cursor(cursor)
+            query = query.filter(keyset_filter(sort_column, User.id, last_value, last_id, descending=descending))
+
+        if limit is not None:
+            # Fetch one extra row to know whether another page exists
+            rows = query.limit(limit + 1).all()
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+        else:
+            rows = query.all()
+            has_more = False
+
+        students = [
+            {
+                "user_id": row.id,
+                "username": row.username,
+                "email": row.email,
+                "dues_balance": row.dues_balance,
+                "total_enrollments": row.total_enrollments,
+                "last_payment_date": row.last_payment_date.isoformat() if row.last_payment_date else None
+            }
+            for row in rows
+        ]
+
+        next_cursor = None
+        if has_more and rows:
+            last_row = rows[-1]
+            sort_value = last_row.username if sort_by == 'username' else last_row.dues_balance
+            next_cursor = encode_cursor(sort_value, last_row.id)
+
+        return {
+            "total_students_with_dues": total_students,
+            "total_outstanding_amount": float(total_outstanding),
+            "students": students,
+            "next_cursor": next_cursor
+        }
@@ -0,0 +1,356 @@
+"""
+Background Job Queue
+====================
+Database-backed queue for long-running finance operations.
+
+A heavy endpoint called with ?async=true stores its request in the jobs
+table (JSON body in the row, any other body spooled to JOB_SPOOL_DIR) and
+returns the job id immediately. `flask worker` processes claim queued jobs
+and run the same endpoint in a request context authenticated as the user
+who queued it, so sync and async calls share one code path. The endpoint's
+JSON response becomes the job result.
+
+While a job runs, a heartbeat thread writes its progress (reported by the
+endpoint through report_progress) every JOB_HEARTBEAT_INTERVAL seconds.
+Running jobs whose heartbeat stops (the worker died) are marked FAILED;
+they are never retried automatically because most of these operations are
+not idempotent.
+"""
+
+import multiprocessing
+import os
+import shutil
+import signal
+import socket
+import tempfile
+import threading
+import uuid
+from datetime import datetime, timezone, timedelta
+
+from flask import current_app, g, has_app_context, request
+from flask_jwt_extended import create_access_token
+from models import db, Job
+from sqlalchemy import update
+
+
+# Seconds between heartbeat/progress writes of a running job
+JOB_HEARTBEAT_INTERVAL = 5
+
+# Queued jobs fetched per poll before trying to claim one
+CLAIM_CANDIDATES = 10
+
+
+def _utcnow():
+    return datetime.now(timezone.utc)
+
+
+def report_progress(current, total=None):
+    """
+    Record progress of the running job (no-op outside a worker).
+    Cheap to call in tight loops: the value is written by the heartbeat
+    thread, not here.
+
+    Args:
+        current (int): Units of work done so far
+        total (int): Total units of work, if known
+    """
+    if not has_app_context():
+        return
+    run = g.get('job_run')
+    if run is not None:
+        run.current = int(current)
+        if total is not None:
+            run.total = int(total)
+
+
+class _JobHeartbeat(threading.Thread):
+    """Writes progress and heartbeat_at for one running job until stopped."""
+
+    def __init__(self, engine, job_id, interval):
+        super().__init__(daemon=True)
+        self.engine = engine
+        self.job_id = job_id
+        self.interval = interval
+        self.current = 0
+        self.total = None
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                with self.engine.begin() as connection:
+                    connection.execute(
+                        update(Job.__table__).where(
+                            Job.__table__.c.id == self.job_id,
+                            Job.__table__.c.status == 'RUNNING'
+                        ).values(
+                            progress_current=self.current,
+                            progress_total=self.total,
+                            heartbeat_at=_utcnow()
+                        )
+                    )
+            except Exception:
+                # Best effort; the next beat retries
+                pass
+
+    def stop(self):
+        self.stopped.set()
+
+
+class JobQueue:
+    """
+    Enqueue, claim and execute Job rows.
+    """
+
+    @staticmethod
+    def spool_dir():
+        """Directory holding request bodies of queued jobs (created on demand)."""
+        path = current_app.config.get('JOB_SPOOL_DIR') or os.path.join(tempfile.gettempdir(), 'finance-jobs')
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    @staticmethod
+    def enqueue_request(created_by=None):
+        """
+        Queue the current request (without its async flag) for a worker.
+        Non-JSON bodies (e.g. statement uploads) are copied to the spool
+        directory in chunks, so they are never held in memory.
+
+        Args:
+            created_by: Identity of the user queueing the job
+
+        Returns:
+            Job: The committed QUEUED job
+        """
+        job_id = str(uuid.uuid4())
+        payload = {
+            'method': request.method,
+            'path': request.path,
+            'args': [[key, value] for key, value in request.args.items(multi=True) if key != 'async'],
+            'content_type': request.content_type
+        }
+
+        if request.is_json:
+            payload['json'] = request.get_json(silent=True)
+        elif request.content_length or request.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            body_file = os.path.join(JobQueue.spool_dir(), f"{job_id}.body")
+            with open(body_file, 'wb') as spool:
+                shutil.copyfileobj(request.stream, spool, 64 * 1024)
+            payload['body_file'] = body_file
+
+        job = Job(
+            id=job_id,
+            job_type=request.endpoint,
+            status='QUEUED',
+            payload=payload,
+            created_by=int(created_by) if created_by else None
+        )
+        db.session.add(job)
+        db.session.commit()
+        return job
+
+    @staticmethod
+    def claim_next(worker_id):
+        """
+        Atomically move the oldest QUEUED job to RUNNING for this worker.
+        The conditional UPDATE lets several workers poll safely: only the
+        one whose UPDATE changes the row gets the job.
+
+        Returns:
+            Job or None
+        """
+        candidates = db.session.query(Job.id).filter(
+            Job.status == 'QUEUED'
+        ).order_by(Job.created_at, Job.id).limit(CLAIM_CANDIDATES).all()
+        db.session.commit()
+
+        for (job_id,) in candidates:
+            now = _utcnow()
+            claimed = db.session.execute(
+                update(Job).where(Job.id == job_id, Job.status == 'QUEUED').values(
+                    status='RUNNING', worker_id=worker_id, started_at=now, heartbeat_at=now
+                ).execution_options(synchronize_session=False)
+            ).rowcount
+            db.session.commit()
+            if claimed:
+                return db.session.get(Job, job_id)
+        return None
+
+    @staticmethod
+    def fail_stale(stale_after):
+        """
+        Mark RUNNING jobs without a heartbeat for stale_after seconds FAILED.
+
+        Returns:
+            int: Number of jobs marked failed
+        """
+        now = _utcnow()
+        failed = db.session.execute(
+            update(Job).where(
+                Job.status == 'RUNNING',
+                Job.heartbeat_at < now - timedelta(seconds=stale_after)
+            ).values(
+                status='FAILED', error='Worker stopped before the job finished', finished_at=now
+            ).execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.commit()
+        return failed
+
+    @staticmethod
+    def run(app, job_id):
+        """
+        Execute a claimed job by dispatching its stored request, then record
+        the outcome. Runs in a fresh app context so the job gets its own
+        session, which is removed afterwards.
+
+        Args:
+            app: Flask application
+            job_id (str): ID of a RUNNING job claimed by this worker
+        """
+        with app.app_context():
+            job = db.session.get(Job, job_id)
+            payload = job.payload
+            created_by = job.created_by
+            db.session.commit()
+
+            heartbeat = _JobHeartbeat(
+                db.engine, job_id, app.config.get('JOB_HEARTBEAT_INTERVAL', JOB_HEARTBEAT_INTERVAL)
+            )
+            heartbeat.start()
+
+            body = None
+            status, result, result_status, error = 'FAILED', None, None, None
+            try:
+                context = {
+                    'path': payload['path'],
+                    'method': payload['method'],
+                    'query_string': [tuple(item) for item in payload.get('args', [])],
+                    'headers': {'Authorization': f"Bearer {create_access_token(identity=str(created_by))}"}
+                }
+                if 'json' in payload:
+                    context['json'] = payload['json']
+                elif payload.get('body_file'):
+                    body = open(payload['body_file'], 'rb')
+                    context['input_stream'] = body
+                    context['content_type'] = payload.get('content_type')
+                    context['content_length'] = os.path.getsize(payload['body_file'])
+
+                with app.test_request_context(**context):
+                    g.job_run = heartbeat
+                    response = app.full_dispatch_request()
+                    text = response.get_data(as_text=True)  # Drains streamed responses too
+                    result = response.get_json(silent=True)
+                    if result is None:
+                        result = {'body': text[:10000]}
+                    result_status = response.status_code
+
+                if result_status < 400:
+                    status = 'SUCCEEDED'
+                else:
+                    error = (result or {}).get('error') if isinstance(result, dict) else None
+                    error = error or f"Endpoint returned HTTP {result_status}"
+            except Exception as e:
+                error = str(e)
+                app.logger.error(f"Job {job_id} failed: {error}", exc_info=True)
+            finally:
+                # Like request teardown: whatever the endpoint did not commit is discarded
+                db.session.rollback()
+                heartbeat.stop()
+                if body is not None:
+                    body.close()
+                if payload.get('body_file') and os.path.exists(payload['body_file']):
+                    os.remove(payload['body_file'])
+
+            db.session.execute(
+                update(Job).where(Job.id == job_id).values(
+                    status=status,
+                    result=result,
+                    result_status=result_status,
+                    error=error,
+                    progress_current=heartbeat.current,
+                    progress_total=heartbeat.total,
+                    heartbeat_at=_utcnow(),
+                    finished_at=_utcnow()
+                ).execution_options(synchronize_session=False)
+            )
+            db.session.commit()
+
+
+def run_worker(app, poll_interval=2.0, once=False):
+    """
+    Poll for jobs and run them one at a time until SIGTERM/SIGINT
+    (the current job is finished first) or, with once=True, until the
+    queue is empty.
+
+    Args:
+        app: Flask application
+        poll_interval (float): Seconds to sleep when the queue is empty
+        once (bool): Exit when no job is queued
+    """
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    stopping = threading.Event()
+
+    def request_stop(signum, frame):
+        stopping.set()
+
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+
+    stale_after = app.config.get('JOB_STALE_AFTER', 300)
+    app.logger.info(f"Job worker {worker_id} started")
+
+    while not stopping.is_set():
+        with app.app_context():
+            JobQueue.fail_stale(stale_after)
+            job = JobQueue.claim_next(worker_id)
+            job_id = job.id if job else None
+            db.session.remove()
+
+        if job_id is None:
+            if once:
+                break
+            stopping.wait(poll_interval)
+            continue
+
+        app.logger.info(f"Job worker {worker_id} running job {job_id}")
+        try:
+            JobQueue.run(app, job_id)
+        except Exception as e:
+            # The job stays RUNNING and is failed by fail_stale once its heartbeat stops
+            app.logger.error(f"Job worker {worker_id} could not record job {job_id}: {str(e)}", exc_info=True)
+
+    app.logger.info(f"Job worker {worker_id} stopped")
+
+
+def _worker_process(poll_interval):
+    """Entry point of a pooled worker process (builds its own app)."""
+    from app import create_app
+
+    run_worker(create_app(), poll_interval=poll_interval)
+
+
+def run_worker_pool(processes, poll_interval=2.0):
+    """
+    Run several worker processes and stop them all on SIGTERM/SIGINT.
+    Children are spawned (not forked) so none inherits database connections.
+
+    Args:
+        processes (int): Number of worker processes
+        poll_interval (float): Seconds each worker sleeps when the queue is empty
+    """
+    context = multiprocessing.get_context('spawn')
+    children = [context.Process(target=_worker_process, args=(poll_interval,)) for _ in range(processes)]
+    for child in children:
+        child.start()
+
+    def stop_children(signum, frame):
+        for child in children:
+            if child.is_alive():
+                os.kill(child.pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, stop_children)
+    signal.signal(signal.SIGINT, stop_children)
+
+    for child in children:
+        child.join()
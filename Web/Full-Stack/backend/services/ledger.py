@@ -0,0 +1,244 @@
+"""
+Student Ledger Service
+======================
+Maintains the student_ledger_summaries table: one row per student holding
+fee, payment and penalty totals derived from Enrollment, Payment and Penalty,
+the effective due date and the time of the latest payment reminder.
+
+Write paths call LedgerService.refresh_students() after changing those rows
+and before committing, so the summary is updated in the same transaction.
+Each refresh locks the affected students' summary rows (SELECT ... FOR
+UPDATE) and then recomputes them from source rows with a single grouped
+query. Concurrent refreshes of the same student therefore run one after the
+other instead of interleaving, and a refresh is idempotent. Under MySQL's
+default REPEATABLE READ the recompute can still read a snapshot that
+predates another transaction's commit. `flask finance rebuild-ledger`
+repairs any rows that drift this way.
+"""
+
+from datetime import datetime, timezone
+
+from models import db, User, Enrollment, Payment, Penalty, Notification, Course, Faculty, StudentLedgerSummary
+from sqlalchemy import case, func, update
+from sqlalchemy.orm import aliased
+from services.finance_queries import IN_BATCH_SIZE, batched, due_date_of
+
+
+class LedgerService:
+    """
+    Maintenance helpers for StudentLedgerSummary.
+    """
+
+    @staticmethod
+    def payment_status(dues_balance, total_paid):
+        """
+        Payment status shown on the finance pages.
+
+        - "Paid": no outstanding dues
+        - "Pending": dues remain but something has been paid
+        - "Unpaid": nothing paid yet
+
+        Args:
+            dues_balance (float): Student's outstanding dues
+            total_paid (float): Sum of RECEIVED payments
+
+        Returns:
+            str: "Paid", "Pending" or "Unpaid"
+        """
+        if not dues_balance:
+            return "Paid"
+        elif total_paid and total_paid > 0:
+            return "Pending"
+        return "Unpaid"
+
+    @staticmethod
+    def payment_status_case(dues_column, paid_column):
+        """
+        SQL CASE expression equivalent to payment_status(), so status can be
+        filtered and counted inside the database.
+
+        Args:
+            dues_column: Expression for the outstanding dues (NULLs coalesced)
+            paid_column: Expression for the RECEIVED total (NULLs coalesced)
+
+        Returns:
+            SQLAlchemy CASE expression yielding "Paid", "Pending" or "Unpaid"
+        """
+        return case(
+            (dues_column == 0, 'Paid'),
+            (paid_column > 0, 'Pending'),
+            else_='Unpaid'
+        )
+
+    @staticmethod
+    def _aggregate_query(student_ids):
+        """
+        Grouped query computing ledger values for a batch of students.
+        Every aggregate subquery is restricted to the batch so the database
+        only touches the affected students' rows.
+        """
+        enrollments = db.session.query(
+            Enrollment.student_id.label('student_id'),
+            func.count(Enrollment.id).label('enrollment_count'),
+            func.sum(Enrollment.course_fee).label('total_fees'),
+            func.min(Enrollment.id).label('first_enrollment_id')
+        ).filter(
+            Enrollment.student_id.in_(student_ids)
+        ).group_by(Enrollment.student_id).subquery()
+
+        payments = db.session.query(
+            Payment.student_id.label('student_id'),
+            func.sum(case((Payment.status == 'RECEIVED', Payment.amount), else_=0)).label('total_paid'),
+            func.sum(case((Payment.status == 'PENDING', Payment.amount), else_=0)).label('pending_amount'),
+            func.max(case((Payment.status == 'RECEIVED', Payment.payment_date))).label('last_payment_at')
+        ).filter(
+            Payment.student_id.in_(student_ids)
+        ).group_by(Payment.student_id).subquery()
+
+        penalties = db.session.query(
+            Penalty.student_id.label('student_id'),
+            func.sum(Penalty.amount).label('total_penalties')
+        ).filter(
+            Penalty.student_id.in_(student_ids)
+        ).group_by(Penalty.student_id).subquery()
+
+        reminders = db.session.query(
+            Notification.student_id.label('student_id'),
+            func.max(Notification.created_at).label('last_reminder_at')
+        ).filter(
+            Notification.notification_type == 'PAYMENT_REMINDER',
+            Notification.student_id.in_(student_ids)
+        ).group_by(Notification.student_id).subquery()
+
+        # Faculty snapshot follows the course of the student's first enrollment
+        first_enrollment = aliased(Enrollment)
+
+        return db.session.query(
+            User.id.label('student_id'),
+            func.coalesce(enrollments.c.enrollment_count, 0).label('enrollment_count'),
+            func.coalesce(enrollments.c.total_fees, 0).label('total_fees'),
+            func.coalesce(payments.c.total_paid, 0).label('total_paid'),
+            func.coalesce(payments.c.pending_amount, 0).label('pending_amount'),
+            func.coalesce(penalties.c.total_penalties, 0).label('total_penalties'),
+            payments.c.last_payment_at,
+            reminders.c.last_reminder_at,
+            User.payment_due_date,
+            first_enrollment.enrollment_date.label('first_enrollment_date'),
+            Faculty.id.label('faculty_id'),
+            Faculty.name.label('faculty_name')
+        ).outerjoin(
+            enrollments, enrollments.c.student_id == User.id
+        ).outerjoin(
+            payments, payments.c.student_id == User.id
+        ).outerjoin(
+            penalties, penalties.c.student_id == User.id
+        ).outerjoin(
+            reminders, reminders.c.student_id == User.id
+        ).outerjoin(
+            first_enrollment, first_enrollment.id == enrollments.c.first_enrollment_id
+        ).outerjoin(
+            Course, Course.id == first_enrollment.course_id
+        ).outerjoin(
+            Faculty, Faculty.id == Course.faculty_id
+        ).filter(
+            User.id.in_(student_ids),
+            User.is_admin == False
+        )
+
+    @staticmethod
+    def refresh_students(student_ids):
+        """
+        Recompute ledger rows for the given students inside the current
+        session. The caller commits (or rolls back) together with the
+        writes that triggered the refresh.
+
+        Args:
+            student_ids (iterable): IDs of students whose rows changed
+
+        Returns:
+            int: Number of ledger rows written
+        """
+        ids = sorted({int(student_id) for student_id in student_ids if student_id is not None})
+        now = datetime.now(timezone.utc)
+        written = 0
+
+        for batch in batched(ids):
+            # Lock before reading the totals so concurrent refreshes of a student serialize
+            existing = {
+                summary.student_id: summary
+                for summary in StudentLedgerSummary.query.filter(
+                    StudentLedgerSummary.student_id.in_(batch)
+                ).with_for_update().all()
+            }
+            rows = LedgerService._aggregate_query(batch).all()
+
+            for row in rows:
+                summary = existing.get(row.student_id)
+                if summary is None:
+                    summary = StudentLedgerSummary(student_id=row.student_id)
+                    db.session.add(summary)
+
+                summary.faculty_id = row.faculty_id
+                summary.faculty_name = row.faculty_name
+                summary.enrollment_count = row.enrollment_count
+                summary.first_enrollment_date = row.first_enrollment_date
+                summary.total_fees = float(row.total_fees)
+                summary.total_paid = float(row.total_paid)
+                summary.pending_amount = float(row.pending_amount)
+                summary.total_penalties = float(row.total_penalties)
+                summary.last_payment_at = row.last_payment_at
+                summary.due_date = due_date_of(row.payment_due_date, row.first_enrollment_date)
+                summary.last_reminder_at = row.last_reminder_at
+                summary.updated_at = now
+                written += 1
+
+        return written
+
+    @staticmethod
+    def record_reminders(student_ids, sent_at):
+        """
+        Set last_reminder_at for students just sent a PAYMENT_REMINDER,
+        with one UPDATE per batch instead of a full refresh. The caller
+        commits together with the notifications.
+
+        Args:
+            student_ids (iterable): Students reminded
+            sent_at (datetime): created_at of the reminder notifications
+        """
+        for batch in batched(student_ids):
+            db.session.execute(
+                update(StudentLedgerSummary).where(
+                    StudentLedgerSummary.student_id.in_(batch)
+                ).values(last_reminder_at=sent_at).execution_options(synchronize_session=False)
+            )
+
+    @staticmethod
+    def rebuild(batch_size=IN_BATCH_SIZE):
+        """
+        Recompute the ledger for every student, committing per batch.
+        Used by `flask finance rebuild-ledger` to backfill and repair drift.
+
+        Args:
+            batch_size (int): Students per transaction
+
+        Returns:
+            int: Number of ledger rows written
+        """
+        student_ids = [
+            row.id for row in db.session.query(User.id).filter(User.is_admin == False).order_by(User.id).all()
+        ]
+
+        written = 0
+        for batch in batched(student_ids, batch_size):
+            written += LedgerService.refresh_students(batch)
+            db.session.commit()
+
+        # Drop rows for users that are no longer students
+        StudentLedgerSummary.query.filter(
+            ~StudentLedgerSummary.student_id.in_(
+                db.session.query(User.id).filter(User.is_admin == False)
+            )
+        ).delete(synchronize_session=False)
+        db.session.commit()
+
+        return written
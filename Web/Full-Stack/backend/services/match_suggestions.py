@@ -0,0 +1,316 @@
+"""
+Match Suggestion Service
+========================
+Suggests students and payments for an unmatched bank transaction.
+
+Every lookup is an indexed range or IN query with a LIMIT, so the cost of a
+suggestion does not depend on how many students owe money:
+- Amount candidates come from two scans of idx_user_admin_dues walking away
+  from the transaction amount (one upwards, one downwards) and merging.
+- Reference candidates come from tokens of the bank reference and
+  description looked up against usernames, emails, last names
+  (idx_user_last_name), student codes (STD-042) and payment reference
+  numbers (idx_payment_reference).
+Candidates are scored on amount closeness and token overlap.
+"""
+
+import re
+
+from models import db, User, Payment
+from sqlalchemy import or_
+from datetime import timedelta
+
+
+# Students fetched from each side of the amount when building suggestions
+AMOUNT_POOL_SIZE = 50
+
+# Relative distance still considered a similar amount
+SIMILAR_AMOUNT_RATIO = 0.1
+
+# Weight of the amount score (the rest is token similarity)
+AMOUNT_WEIGHT = 0.6
+
+TOKEN_PATTERN = re.compile(r"[A-Za-z0-9][A-Za-z0-9@._-]*[A-Za-z0-9]")
+STUDENT_CODE_PATTERN = re.compile(r"^std-?0*(\d+)$")
+
+
+def tokenize(*texts):
+    """
+    Lowercased tokens (3+ characters) of the given texts. Emails and
+    codes such as STD-042 or REF-1234 are kept whole, and their parts are
+    added as separate tokens.
+    """
+    tokens = set()
+    for text in texts:
+        for token in TOKEN_PATTERN.findall(text or ''):
+            token = token.lower()
+            parts = [token] + re.split(r"[@._-]", token)
+            tokens.update(part for part in parts if len(part) >= 3)
+    return tokens
+
+
+def student_code(student_id):
+    """Student code as shown on the finance pages (STD-009)."""
+    return f"STD-{student_id:03d}"
+
+
+def _identifier_tokens(student):
+    """Tokens that identify a student on their own: username, email, student code."""
+    return {value.lower() for value in (student.username, student.email, student_code(student.id)) if value}
+
+
+def _name_tokens(student):
+    return tokenize(student.first_name, student.last_name)
+
+
+def _confidence(score):
+    if score >= AMOUNT_WEIGHT:
+        return 'HIGH'
+    if score >= 0.2:
+        return 'MEDIUM'
+    return 'LOW'
+
+
+class MatchSuggestionService:
+    """
+    Indexed suggestion lookups for bank reconciliation.
+    """
+
+    @staticmethod
+    def _student_columns():
+        return db.session.query(
+            User.id,
+            User.username,
+            User.email,
+            User.first_name,
+            User.last_name,
+            User.dues_balance
+        )
+
+    @staticmethod
+    def nearest_students(amount, offset=0, limit=20, lower=None, upper=None):
+        """
+        Students with outstanding dues ordered by |dues_balance - amount|.
+        Reads at most offset + limit + 1 rows from each side of the amount
+        through idx_user_admin_dues, so the cost depends on the page, not
+        on the number of indebted students.
+
+        Args:
+            amount (float): Transaction amount
+            offset (int): Rows to skip
+            limit (int): Page size
+            lower (float): Optional minimum dues_balance (inclusive)
+            upper (float): Optional maximum dues_balance (inclusive)
+
+        Returns:
+            tuple: (rows, has_more)
+        """
+        window = offset + limit + 1
+        base = MatchSuggestionService._student_columns().filter(
+            User.is_admin == False,
+            User.dues_balance > 0
+        )
+        above = base.filter(User.dues_balance >= amount)
+        below = base.filter(User.dues_balance < amount)
+        if upper is not None:
+            above = above.filter(User.dues_balance <= upper)
+        if lower is not None:
+            below = below.filter(User.dues_balance >= lower)
+
+        above = above.order_by(User.dues_balance.asc(), User.id.asc()).limit(window).all()
+        below = below.order_by(User.dues_balance.desc(), User.id.asc()).limit(window).all()
+
+        merged = sorted(above + below, key=lambda row: (abs(row.dues_balance - amount), row.id))
+        return merged[offset:offset + limit], len(merged) > offset + limit
+
+    @staticmethod
+    def reference_students(tokens):
+        """
+        Students whose username, email, last name or student code appears
+        among the tokens (IN lookups on indexed columns).
+
+        Returns:
+            list: Student rows
+        """
+        if not tokens:
+            return []
+        tokens = sorted(tokens)
+        student_ids = [
+            int(match.group(1)) for match in (STUDENT_CODE_PATTERN.match(token) for token in tokens) if match
+        ]
+        names = sorted({variant for token in tokens for variant in (token, token.capitalize())})
+
+        conditions = [
+            User.username.in_(tokens),
+            User.email.in_(tokens),
+            User.last_name.in_(names)
+        ]
+        if student_ids:
+            conditions.append(User.id.in_(student_ids))
+
+        return MatchSuggestionService._student_columns().filter(
+            User.is_admin == False,
+            or_(*conditions)
+        ).limit(AMOUNT_POOL_SIZE).all()
+
+    @staticmethod
+    def score_student(student, amount, tokens):
+        """
+        Score a student for a transaction.
+
+        - Amount: 1.0 for an exact match, 0.5-1.0 within 10% (closer is
+          higher), 0 otherwise
+        - Tokens: share of the student's first/last name tokens found in
+          the reference/description
+        A username, email or student code in the text identifies the
+        student outright: the score starts above any amount-only match
+        (0.8, HIGH confidence) and reaches 1.0 with an exact amount.
+
+        Returns:
+            tuple: (score, reasons)
+        """
+        reasons = []
+        dues = float(student.dues_balance or 0)
+        difference = abs(dues - amount)
+        amount_score = 0.0
+        if dues > 0 and difference < 0.01:
+            amount_score = 1.0
+            reasons.append('Exact amount match with outstanding dues')
+        elif dues > 0 and amount > 0 and difference / amount <= SIMILAR_AMOUNT_RATIO:
+            amount_score = 0.5 + 0.5 * (1 - difference / (amount * SIMILAR_AMOUNT_RATIO))
+            reasons.append(f'Similar amount (within 10%) - Dues: ${dues}, Transaction: ${amount}')
+
+        identifiers = _identifier_tokens(student) & tokens
+        names = _name_tokens(student)
+        shared = names & tokens
+        token_score = 1.0 if identifiers else (len(shared) / len(names) if names else 0.0)
+        if identifiers or shared:
+            reasons.append(f"Reference/description mentions {', '.join(sorted(identifiers | shared))}")
+
+        score = AMOUNT_WEIGHT * amount_score + (1 - AMOUNT_WEIGHT) * token_score
+        if identifiers:
+            score = AMOUNT_WEIGHT + (1 - AMOUNT_WEIGHT) * (1 + amount_score) / 2
+        return round(score, 4), reasons
+
+    @staticmethod
+    def suggest(transaction, offset=0, limit=10, candidates_offset=0, candidates_limit=20):
+        """
+        Build the suggestion response for one bank transaction.
+
+        Args:
+            transaction (BankTransaction): Transaction to match
+            offset (int): Suggestions to skip
+            limit (int): Suggestions per page
+            candidates_offset (int): Candidate students to skip
+            candidates_limit (int): Candidate students per page
+
+        Returns:
+            dict: suggestions page (best score first), total_suggestions,
+                unmatched_students page (closest dues first) and paging info
+        """
+        amount = float(transaction.amount or 0)
+        tokens = tokenize(transaction.bank_ref, transaction.bank_description)
+
+        # Students: amount band around the transaction plus reference hits
+        students = {}
+        if amount > 0:
+            band, _ = MatchSuggestionService.nearest_students(
+                amount,
+                limit=AMOUNT_POOL_SIZE,
+                lower=amount * (1 - SIMILAR_AMOUNT_RATIO),
+                upper=amount * (1 + SIMILAR_AMOUNT_RATIO)
+            )
+            students.update((row.id, row) for row in band)
+        students.update((row.id, row) for row in MatchSuggestionService.reference_students(tokens))
+
+        suggestions = []
+        for student in students.values():
+            score, reasons = MatchSuggestionService.score_student(student, amount, tokens)
+            if score <= 0:
+                continue
+            suggestions.append({
+                'type': 'student',
+                'student_id': student.id,
+                'student_name': student.username,
+                'student_email': student.email,
+                'dues_balance': student.dues_balance,
+                'score': score,
+                'match_confidence': _confidence(score),
+                'reason': '; '.join(reasons)
+            })
+
+        # Received payments with the same amount within 7 days
+        if transaction.transaction_date and amount > 0:
+            payments = db.session.query(Payment, User.username).join(
+                User, User.id == Payment.student_id
+            ).filter(
+                Payment.amount == transaction.amount,
+                Payment.payment_date >= transaction.transaction_date - timedelta(days=7),
+                Payment.payment_date <= transaction.transaction_date + timedelta(days=7),
+                Payment.status == 'RECEIVED'
+            ).order_by(Payment.id).limit(AMOUNT_POOL_SIZE).all()
+
+            references = {payment.reference_number.lower() for payment, _ in payments if payment.reference_number}
+            for payment, username in payments:
+                reference_hit = bool(payment.reference_number) and payment.reference_number.lower() in tokens
+                suggestions.append({
+                    'type': 'payment',
+                    'payment_id': payment.id,
+                    'student_name': username,
+                    'amount': payment.amount,
+                    'payment_date': payment.payment_date.strftime('%Y-%m-%d') if payment.payment_date else None,
+                    'score': 1.0 if reference_hit else AMOUNT_WEIGHT,
+                    'match_confidence': 'HIGH',
+                    'reason': 'Exact amount, date and reference match' if reference_hit else 'Exact amount and date match'
+                })
+            tokens_without_payments = tokens - references
+        else:
+            tokens_without_payments = tokens
+
+        # Payments whose reference number appears in the transaction text
+        # (upper/lower variants keep the lookup on idx_payment_reference)
+        if tokens_without_payments:
+            variants = sorted({variant for token in tokens_without_payments for variant in (token, token.upper())})
+            referenced = db.session.query(Payment, User.username).join(
+                User, User.id == Payment.student_id
+            ).filter(
+                Payment.reference_number.in_(variants)
+            ).order_by(Payment.id).limit(AMOUNT_POOL_SIZE).all()
+            suggested = {s['payment_id'] for s in suggestions if s['type'] == 'payment'}
+            for payment, username in referenced:
+                if payment.id in suggested:
+                    continue
+                suggestions.append({
+                    'type': 'payment',
+                    'payment_id': payment.id,
+                    'student_name': username,
+                    'amount': payment.amount,
+                    'payment_date': payment.payment_date.strftime('%Y-%m-%d') if payment.payment_date else None,
+                    'score': 1 - AMOUNT_WEIGHT,
+                    'match_confidence': 'MEDIUM',
+                    'reason': 'Reference number match'
+                })
+
+        suggestions.sort(key=lambda s: (-s['score'], s['type'] != 'payment', s.get('payment_id') or s.get('student_id')))
+
+        candidates, has_more = MatchSuggestionService.nearest_students(
+            amount, offset=candidates_offset, limit=candidates_limit
+        )
+
+        return {
+            'suggestions': suggestions[offset:offset + limit],
+            'total_suggestions': len(suggestions),
+            'offset': offset,
+            'limit': limit,
+            'unmatched_students': [
+                {
+                    'student_id': row.id,
+                    'student_name': row.username,
+                    'dues_balance': row.dues_balance
+                }
+                for row in candidates
+            ],
+            'candidates_offset': candidates_offset,
+            'candidates_limit': candidates_limit,
+            'has_more_candidates': has_more
+        }
@@ -0,0 +1,196 @@
+"""
+Penalty Service
+===============
+Set-based penalty application.
+
+A chunk of students is charged with one atomic UPDATE
+(dues_balance = dues_balance + :amount WHERE id IN (...) AND dues_balance > 0),
+so concurrent payments are never overwritten by a read-modify-write of
+the balance. On databases with UPDATE ... RETURNING (SQLite, PostgreSQL)
+that single statement also returns the new balances; on MySQL the chunk's
+rows are locked with SELECT ... FOR UPDATE first and the balances read
+back after the UPDATE. The Penalty, Notification and ActionLog rows of the
+chunk are then written with one executemany INSERT each, the ledger rows
+refreshed, and the chunk committed.
+
+Callers that may run twice for the same cause (`flask finance enforce`)
+pass an idempotency key per student. Keys already in the penalties table
+are skipped, and the unique constraint on the column rolls back a chunk
+that races another run, so a student is never charged twice for one key.
+"""
+
+from models import db, User, Penalty, Notification, ActionLog
+from sqlalchemy import insert, update
+from services.finance_queries import batched
+from services.job_queue import report_progress
+from services.ledger import LedgerService
+from utils.validators import parse_id
+
+
+# Students charged per UPDATE and transaction
+PENALTY_CHUNK_SIZE = 1000
+
+
+class PenaltyPartialFailure(Exception):
+    """A chunk failed after earlier chunks were committed."""
+
+    def __init__(self, error, applied_count, total_penalties):
+        super().__init__(str(error))
+        self.error = error
+        self.applied_count = applied_count
+        self.total_penalties = total_penalties
+
+
+class PenaltyService:
+    """
+    Atomic bulk penalties.
+    """
+
+    @staticmethod
+    def _charge(student_ids, amount):
+        """
+        Add amount to the dues of the given students that still owe money,
+        in one atomic UPDATE.
+
+        Returns:
+            dict: {student_id: (username, new dues_balance)} of charged students
+        """
+        eligible = (
+            User.id.in_(student_ids),
+            User.is_admin == False,
+            User.dues_balance > 0
+        )
+        statement = update(User).where(*eligible).values(
+            dues_balance=User.dues_balance + amount
+        ).execution_options(synchronize_session=False)
+
+        if db.engine.dialect.update_returning:
+            rows = db.session.execute(statement.returning(User.id, User.username, User.dues_balance)).all()
+            return {row.id: (row.username, row.dues_balance) for row in rows}
+
+        # No UPDATE ... RETURNING (MySQL): lock the eligible rows, update them, read them back
+        locked = [
+            row.id for row in db.session.query(User.id).filter(*eligible).with_for_update().all()
+        ]
+        if not locked:
+            return {}
+        db.session.execute(statement)
+        rows = db.session.query(User.id, User.username, User.dues_balance).filter(User.id.in_(locked)).all()
+        return {row.id: (row.username, row.dues_balance) for row in rows}
+
+    @staticmethod
+    def apply_bulk(student_ids, amount, penalty_type, admin_id, notes="Bulk penalty application",
+                   chunk_size=PENALTY_CHUNK_SIZE, action_type='BULK_PENALTY', idempotency_keys=None):
+        """
+        Charge a penalty to every listed student with outstanding dues.
+
+        Args:
+            student_ids (list): Students to charge (repeats are charged once)
+            amount (float): Penalty amount (shown in messages as given)
+            penalty_type (str): e.g. LATE_FEE
+            admin_id (int): Admin applying the penalties (None for scheduled runs)
+            notes (str): Stored on each Penalty row
+            chunk_size (int): Students per UPDATE and transaction
+            action_type (str): ActionLog type of the audit rows
+            idempotency_keys (dict): {student_id: key} stored on the Penalty rows;
+                students whose key already exists are skipped (optional)
+
+        Returns:
+            dict: applied_count, total_penalties and details in request order:
+                {"student_id", "penalty_amount", "new_dues"} for charged students,
+                {"student_id", "status", "reason"} for skipped/failed ones
+
+        Raises:
+            PenaltyPartialFailure: A chunk failed; earlier chunks stay committed
+        """
+        display_amount = amount
+        amount = float(amount)
+        requested = []
+        seen = set()
+        for student_id in student_ids:
+            key = parse_id(student_id)
+            if key not in seen or key is None:
+                requested.append(student_id)
+                seen.add(key)
+
+        details = []
+        applied_count = 0
+        for position, chunk in enumerate(batched(requested, chunk_size)):
+            try:
+                ids = {parse_id(student_id) for student_id in chunk} - {None}
+                already_applied = set()
+                if idempotency_keys and ids:
+                    already_applied = {
+                        row.student_id for row in db.session.query(Penalty.student_id).filter(
+                            Penalty.idempotency_key.in_([idempotency_keys[key] for key in ids])
+                        ).all()
+                    }
+                charged = PenaltyService._charge(ids - already_applied, amount) if ids - already_applied else {}
+
+                # Tell "no dues" from "not a student" for the ids that were not charged
+                uncharged = ids - set(charged) - already_applied
+                students_without_dues = {
+                    row.id for row in db.session.query(User.id).filter(
+                        User.id.in_(uncharged), User.is_admin == False
+                    ).all()
+                } if uncharged else set()
+
+                if charged:
+                    db.session.execute(insert(Penalty), [
+                        {
+                            'student_id': student_id,
+                            'amount': amount,
+                            'penalty_type': penalty_type,
+                            'applied_by': admin_id,
+                            'notes': notes,
+                            'idempotency_key': idempotency_keys[student_id] if idempotency_keys else None
+                        }
+                        for student_id in charged
+                    ])
+                    db.session.execute(insert(Notification), [
+                        {
+                            'student_id': student_id,
+                            'notification_type': 'PENALTY_APPLIED',
+                            'message': f"Late fee penalty of ${display_amount} has been applied to your account.",
+                            'is_read': False
+                        }
+                        for student_id in charged
+                    ])
+                    db.session.execute(insert(ActionLog), [
+                        {
+                            'student_id': student_id,
+                            'action_type': action_type,
+                            'action_description': f"Applied ${display_amount} penalty ({penalty_type}) to student {username} (ID: {student_id})",
+                            'performed_by': admin_id
+                        }
+                        for student_id, (username, _) in charged.items()
+                    ])
+                    LedgerService.refresh_students(charged)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                raise PenaltyPartialFailure(e, applied_count, amount * applied_count)
+
+            for student_id in chunk:
+                key = parse_id(student_id)
+                if key in charged:
+                    details.append({
+                        "student_id": student_id,
+                        "penalty_amount": amount,
+                        "new_dues": float(charged[key][1])
+                    })
+                    applied_count += 1
+                elif key in already_applied:
+                    details.append({"student_id": student_id, "status": "skipped", "reason": "Penalty already applied"})
+                elif key in students_without_dues:
+                    details.append({"student_id": student_id, "status": "skipped", "reason": "No outstanding dues"})
+                else:
+                    details.append({"student_id": student_id, "status": "failed", "reason": "Student not found"})
+
+            report_progress(min((position + 1) * chunk_size, len(requested)), len(requested))
+
+        return {
+            "applied_count": applied_count,
+            "total_penalties": amount * applied_count,
+            "details": details
+        }
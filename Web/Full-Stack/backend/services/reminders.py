@@ -0,0 +1,146 @@
+"""
+Reminder Service
+================
+Bulk payment reminders for students with outstanding dues.
+
+Targets are read as plain (id, username, dues_balance) rows: one query for
+"all" indebted students, one IN query per chunk for an explicit id list.
+Each chunk's messages are rendered in Python and its Notification and
+ActionLog rows are written with two executemany INSERTs, the students'
+ledger last_reminder_at set with one UPDATE, then committed,
+so a term-start run over 15k students is a few dozen statements and
+never one huge unit of work. Progress is reported per chunk for
+?async=true jobs.
+"""
+
+from datetime import datetime, timezone
+
+from models import db, User, Notification, ActionLog
+from sqlalchemy import insert
+from services.finance_queries import batched
+from services.job_queue import report_progress
+from services.ledger import LedgerService
+from utils.validators import parse_id
+
+
+# Students whose reminders are written and committed together
+REMINDER_CHUNK_SIZE = 1000
+
+REMINDER_TEMPLATES = {
+    'default': "Reminder: You have outstanding dues of ${dues:.2f}. Please make a payment to avoid penalties.",
+    'urgent': "URGENT: You have outstanding dues of ${dues:.2f}. Payment is overdue. Please contact the finance office immediately.",
+}
+
+
+def render_reminder(template, dues_balance):
+    """Reminder text for a student (unknown templates use the default one)."""
+    return REMINDER_TEMPLATES.get(template, REMINDER_TEMPLATES['default']).format(dues=dues_balance)
+
+
+class ReminderPartialFailure(Exception):
+    """A chunk failed after earlier chunks were committed."""
+
+    def __init__(self, error, sent_count, failed_count):
+        super().__init__(str(error))
+        self.error = error
+        self.sent_count = sent_count
+        self.failed_count = failed_count
+
+
+class ReminderService:
+    """
+    Set-based bulk reminders.
+    """
+
+    @staticmethod
+    def _student_columns():
+        return db.session.query(User.id, User.username, User.dues_balance).filter(User.is_admin == False)
+
+    @staticmethod
+    def _lookup(student_ids):
+        """{id: row} for the students among the given ids (one IN query)."""
+        ids = {parse_id(student_id) for student_id in student_ids} - {None}
+        if not ids:
+            return {}
+        rows = ReminderService._student_columns().filter(User.id.in_(ids)).all()
+        return {row.id: row for row in rows}
+
+    @staticmethod
+    def send_bulk(student_ids, admin_id, message_template='default', contact_method='EMAIL',
+                  chunk_size=REMINDER_CHUNK_SIZE):
+        """
+        Write a PAYMENT_REMINDER notification and a BULK_REMINDER action log
+        for each student, committing every chunk.
+
+        Args:
+            student_ids (list or "all"): Students to remind, or "all" with dues
+            admin_id (int): Admin sending the reminders
+            message_template (str): 'default' or 'urgent'
+            contact_method (str): Recorded in the action log (EMAIL, SMS, ...)
+            chunk_size (int): Students per INSERT batch and transaction
+
+        Returns:
+            dict: sent_count, failed_count and details
+                ([{"student_id", "status", "reason"?}])
+
+        Raises:
+            ReminderPartialFailure: A chunk failed; earlier chunks stay committed
+        """
+        if student_ids == "all":
+            rows = ReminderService._student_columns().filter(User.dues_balance > 0).order_by(User.id).all()
+            requested = [row.id for row in rows]
+            known = {row.id: row for row in rows}
+        else:
+            requested = list(student_ids)
+            known = None
+
+        sent_count = 0
+        failed_count = 0
+        details = []
+
+        for chunk in batched(requested, chunk_size):
+            students = known if known is not None else ReminderService._lookup(chunk)
+            sent_at = datetime.now(timezone.utc)
+            notifications = []
+            action_logs = []
+            for student_id in chunk:
+                student = students.get(parse_id(student_id))
+                if student is None:
+                    details.append({"student_id": student_id, "status": "failed", "reason": "Student not found"})
+                    failed_count += 1
+                    continue
+
+                dues_balance = float(student.dues_balance) if student.dues_balance else 0.0
+                notifications.append({
+                    'student_id': student.id,
+                    'notification_type': 'PAYMENT_REMINDER',
+                    'message': render_reminder(message_template, dues_balance),
+                    'is_read': False,
+                    'created_at': sent_at
+                })
+                action_logs.append({
+                    'student_id': student.id,
+                    'action_type': 'BULK_REMINDER',
+                    'action_description': f"Sent {contact_method} reminder to student {student.username} (ID: {student.id}). Template: {message_template}",
+                    'performed_by': admin_id
+                })
+                details.append({"student_id": student.id, "status": "sent"})
+
+            try:
+                if notifications:
+                    db.session.execute(insert(Notification), notifications)
+                    db.session.execute(insert(ActionLog), action_logs)
+                    LedgerService.record_reminders([row['student_id'] for row in notifications], sent_at)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                raise ReminderPartialFailure(e, sent_count, failed_count)
+
+            sent_count += len(notifications)
+            report_progress(sent_count + failed_count, len(requested))
+
+        return {
+            "sent_count": sent_count,
+            "failed_count": failed_count,
+            "details": details
+        }
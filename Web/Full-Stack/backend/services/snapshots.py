@@ -0,0 +1,66 @@
+"""
+Finance Snapshot Service
+========================
+Captures the daily FinanceSnapshot rows used for period-over-period
+comparisons on the finance dashboard.
+"""
+
+from datetime import datetime, timezone
+
+from models import db, FinanceSnapshot
+from services.finance_queries import FinanceQueries
+
+
+class SnapshotService:
+    """
+    Capture and lookup helpers for FinanceSnapshot.
+    """
+
+    @staticmethod
+    def capture(snapshot_date=None):
+        """
+        Record today's dashboard totals (re-running on the same day
+        overwrites that day's row, so the job is safe to retry).
+
+        Args:
+            snapshot_date (date): Day to record the totals under (default: today, UTC)
+
+        Returns:
+            FinanceSnapshot: The created or updated snapshot (committed)
+        """
+        snapshot_date = snapshot_date or datetime.now(timezone.utc).date()
+        metrics = FinanceQueries.summary_metrics()
+
+        snapshot = FinanceSnapshot.query.filter_by(snapshot_date=snapshot_date).first()
+        if snapshot is None:
+            snapshot = FinanceSnapshot(snapshot_date=snapshot_date)
+            db.session.add(snapshot)
+
+        snapshot.total_collected = metrics["total_collected"]
+        snapshot.pending_payments = metrics["pending_payments"]
+        snapshot.total_students = metrics["total_students"]
+        snapshot.unpaid_students = metrics["unpaid_students"]
+        db.session.commit()
+        return snapshot
+
+    @staticmethod
+    def latest_on_or_before(day):
+        """
+        Most recent snapshot taken on or before the given day.
+
+        Args:
+            day (date): Upper bound for snapshot_date
+
+        Returns:
+            FinanceSnapshot or None
+        """
+        return FinanceSnapshot.query.filter(
+            FinanceSnapshot.snapshot_date <= day
+        ).order_by(FinanceSnapshot.snapshot_date.desc()).first()
+
+    @staticmethod
+    def percent_change(current, previous):
+        """Percentage change from previous to current (0.0 when there is no baseline)."""
+        if not previous:
+            return 0.0
+        return ((current - previous) / previous) * 100
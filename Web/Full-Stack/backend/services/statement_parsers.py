@@ -0,0 +1,275 @@
+"""
+Bank Statement Parsers
+======================
+Incremental parsers for uploaded bank statements. Each parser reads a
+binary file-like object line by line (or element by element for XML) and
+yields statement lines in the shape BankMatchingService.parse_line expects:
+
+    {'bank_ref': str, 'amount': str, 'date': 'YYYY-MM-DD', 'description': str}
+
+Only incoming (credit) entries are yielded; debits cannot match student
+payments. Nothing is buffered beyond the current record, so memory stays
+flat regardless of the statement size.
+"""
+
+import codecs
+import csv
+import re
+from datetime import datetime
+from xml.etree.ElementTree import iterparse, ParseError
+
+
+class StatementParseError(ValueError):
+    """Raised when a statement file cannot be parsed."""
+
+
+# CSV header aliases (lowercased) -> statement line field
+CSV_COLUMNS = {
+    'bank_ref': 'bank_ref',
+    'reference': 'bank_ref',
+    'ref': 'bank_ref',
+    'amount': 'amount',
+    'date': 'date',
+    'transaction_date': 'date',
+    'description': 'description',
+    'details': 'description'
+}
+
+
+def _text_lines(stream):
+    """Decode a binary stream as UTF-8 (BOM tolerated), one line at a time."""
+    decoder = codecs.getincrementaldecoder('utf-8-sig')(errors='replace')
+    pending = ''
+    for raw in iter(lambda: stream.read(64 * 1024), b''):
+        pending += decoder.decode(raw)
+        lines = pending.splitlines(keepends=True)
+        pending = lines.pop() if lines and not lines[-1].endswith('\n') else ''
+        for line in lines:
+            yield line
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield pending
+
+
+def parse_csv(stream):
+    """
+    Parse a CSV statement with a header row containing at least bank_ref
+    (or reference), amount and date (YYYY-MM-DD) columns.
+
+    Args:
+        stream: Binary file-like object
+
+    Yields:
+        dict: Statement lines (rows with a non-positive amount are skipped)
+    """
+    reader = csv.reader(_text_lines(stream))
+    header = next(reader, None)
+    if not header:
+        return
+
+    columns = {}
+    for position, name in enumerate(header):
+        field = CSV_COLUMNS.get(name.strip().lower())
+        if field and field not in columns:
+            columns[field] = position
+    missing = {'bank_ref', 'amount', 'date'} - set(columns)
+    if missing:
+        raise StatementParseError(f"CSV header is missing column(s): {', '.join(sorted(missing))}")
+
+    for record in reader:
+        if not any(value.strip() for value in record):
+            continue
+        line = {
+            field: (record[position].strip() if position < len(record) else '')
+            for field, position in columns.items()
+        }
+        try:
+            if float(line['amount'] or 0) <= 0:
+                continue
+        except ValueError:
+            raise StatementParseError(f"Invalid amount on CSV line {reader.line_num}: {line['amount']}")
+        line.setdefault('description', '')
+        yield line
+
+
+# :61: statement line - value date, optional entry date, debit/credit mark,
+# optional funds code, amount, transaction type, customer ref [//bank ref]
+MT940_LINE = re.compile(
+    r'^(?P<date>\d{6})(?P<entry>\d{4})?(?P<mark>R?[CD])(?P<funds>[A-Z])?'
+    r'(?P<amount>\d+(?:,\d*)?)(?P<type>[A-Z][A-Z0-9]{3})?(?P<customer_ref>[^/]*)(?://(?P<bank_ref>.*))?$'
+)
+MT940_TAG = re.compile(r'^:(?P<tag>\d{2}[A-Z]?):(?P<value>.*)$')
+
+
+def parse_mt940(stream):
+    """
+    Parse a SWIFT MT940 statement (one or more messages).
+
+    The bank reference after // identifies an entry; when absent the
+    customer reference is used, and NONREF entries get a stable reference
+    built from the statement reference and the entry's position.
+
+    Args:
+        stream: Binary file-like object
+
+    Yields:
+        dict: Statement lines for credit entries
+    """
+    statement_ref = ''
+    entry_number = 0
+    current = None  # Open :61: entry waiting for its :86: details
+    current_tag = None
+
+    def finish(entry):
+        if entry and entry['mark'] == 'C':
+            return {
+                'bank_ref': entry['bank_ref'],
+                'amount': entry['amount'],
+                'date': entry['date'],
+                'description': ' '.join(entry['details']).strip()
+            }
+        return None
+
+    for raw in _text_lines(stream):
+        text = raw.rstrip('\r\n')
+        match = MT940_TAG.match(text)
+        if not match:
+            if text.strip() in ('-', '-}', '}'):
+                current_tag = None
+                continue
+            # Continuation line of the previous tag
+            if current is not None and current_tag in ('61', '86'):
+                current['details'].append(text.strip())
+            continue
+
+        tag, value = match.group('tag'), match.group('value').strip()
+        current_tag = tag[:2]
+
+        if tag == '20':
+            statement_ref = value
+            entry_number = 0
+        elif tag == '61':
+            line = finish(current)
+            if line:
+                yield line
+            entry = MT940_LINE.match(value)
+            if not entry:
+                raise StatementParseError(f"Invalid MT940 :61: line: {value}")
+            entry_number += 1
+            try:
+                date = datetime.strptime(entry.group('date'), '%y%m%d').strftime('%Y-%m-%d')
+            except ValueError:
+                raise StatementParseError(f"Invalid MT940 value date: {entry.group('date')}")
+            bank_ref = (entry.group('bank_ref') or '').strip()
+            customer_ref = (entry.group('customer_ref') or '').strip()
+            if not bank_ref:
+                bank_ref = customer_ref if customer_ref and customer_ref.upper() != 'NONREF' \
+                    else f"{statement_ref}/{entry_number}"
+            current = {
+                'bank_ref': bank_ref,
+                'amount': entry.group('amount').replace(',', '.'),
+                'date': date,
+                'mark': entry.group('mark'),
+                'details': [customer_ref] if customer_ref.upper() != 'NONREF' else []
+            }
+        elif tag == '86' and current is not None:
+            current['details'].append(value)
+        elif tag in ('62F', '62M'):
+            line = finish(current)
+            if line:
+                yield line
+            current = None
+
+    line = finish(current)
+    if line:
+        yield line
+
+
+def _local(tag):
+    """Element name without its XML namespace."""
+    return tag.rsplit('}', 1)[-1]
+
+
+def _find_text(element, *path):
+    """Text of the first descendant following path (local names), or ''."""
+    for name in path:
+        element = next((child for child in element if _local(child.tag) == name), None)
+        if element is None:
+            return ''
+    return (element.text or '').strip()
+
+
+def parse_camt053(stream):
+    """
+    Parse an ISO 20022 CAMT.053 statement with iterparse, dropping each
+    <Ntry> once it has been read so the tree never grows.
+
+    Args:
+        stream: Binary file-like object
+
+    Yields:
+        dict: Statement lines for credit (CRDT) entries
+    """
+    entry_number = 0
+    statement_id = ''
+    parents = []
+    try:
+        for event, element in iterparse(stream, events=('start', 'end')):
+            if event == 'start':
+                parents.append(element)
+                continue
+            parents.pop()
+
+            name = _local(element.tag)
+            if name == 'GrpHdr':
+                statement_id = _find_text(element, 'MsgId')
+            if name != 'Ntry':
+                continue
+
+            entry_number += 1
+            if _find_text(element, 'CdtDbtInd') == 'CRDT' and _find_text(element, 'RvslInd').lower() != 'true':
+                date = (_find_text(element, 'BookgDt', 'Dt') or _find_text(element, 'BookgDt', 'DtTm')
+                        or _find_text(element, 'ValDt', 'Dt') or _find_text(element, 'ValDt', 'DtTm'))
+                bank_ref = (_find_text(element, 'AcctSvcrRef')
+                            or _find_text(element, 'NtryDtls', 'TxDtls', 'Refs', 'AcctSvcrRef')
+                            or _find_text(element, 'NtryDtls', 'TxDtls', 'Refs', 'EndToEndId'))
+                if not bank_ref or bank_ref.upper() == 'NOTPROVIDED':
+                    bank_ref = f"{statement_id}/{entry_number}"
+                description = ' '.join(part for part in (
+                    _find_text(element, 'NtryDtls', 'TxDtls', 'Refs', 'EndToEndId'),
+                    _find_text(element, 'NtryDtls', 'TxDtls', 'RmtInf', 'Ustrd'),
+                    _find_text(element, 'AddtlNtryInf')
+                ) if part and part.upper() != 'NOTPROVIDED')
+                amount = _find_text(element, 'Amt')
+                try:
+                    float(amount)
+                except ValueError:
+                    raise StatementParseError(f"Invalid amount in CAMT.053 entry {entry_number}: {amount!r}")
+                yield {
+                    'bank_ref': bank_ref,
+                    'amount': amount,
+                    'date': date[:10],
+                    'description': description
+                }
+            # Detach the finished entry so the parsed tree never grows
+            if parents:
+                parents[-1].remove(element)
+    except ParseError as e:
+        raise StatementParseError(f"Invalid CAMT.053 XML: {str(e)}")
+
+
+# Upload format -> parser
+STATEMENT_PARSERS = {
+    'csv': parse_csv,
+    'mt940': parse_mt940,
+    'camt053': parse_camt053
+}
+
+# File extension -> format, used when the upload does not name one
+STATEMENT_EXTENSIONS = {
+    'csv': 'csv',
+    'sta': 'mt940',
+    'mt940': 'mt940',
+    'txt': 'mt940',
+    'xml': 'camt053'
+}
@@ -0,0 +1,50 @@
+"""
+Shared fixtures: the app on a throwaway SQLite database, filled by the
+synthetic university generator (benchmarks/generator.py).
+
+Run from the backend directory with `python -m pytest`.
+"""
+
+import os
+import sys
+
+import pytest
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope='session')
+def app(tmp_path_factory):
+    # config.py reads DATABASE_URI at import time, so set it before importing the app.
+    # Always override it: the generator drops every table of the target database.
+    os.environ['DATABASE_URI'] = f"sqlite:///{tmp_path_factory.mktemp('db') / 'test.db'}"
+    from app import create_app
+
+    app = create_app()
+    app.config.update(TESTING=True)
+    return app
+
+
+@pytest.fixture
+def university(app):
+    """A freshly generated 200-student university; yields the generated row counts."""
+    from benchmarks.generator import generate
+
+    with app.app_context():
+        yield generate(students=200, seed=42)
+
+
+@pytest.fixture
+def statements(university):
+    """SQL statements executed while the test runs, in order."""
+    from models import db
+
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    yield executed
+    event.remove(db.engine, 'before_cursor_execute', record)
@@ -0,0 +1,82 @@
+from datetime import date, datetime, timedelta
+
+from flask_jwt_extended import create_access_token
+from pytest import approx
+
+from models import db, User, Enrollment, Penalty, Payment
+from services.aging import AgingService, allocate_fifo
+
+
+def _brute_force_aging(as_of):
+    """Allocate every student's payments one charge at a time, oldest first."""
+    cutoff = datetime.combine(as_of + timedelta(days=1), datetime.min.time())
+    charges = {}
+    for enrollment in Enrollment.query.filter(Enrollment.enrollment_date < cutoff).all():
+        if enrollment.status != 'DROPPED':
+            charges.setdefault(enrollment.student_id, []).append((enrollment.enrollment_date, enrollment.course_fee))
+    for penalty in Penalty.query.filter(Penalty.applied_at < cutoff).all():
+        charges.setdefault(penalty.student_id, []).append((penalty.applied_at, penalty.amount))
+    paid = {}
+    for payment in Payment.query.filter(Payment.status == 'RECEIVED', Payment.payment_date < cutoff).all():
+        paid[payment.student_id] = paid.get(payment.student_id, 0.0) + payment.amount
+
+    totals = {'0_30': 0.0, '31_60': 0.0, '61_90': 0.0, 'over_90': 0.0}
+    credit = 0.0
+    for student in User.query.filter(User.is_admin == False).all():
+        remaining = paid.get(student.id, 0.0)
+        for charged_at, amount in sorted(charges.get(student.id, [])):
+            open_amount = max(amount - remaining, 0.0)
+            remaining = max(remaining - amount, 0.0)
+            age = (as_of - charged_at.date()).days
+            if age <= 30:
+                totals['0_30'] += open_amount
+            elif age <= 60:
+                totals['31_60'] += open_amount
+            elif age <= 90:
+                totals['61_90'] += open_amount
+            else:
+                totals['over_90'] += open_amount
+        credit += remaining
+    return totals, credit
+
+
+def test_allocate_fifo_pays_oldest_charges_first():
+    charges = [(datetime(2025, 1, 1), 100.0), (datetime(2025, 3, 15), 100.0), (datetime(2025, 4, 20), 100.0)]
+
+    buckets, credit = allocate_fifo(charges, 150.0, date(2025, 5, 1))
+
+    assert buckets == {'0_30': 100.0, '31_60': 50.0, '61_90': 0.0, 'over_90': 0.0}
+    assert credit == 0.0
+    assert allocate_fifo(charges, 400.0, date(2025, 5, 1)) == ({'0_30': 0.0, '31_60': 0.0, '61_90': 0.0, 'over_90': 0.0}, 100.0)
+
+
+def test_report_matches_brute_force_allocation(university):
+    as_of = date.today() - timedelta(days=45)
+    expected, credit = _brute_force_aging(as_of)
+
+    rows, summary = AgingService.report(as_of=as_of)
+
+    for bucket, amount in expected.items():
+        assert summary[bucket] == approx(amount, abs=0.01)
+        assert sum(row[bucket] for row in rows) == approx(amount, abs=0.05)
+    assert summary['unapplied_credit'] == approx(credit, abs=0.01)
+
+
+def test_net_receivable_equals_outstanding_dues(university):
+    dues = db.session.query(db.func.sum(User.dues_balance)).filter(User.is_admin == False).scalar()
+
+    _, summary = AgingService.report(as_of=date(2030, 1, 1))
+
+    assert summary['net_receivable'] == approx(dues, abs=0.01)
+
+
+def test_aging_report_rejects_malformed_end_date(app, university):
+    admin = User.query.filter_by(is_admin=True).first()
+    headers = {"Authorization": f"Bearer {create_access_token(identity=str(admin.id))}"}
+
+    response = app.test_client().post('/api/finance/reports/generate', headers=headers, json={
+        "report_type": "ar_aging", "end_date": "2025-13-45"
+    })
+
+    assert response.status_code == 400
+    assert "end_date" in response.get_json()["error"]
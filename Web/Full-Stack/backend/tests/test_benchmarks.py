@@ -0,0 +1,53 @@
+from flask import current_app
+
+from benchmarks.harness import run, compare
+
+
+def _row(route, status_code=200, p95_ms=10.0, statements=3):
+    return {'route': route, 'url': route, 'status_code': status_code, 'requests': 5,
+            'p50_ms': p95_ms, 'p95_ms': p95_ms, 'max_ms': p95_ms, 'statements': statements}
+
+
+def _error(route, status_code=500):
+    return {'route': route, 'url': route, 'status_code': status_code, 'requests': 5,
+            'errors': 5, 'error': f"HTTP {status_code} on 5 of 5 requests"}
+
+
+def test_failing_routes_are_errors_without_timings(university):
+    # Baseline bug on generated data: the faculty summary answers 500
+    results = run(current_app._get_current_object(), requests=2, warmup=0, route_filter='/reports/faculty-summary')
+
+    [row] = results
+    assert row['status_code'] == 500
+    assert row['errors'] == 2
+    assert 'p95_ms' not in row
+
+
+def test_successful_routes_are_timed(university):
+    results = run(current_app._get_current_object(), requests=2, warmup=0, route_filter='/payments/recent')
+
+    [row] = results
+    assert row['status_code'] == 200
+    assert 'error' not in row
+    assert row['p95_ms'] > 0
+
+
+def test_status_change_is_a_regression():
+    baseline = [_row('/a'), _error('/b'), _row('/c'), _row('/d', status_code=500, p95_ms=50.0)]
+    results = [_error('/a'), _row('/b'), _row('/c'), _row('/d', p95_ms=90.0)]
+
+    assert compare(results, baseline) == [
+        ('/a', 'status 200 -> 500'),
+        ('/b', 'status 500 -> 200'),
+        ('/d', 'status 500 -> 200'),
+    ]
+
+
+def test_latency_and_statement_regressions():
+    baseline = [_row('/a'), _row('/b'), _row('/c')]
+    results = [_row('/a', p95_ms=30.0), _row('/b', statements=4), _row('/c', p95_ms=11.0)]
+
+    assert compare(results, baseline) == [
+        ('/a', 'p95 10.0ms -> 30.0ms'),
+        ('/b', 'statements 3 -> 4'),
+    ]
@@ -0,0 +1,37 @@
+from datetime import date, timedelta
+
+from models import db, User, Penalty
+from services.enforcement import EnforcementService, parse_rules
+
+
+TODAY = date.today() + timedelta(days=60)
+
+
+def _dues():
+    return {row.id: row.dues_balance for row in db.session.query(User.id, User.dues_balance).all()}
+
+
+def test_second_run_applies_nothing(university):
+    rules = parse_rules("penalty:30:50,block:45")
+
+    first = EnforcementService.run(rules, today=TODAY)
+    assert all(result["applied"] > 0 for result in first["results"])
+    dues = _dues()
+    penalties = Penalty.query.count()
+
+    second = EnforcementService.run(rules, today=TODAY)
+
+    assert [result["applied"] for result in second["results"]] == [0, 0]
+    assert Penalty.query.count() == penalties
+    assert _dues() == dues
+
+
+def test_changed_amount_does_not_recharge(university):
+    first = EnforcementService.run(parse_rules("penalty:30:50"), today=TODAY)
+    assert first["results"][0]["applied"] > 0
+    dues = _dues()
+
+    second = EnforcementService.run(parse_rules("penalty:30:75"), today=TODAY)
+
+    assert second["results"][0]["applied"] == 0
+    assert _dues() == dues
@@ -0,0 +1,34 @@
+from pytest import approx
+
+from models import db, Enrollment, Course, Payment
+from services.finance_queries import FinanceQueries
+
+
+def _payments_by_faculty_per_student():
+    """The original endpoint's algorithm: per-student payment and fee lookups."""
+    faculty_data = {}
+    for enrollment, course in db.session.query(Enrollment, Course).join(Course, Enrollment.course_id == Course.id).filter(
+        Enrollment.status == 'ACTIVE'
+    ).all():
+        faculty = course.faculty.name if course.faculty else "Unknown"
+        totals = faculty_data.setdefault(faculty, {"total": 0.0, "collected": 0.0})
+        totals["total"] += enrollment.course_fee
+
+        total_paid = sum(
+            p.amount for p in Payment.query.filter_by(student_id=enrollment.student_id, status='RECEIVED').all()
+        )
+        total_fees = sum(e.course_fee for e in Enrollment.query.filter_by(student_id=enrollment.student_id).all())
+        if total_fees > 0:
+            totals["collected"] += (enrollment.course_fee / total_fees) * total_paid
+    return faculty_data
+
+
+def test_payments_by_faculty_matches_per_student_algorithm(university):
+    expected = _payments_by_faculty_per_student()
+
+    rows = FinanceQueries.payments_by_faculty()
+
+    assert {row.name for row in rows} == set(expected)
+    for row in rows:
+        assert float(row.total) == approx(expected[row.name]["total"])
+        assert float(row.collected) == approx(expected[row.name]["collected"])
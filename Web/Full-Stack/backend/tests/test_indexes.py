@@ -0,0 +1,67 @@
+import pytest
+from flask import current_app
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+from benchmarks.harness import url_values
+from models import db
+
+
+# (method, url, JSON body, indexes the endpoint's SELECTs must use)
+ENDPOINTS = [
+    ('GET', '/api/finance/payments/recent', None, {'idx_payment_student_date'}),
+    ('GET', '/api/finance/payments/pending', None, {'idx_payment_method_status_created'}),
+    ('GET', '/api/finance/students/{student_id}', None, {
+        'idx_payment_student_date', 'idx_notification_student_created', 'idx_action_log_student_created'
+    }),
+    ('GET', '/api/finance/student-fees?student_id={student_id}', None, {'idx_payment_student_status'}),
+    ('GET', '/api/finance/bank-reconciliation', None, {'idx_bank_txn_status_date', 'idx_bank_txn_date'}),
+    ('GET', '/api/finance/bank-reconciliation/suggestions/{transaction_id}', None, {
+        'idx_payment_status_date', 'idx_payment_reference'
+    }),
+    # Ledger refresh after the write reads the student's penalties
+    ('PUT', '/api/finance/action/penalty/{student_id}', {"penalty_amount": 50}, {'idx_penalty_student'}),
+    # Candidate payments inside the statement's date window
+    ('POST', '/api/finance/bank-reconciliation/sync', {
+        "source": "manual",
+        "transactions": [{"bank_ref": "TEST-1", "amount": "123.45", "date": "2025-06-01", "description": ""}]
+    }, {'idx_payment_date'}),
+]
+
+
+def _indexes_used(app, method, url, body, headers):
+    """Indexes in the EXPLAIN QUERY PLAN of every SELECT the request sent."""
+    selects = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT') and not executemany:
+            selects.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        # A fresh app context per request, as in check_budgets
+        with app.app_context():
+            response = app.test_client().open(url, method=method, json=body, headers=headers)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    assert response.status_code < 400, response.get_data(as_text=True)
+
+    used = set()
+    with db.engine.connect() as conn:
+        for statement, parameters in selects:
+            for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters):
+                detail = row[-1]
+                if ' INDEX ' in detail:
+                    used.add(detail.split(' INDEX ', 1)[1].split()[0])
+    return used
+
+
+@pytest.mark.parametrize('method, url, body, indexes', ENDPOINTS, ids=[f"{m} {u}" for m, u, _, _ in ENDPOINTS])
+def test_endpoint_uses_indexes(university, method, url, body, indexes):
+    app = current_app._get_current_object()
+    values = url_values()
+    headers = {"Authorization": f"Bearer {create_access_token(identity=str(values['admin_id']))}"}
+
+    used = _indexes_used(app, method, url.format(**values), body, headers)
+
+    assert indexes <= used
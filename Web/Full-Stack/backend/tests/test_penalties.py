@@ -0,0 +1,50 @@
+from models import db, User, Penalty
+from services.penalties import PenaltyService
+
+
+def _students_with_dues(count):
+    return [
+        row.id for row in db.session.query(User.id).filter(
+            User.is_admin == False, User.dues_balance > 0
+        ).order_by(User.id).limit(count).all()
+    ]
+
+
+def test_apply_bulk_skips_students_without_dues(university):
+    owing = _students_with_dues(2)
+    settled = owing.pop()
+    db.session.get(User, settled).dues_balance = 0
+    db.session.commit()
+
+    result = PenaltyService.apply_bulk([owing[0], settled], amount=25, penalty_type='LATE_FEE', admin_id=None)
+
+    assert result["applied_count"] == 1
+    assert result["details"][1] == {"student_id": settled, "status": "skipped", "reason": "No outstanding dues"}
+    assert Penalty.query.filter_by(student_id=settled).count() == 0
+    assert db.session.get(User, settled).dues_balance == 0
+
+
+def test_apply_bulk_charges_repeated_ids_once(university):
+    student_id = _students_with_dues(1)[0]
+    before = float(db.session.get(User, student_id).dues_balance)
+    penalties_before = Penalty.query.filter_by(student_id=student_id).count()
+
+    result = PenaltyService.apply_bulk(
+        [student_id, str(student_id), student_id], amount=25, penalty_type='LATE_FEE', admin_id=None
+    )
+
+    assert result["applied_count"] == 1
+    assert len(result["details"]) == 1
+    assert Penalty.query.filter_by(student_id=student_id).count() == penalties_before + 1
+    db.session.expire_all()
+    assert float(db.session.get(User, student_id).dues_balance) == before + 25
+
+
+def test_apply_bulk_issues_one_update_per_chunk(university, statements):
+    student_ids = _students_with_dues(10)
+
+    result = PenaltyService.apply_bulk(student_ids, amount=10, penalty_type='LATE_FEE', admin_id=None, chunk_size=4)
+
+    assert result["applied_count"] == 10
+    balance_updates = [sql for sql in statements if sql.lstrip().upper().startswith('UPDATE USERS')]
+    assert len(balance_updates) == 3
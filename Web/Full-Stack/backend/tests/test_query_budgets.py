@@ -0,0 +1,13 @@
+from flask import current_app
+
+from benchmarks.harness import url_values
+from utils.query_budget import check_budgets
+
+
+def test_every_budgeted_endpoint_stays_within_budget(university):
+    values = url_values()
+
+    results = check_budgets(current_app._get_current_object(), values['admin_id'], values)
+
+    assert results
+    assert [row for row in results if row['result'] != 'ok'] == []
@@ -0,0 +1,55 @@
+import json
+import logging
+
+from flask import Flask
+
+from utils.request_metrics import RequestMetrics, logger
+
+
+def _worker(store_path, window=1000):
+    """RequestMetrics as bound in one gunicorn worker using the shared store."""
+    app = Flask(__name__)
+    app.config.update(REQUEST_METRICS_PATH=str(store_path), REQUEST_METRICS_WINDOW=window)
+    metrics = RequestMetrics()
+    metrics.init_app(app)
+    return metrics
+
+
+def test_every_request_is_logged_at_info(app, caplog):
+    response = app.test_client().get('/api/health')
+
+    assert response.status_code == 200
+    assert logger.getEffectiveLevel() == logging.INFO
+    assert logger.handlers
+    lines = [record for record in caplog.records if record.name == 'request_metrics']
+    assert [record.levelno for record in lines] == [logging.INFO]
+    assert json.loads(lines[0].getMessage())['route'] == 'GET /api/health'
+
+
+def test_shared_store_reports_every_worker(tmp_path):
+    first, second = _worker(tmp_path / 'metrics.db'), _worker(tmp_path / 'metrics.db')
+    slow = [{'ms': 80.0, 'statement': 'SELECT 1', 'path': '/api/finance/summary'}]
+
+    first.record('GET /api/finance/summary', 10.0, 2.0, 3, 200)
+    second.record('GET /api/finance/summary', 30.0, 4.0, 3, 500, slow)
+
+    for worker in (first, second):
+        [route] = worker.report()
+        assert route['requests'] == 2
+        assert route['errors'] == 1
+        assert route['duration_ms']['max'] == 30.0
+        assert route['slowest_statements'] == slow
+
+    second.reset()
+    assert first.report() == []
+
+
+def test_shared_store_keeps_a_bounded_window(tmp_path):
+    first, second = _worker(tmp_path / 'metrics.db', window=3), _worker(tmp_path / 'metrics.db', window=3)
+
+    for duration in range(1, 6):
+        (first if duration % 2 else second).record('GET /api/finance/summary', float(duration), 1.0, 3, 200)
+
+    [route] = first.report()
+    assert route['requests'] == 3
+    assert route['duration_ms']['p50'] == 4.0
@@ -0,0 +1,38 @@
+import io
+
+import pytest
+
+from services.statement_parsers import parse_camt053, StatementParseError
+
+
+CAMT053 = """<?xml version="1.0" encoding="UTF-8"?>
+<Document xmlns="urn:iso:std:iso:20022:tech:xsd:camt.053.001.02">
+  <BkToCstmrStmt>
+    <GrpHdr><MsgId>STMT-1</MsgId></GrpHdr>
+    <Stmt>
+      <Ntry>
+        <Amt Ccy="USD">{amount}</Amt>
+        <CdtDbtInd>CRDT</CdtDbtInd>
+        <BookgDt><Dt>2025-03-01</Dt></BookgDt>
+        <AcctSvcrRef>REF-1</AcctSvcrRef>
+      </Ntry>
+    </Stmt>
+  </BkToCstmrStmt>
+</Document>
+"""
+
+
+def _parse(amount):
+    return list(parse_camt053(io.BytesIO(CAMT053.format(amount=amount).encode())))
+
+
+def test_camt053_yields_credit_entries():
+    assert _parse('1500.00') == [
+        {'bank_ref': 'REF-1', 'amount': '1500.00', 'date': '2025-03-01', 'description': ''}
+    ]
+
+
+@pytest.mark.parametrize('amount', ['', '   ', '1,500.00', 'abc'])
+def test_camt053_rejects_malformed_amount(amount):
+    with pytest.raises(StatementParseError, match='Invalid amount'):
+        _parse(amount)
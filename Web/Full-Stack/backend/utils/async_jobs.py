@@ -0,0 +1,50 @@
+"""
+================================================================================
+ASYNC ENDPOINT SUPPORT
+================================================================================
+Decorator letting a heavy endpoint run as a background job: called with
+?async=true it queues the request (see services/job_queue.py) and answers
+202 with the job id instead of doing the work inside the gunicorn worker.
+"""
+
+from functools import wraps
+
+from flask import g, jsonify, request, url_for
+from flask_jwt_extended import get_jwt_identity
+from models import db
+from services.job_queue import JobQueue
+
+
+def async_capable(fn):
+    """
+    Queue the request as a Job when it carries ?async=true.
+
+    Place it below the authentication decorators (the job records the
+    caller's identity) and before anything that reads the request body.
+
+    Usage:
+        @finance_bp.route("/action/bulk-reminder", methods=["POST"])
+        @jwt_required()
+        @require_admin
+        @async_capable
+        def bulk_reminder():
+            ...
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        if request.args.get('async', '').lower() != 'true' or g.get('job_run') is not None:
+            return fn(*args, **kwargs)
+
+        try:
+            job = JobQueue.enqueue_request(created_by=get_jwt_identity())
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({"error": f"Failed to queue job: {str(e)}"}), 500
+
+        return jsonify({
+            "msg": "Job queued",
+            "job_id": job.id,
+            "status": job.status,
+            "status_url": url_for('finance.get_job', job_id=job.id)
+        }), 202
+    return wrapper
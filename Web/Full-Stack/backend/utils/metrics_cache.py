@@ -0,0 +1,291 @@
+"""
+================================================================================
+DASHBOARD METRICS CACHE
+================================================================================
+Small cache for expensive dashboard aggregates (finance summary, etc.).
+
+Two tiers:
+- An in-process LRU, so repeated polls from the same worker cost nothing.
+- An optional SQLite file (METRICS_CACHE_PATH) shared by every gunicorn
+  worker on the host, so one worker's computation serves all of them.
+
+Entries depend on database tables ("tags"). Each tag has a generation
+counter; committing a write to a table bumps its generation, which makes
+every entry computed under the old generation a miss. With the shared store
+the counters live in SQLite, so a write on one worker invalidates the
+others too. Everything else is bounded by a TTL with stale-while-revalidate:
+a slightly stale value is served immediately while a background thread
+recomputes it.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+
+class MetricsCache:
+    """
+    Two-tier (process LRU + optional shared SQLite) cache with table-based
+    invalidation. Create once at import time and bind with init_app().
+    """
+
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self.ttl = 60
+        self.stale_ttl = 300
+        self.store_path = None
+        self._local = OrderedDict()  # key -> (value, stored_at, generations)
+        self._generations = {}       # tag -> generation (used without a shared store)
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Setup
+    # ------------------------------------------------------------------
+    def init_app(self, app):
+        """
+        Read configuration and register the SQLAlchemy session hooks that
+        invalidate entries when their tables change.
+
+        Config:
+            METRICS_CACHE_TTL (int): Seconds a value is served as fresh
+            METRICS_CACHE_STALE_TTL (int): Extra seconds a value may be served
+                stale while it is recomputed in the background
+            METRICS_CACHE_PATH (str): SQLite file shared by all workers (optional)
+        """
+        self.ttl = app.config.get('METRICS_CACHE_TTL', self.ttl)
+        self.stale_ttl = app.config.get('METRICS_CACHE_STALE_TTL', self.stale_ttl)
+        self.store_path = app.config.get('METRICS_CACHE_PATH') or None
+
+        if self.store_path:
+            try:
+                with self._connect() as conn:
+                    conn.execute('PRAGMA journal_mode=WAL')
+                    conn.execute(
+                        'CREATE TABLE IF NOT EXISTS metrics_cache '
+                        '(key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL, generations TEXT NOT NULL)'
+                    )
+                    conn.execute(
+                        'CREATE TABLE IF NOT EXISTS metrics_generations '
+                        '(tag TEXT PRIMARY KEY, generation INTEGER NOT NULL)'
+                    )
+            except sqlite3.Error as e:
+                app.logger.warning(f"Metrics cache store disabled ({self.store_path}): {str(e)}")
+                self.store_path = None
+
+        if not event.contains(Session, 'after_flush', _collect_flushed_tables):
+            event.listen(Session, 'after_flush', _collect_flushed_tables)
+            event.listen(Session, 'do_orm_execute', _collect_bulk_tables)
+            event.listen(Session, 'after_commit', _invalidate_committed_tables)
+            event.listen(Session, 'after_rollback', _discard_pending_tables)
+
+    @contextmanager
+    def _connect(self):
+        """Short-lived connection to the shared store (committed and closed on exit)."""
+        conn = sqlite3.connect(self.store_path, timeout=1)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    # ------------------------------------------------------------------
+    # Generations
+    # ------------------------------------------------------------------
+    def _current_generations(self, tags):
+        """Return {tag: generation} for the given tags."""
+        tags = sorted(tags)
+        if self.store_path:
+            try:
+                with self._connect() as conn:
+                    placeholders = ','.join('?' for _ in tags)
+                    rows = conn.execute(
+                        f'SELECT tag, generation FROM metrics_generations WHERE tag IN ({placeholders})', tags
+                    ).fetchall()
+                found = dict(rows)
+                return {tag: found.get(tag, 0) for tag in tags}
+            except sqlite3.Error as e:
+                current_app.logger.warning(f"Metrics cache store read failed: {str(e)}")
+        with self._lock:
+            return {tag: self._generations.get(tag, 0) for tag in tags}
+
+    def invalidate(self, tags):
+        """
+        Bump the generation of each tag, turning every entry that depends on
+        it into a miss (for all workers when the shared store is enabled).
+
+        Args:
+            tags (iterable): Table names whose data changed
+        """
+        tags = sorted(set(tags))
+        if not tags:
+            return
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+        if self.store_path:
+            try:
+                with self._connect() as conn:
+                    conn.executemany(
+                        'INSERT INTO metrics_generations (tag, generation) VALUES (?, 1) '
+                        'ON CONFLICT(tag) DO UPDATE SET generation = generation + 1',
+                        [(tag,) for tag in tags]
+                    )
+            except sqlite3.Error as e:
+                current_app.logger.warning(f"Metrics cache invalidation failed: {str(e)}")
+
+    # ------------------------------------------------------------------
+    # Entries
+    # ------------------------------------------------------------------
+    def _read(self, key, generations):
+        """
+        Look key up in the process LRU, then in the shared store when the
+        local copy is missing, invalidated or past its stale window.
+        """
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is not None:
+                self._local.move_to_end(key)
+                if entry[2] == generations and time.time() - entry[1] < self.ttl + self.stale_ttl:
+                    return entry
+        if self.store_path:
+            try:
+                with self._connect() as conn:
+                    row = conn.execute(
+                        'SELECT value, stored_at, generations FROM metrics_cache WHERE key = ?', (key,)
+                    ).fetchone()
+                if row:
+                    entry = (json.loads(row[0]), row[1], json.loads(row[2]))
+                    self._write_local(key, entry)
+            except (sqlite3.Error, ValueError) as e:
+                current_app.logger.warning(f"Metrics cache store read failed: {str(e)}")
+        return entry
+
+    def _write_local(self, key, entry):
+        with self._lock:
+            self._local[key] = entry
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_entries:
+                self._local.popitem(last=False)
+
+    def set(self, key, value, generations):
+        """Store a computed value together with the generations it was computed under."""
+        entry = (value, time.time(), generations)
+        self._write_local(key, entry)
+        if self.store_path:
+            try:
+                with self._connect() as conn:
+                    conn.execute(
+                        'INSERT OR REPLACE INTO metrics_cache (key, value, stored_at, generations) VALUES (?, ?, ?, ?)',
+                        (key, json.dumps(value), entry[1], json.dumps(generations))
+                    )
+            except (sqlite3.Error, TypeError) as e:
+                current_app.logger.warning(f"Metrics cache store write failed: {str(e)}")
+
+    def get_or_compute(self, key, compute, tags):
+        """
+        Return the cached value for key, computing it when missing.
+
+        - Fresh (younger than TTL, same generations): returned as is.
+        - Stale (within TTL + stale TTL, same generations): returned as is and
+          recomputed in a background thread.
+        - Invalidated, expired or missing: computed synchronously.
+
+        Args:
+            key (str): Cache key
+            compute (callable): Zero-argument function returning a JSON-serializable value
+            tags (iterable): Table names the value depends on
+
+        Returns:
+            The cached or freshly computed value
+        """
+        generations = self._current_generations(tags)
+        entry = self._read(key, generations)
+
+        if entry is not None:
+            value, stored_at, entry_generations = entry
+            age = time.time() - stored_at
+            if entry_generations == generations:
+                if age < self.ttl:
+                    return value
+                if age < self.ttl + self.stale_ttl:
+                    self._revalidate(key, compute, tags)
+                    return value
+
+        value = compute()
+        self.set(key, value, generations)
+        return value
+
+    def _revalidate(self, key, compute, tags):
+        """Recompute key in a background thread (once per key at a time)."""
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        app = current_app._get_current_object()
+
+        def refresh():
+            try:
+                with app.app_context():
+                    generations = self._current_generations(tags)
+                    self.set(key, compute(), generations)
+            except Exception as e:
+                app.logger.warning(f"Metrics cache refresh of {key} failed: {str(e)}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def clear(self):
+        """Drop every cached entry (generations are kept)."""
+        with self._lock:
+            self._local.clear()
+        if self.store_path:
+            try:
+                with self._connect() as conn:
+                    conn.execute('DELETE FROM metrics_cache')
+            except sqlite3.Error as e:
+                current_app.logger.warning(f"Metrics cache clear failed: {str(e)}")
+
+
+metrics_cache = MetricsCache()
+
+
+# ============================================================================
+# SQLAlchemy session hooks - invalidate on commit of the tables that changed
+# ============================================================================
+def _collect_flushed_tables(session, flush_context):
+    """Remember which tables this transaction wrote through the unit of work."""
+    tables = session.info.setdefault('metrics_cache_tables', set())
+    for instance in list(session.new) + list(session.dirty) + list(session.deleted):
+        table_name = getattr(instance, '__tablename__', None)
+        if table_name:
+            tables.add(table_name)
+
+
+def _collect_bulk_tables(orm_execute_state):
+    """Remember tables written by bulk INSERT/UPDATE/DELETE statements."""
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None:
+            tables = orm_execute_state.session.info.setdefault('metrics_cache_tables', set())
+            tables.add(mapper.persist_selectable.name)
+
+
+def _invalidate_committed_tables(session):
+    tables = session.info.pop('metrics_cache_tables', None)
+    if tables:
+        metrics_cache.invalidate(tables)
+
+
+def _discard_pending_tables(session):
+    session.info.pop('metrics_cache_tables', None)
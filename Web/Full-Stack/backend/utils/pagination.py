@@ -0,0 +1,235 @@
+"""
+================================================================================
+KEYSET (CURSOR) PAGINATION UTILITIES
+================================================================================
+Helpers for paginating large result sets by (sort key, id) instead of
+OFFSET/LIMIT. A cursor is an opaque, URL-safe token that encodes the sort
+values of the last row on the previous page, so fetching the next page is a
+single indexed range scan no matter how deep the client has scrolled.
+
+List endpoints share paginate() for ordering, cursors and the limit + 1
+look-ahead, and count_rows() for an exact, estimated or skipped total.
+Orderings on nullable columns assume NULL sorts lowest (MySQL, SQLite).
+"""
+
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, or_, func
+
+
+# Count modes accepted by list endpoints (?count=)
+COUNT_MODES = ('exact', 'estimate', 'none')
+
+# Rows an estimated count reads before falling back to planner statistics
+COUNT_ESTIMATE_CAP = 10000
+
+
+def encode_cursor(*values):
+    """
+    Encode the sort values of the last row on a page into an opaque cursor.
+
+    Args:
+        *values: Sort key values followed by the row id, e.g. (5000.0, 42)
+
+    Returns:
+        str: URL-safe cursor token
+    """
+    payload = []
+    for value in values:
+        if isinstance(value, datetime):
+            payload.append({"dt": value.isoformat()})
+        else:
+            payload.append(value)
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor, size=2):
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Args:
+        cursor (str): Cursor token from the client
+        size (int): Number of values the cursor must contain
+
+    Returns:
+        list: Decoded sort values
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {str(e)}")
+
+    if not isinstance(payload, list) or len(payload) != size:
+        raise ValueError("Invalid cursor")
+
+    values = []
+    for value in payload:
+        if isinstance(value, dict) and "dt" in value:
+            values.append(datetime.fromisoformat(value["dt"]))
+        else:
+            values.append(value)
+    return values
+
+
+def keyset_filter(sort_column, id_column, last_sort_value, last_id, descending=True, nullable=False):
+    """
+    Build the WHERE predicate that selects rows strictly after the cursor.
+
+    The id column breaks ties so rows sharing a sort value are never skipped
+    or repeated between pages. Rows are assumed ordered by
+    (sort_column, id_column) in the same direction.
+
+    Args:
+        sort_column: Column the page is ordered by
+        id_column: Unique tie-breaker column (usually the primary key)
+        last_sort_value: Sort value of the last row on the previous page
+        last_id: Id of the last row on the previous page
+        descending (bool): Whether the ordering is descending
+        nullable (bool): Whether sort_column may be NULL (NULL sorts lowest,
+            i.e. last when descending and first when ascending)
+
+    Returns:
+        SQLAlchemy boolean expression
+    """
+    if nullable and last_sort_value is None:
+        if descending:
+            return and_(sort_column.is_(None), id_column < last_id)
+        return or_(sort_column.isnot(None), and_(sort_column.is_(None), id_column > last_id))
+    if nullable and descending:
+        return or_(
+            sort_column < last_sort_value,
+            and_(sort_column == last_sort_value, id_column < last_id),
+            sort_column.is_(None)
+        )
+    if descending:
+        return or_(
+            sort_column < last_sort_value,
+            and_(sort_column == last_sort_value, id_column < last_id)
+        )
+    return or_(
+        sort_column > last_sort_value,
+        and_(sort_column == last_sort_value, id_column > last_id)
+    )
+
+
+def count_mode_arg(args, keyset=False):
+    """
+    Read the ?count= mode of a list request.
+
+    Args:
+        args: request.args
+        keyset (bool): Whether the request pages by cursor; cursor pages
+            default to an estimate, offset pages to an exact count
+
+    Returns:
+        str: One of COUNT_MODES
+
+    Raises:
+        ValueError: If the mode is unknown
+    """
+    mode = args.get('count') or ('estimate' if keyset else 'exact')
+    if mode not in COUNT_MODES:
+        raise ValueError(f"count must be one of: {', '.join(COUNT_MODES)}")
+    return mode
+
+
+def paginate(query, sort_column, id_column, limit, cursor=None, offset=0,
+             descending=True, nullable=False, row_key=None):
+    """
+    Fetch one page of query ordered by (sort_column, id_column).
+
+    With a cursor the page starts right after the row it encodes (an
+    indexed range scan); otherwise OFFSET is applied, for callers that
+    still page by offset. Either way one extra row is read to tell whether
+    another page exists, and the cursor of the page's last row is returned
+    so offset callers can switch to cursors.
+
+    Args:
+        query: SQLAlchemy query (not yet ordered)
+        sort_column: Column to order by, or None to order by id_column only
+        id_column: Unique tie-breaker column
+        limit (int): Page size
+        cursor (str): Cursor returned as next_cursor by the previous page
+        offset (int): Rows to skip when no cursor is given
+        descending (bool): Order direction for both columns
+        nullable (bool): Whether sort_column may be NULL
+        row_key (callable): Returns (sort value, id) for a result row, or
+            (id,) when sort_column is None
+
+    Returns:
+        tuple: (rows, has_more, next_cursor)
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    columns = [id_column] if sort_column is None else [sort_column, id_column]
+    query = query.order_by(*[column.desc() if descending else column.asc() for column in columns])
+
+    if cursor:
+        values = decode_cursor(cursor, size=len(columns))
+        if sort_column is None:
+            query = query.filter(id_column < values[0] if descending else id_column > values[0])
+        else:
+            query = query.filter(
+                keyset_filter(sort_column, id_column, values[0], values[1], descending=descending, nullable=nullable)
+            )
+    elif offset:
+        query = query.offset(offset)
+
+    rows = query.limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(*row_key(rows[-1])) if has_more and rows else None
+    return rows, has_more, next_cursor
+
+
+def _planner_estimate(query):
+    """Row estimate from the MySQL planner (EXPLAIN), or None elsewhere."""
+    bind = query.session.get_bind()
+    if bind.dialect.name != 'mysql':
+        return None
+    compiled = query.statement.compile(dialect=bind.dialect)
+    plan = query.session.connection().exec_driver_sql(f"EXPLAIN {compiled}", compiled.params).mappings().first()
+    if not plan or plan.get('rows') is None:
+        return None
+    return int(plan['rows'] * float(plan.get('filtered') or 100) / 100)
+
+
+def count_rows(query, mode='exact', cap=COUNT_ESTIMATE_CAP):
+    """
+    Total number of rows matched by query, for list responses.
+
+    - exact: COUNT(*) over the whole result
+    - estimate: exact up to cap rows (reading at most cap + 1); beyond
+      that the planner's estimate (MySQL) or cap + 1, flagged as estimated
+    - none: no count at all
+
+    Args:
+        query: SQLAlchemy query (ordering is ignored)
+        mode (str): One of COUNT_MODES
+        cap (int): Rows an estimate may read
+
+    Returns:
+        tuple: (count or None, estimated)
+    """
+    if mode == 'none':
+        return None, False
+    query = query.order_by(None)
+    if mode == 'exact':
+        return query.count(), False
+
+    capped = query.session.query(func.count()).select_from(query.limit(cap + 1).subquery()).scalar()
+    if capped <= cap:
+        return capped, False
+    try:
+        estimate = _planner_estimate(query)
+    except Exception:
+        estimate = None
+    return max(estimate or 0, cap + 1), True
@@ -0,0 +1,163 @@
+"""
+================================================================================
+QUERY BUDGETS
+================================================================================
+Per-endpoint limits on the number of SQL statements one request may run.
+
+Every statement executed while a request is active is counted by the
+cursor listeners of utils/request_metrics.py. Endpoints declare their
+budget with @query_budget(n). A request that goes over it is logged as a
+warning, or rejected with a 500 when QUERY_BUDGET_ENFORCE is set, which is
+meant for development and CI. Budgets should not depend on the number of
+rows returned: an N+1 pattern breaks them as soon as the data grows.
+Unpaginated endpoints that prefetch in IN (...) batches declare a cost per
+batch on top (@query_budget(n, per_batch=k)) and report how many batches
+they ran with record_batches().
+
+`flask finance check-query-budgets` requests every budgeted GET endpoint
+and exits non-zero when one goes over its budget (see check_budgets).
+"""
+
+from flask import current_app, g, jsonify, request
+from flask_jwt_extended import create_access_token
+
+from utils import request_metrics
+
+
+def query_budget(max_statements, per_batch=0):
+    """
+    Declare the maximum number of SQL statements a request to the decorated
+    view may run (authentication lookups included). Place it directly above
+    the view function; functools.wraps carries the budget to the outer
+    decorators.
+
+    Args:
+        max_statements (int): Statement budget per request
+        per_batch (int): Statements allowed per IN batch the request reports
+            with record_batches()
+    """
+    def decorator(fn):
+        fn.query_budget = max_statements
+        fn.query_budget_per_batch = per_batch
+        return fn
+    return decorator
+
+
+def record_batches(count):
+    """
+    Add count IN batches to the current request's budget (for views
+    declared with per_batch).
+    """
+    g.query_budget_batches = g.get('query_budget_batches', 0) + count
+
+
+def statement_count():
+    """Number of SQL statements run so far by the current request."""
+    return request_metrics.current()['statements']
+
+
+def _endpoint_budget():
+    view = current_app.view_functions.get(request.endpoint) if request.endpoint else None
+    budget = getattr(view, 'query_budget', None)
+    if budget is None:
+        return None
+    return budget + getattr(view, 'query_budget_per_batch', 0) * g.get('query_budget_batches', 0)
+
+
+def init_app(app):
+    """
+    Count statements per request and check them against the endpoint's
+    budget once the view has returned.
+
+    Config:
+        QUERY_BUDGET_ENFORCE (bool): Reject over-budget requests with a 500
+            instead of only logging them
+    """
+    # Statements are counted by the request metrics cursor listeners
+    request_metrics.install_listeners()
+
+    @app.after_request
+    def check_query_budget(response):
+        budget = _endpoint_budget()
+        used = statement_count()
+        if budget is None or used <= budget:
+            return response
+
+        message = f"{request.method} {request.path} ran {used} SQL statements (budget {budget})"
+        current_app.logger.warning(f"Query budget exceeded: {message}")
+        if current_app.config.get('QUERY_BUDGET_ENFORCE'):
+            response = jsonify({"error": f"Query budget exceeded: {message}"})
+            response.status_code = 500
+        return response
+
+
+def budgeted_endpoints(app):
+    """
+    GET routes whose views declare a query budget.
+
+    Returns:
+        list: (rule, budget) pairs sorted by URL (per-batch allowances excluded)
+    """
+    rules = []
+    for rule in app.url_map.iter_rules():
+        view = app.view_functions.get(rule.endpoint)
+        budget = getattr(view, 'query_budget', None)
+        if budget is not None and 'GET' in rule.methods:
+            rules.append((rule, budget))
+    return sorted(rules, key=lambda item: item[0].rule)
+
+
+def check_budgets(app, user_id, url_values=None):
+    """
+    Request every budgeted GET endpoint as the given user and compare the
+    statements each one ran with its budget. Endpoints needing URL values
+    that were not provided are skipped.
+
+    Args:
+        app: Flask application
+        user_id (int): User the requests authenticate as (an admin for the
+            finance endpoints)
+        url_values (dict): Values for URL parameters, e.g. {'student_id': 5}
+
+    Returns:
+        list: dicts with url, budget, statements, status_code and result
+            ('ok', 'over', 'error' or 'skipped')
+    """
+    url_values = url_values or {}
+    with app.app_context():
+        headers = {"Authorization": f"Bearer {create_access_token(identity=str(user_id))}"}
+
+    client = app.test_client()
+    results = []
+    for rule, budget in budgeted_endpoints(app):
+        missing = [name for name in rule.arguments if name not in url_values]
+        if missing:
+            results.append({
+                "url": rule.rule, "budget": budget, "statements": None, "status_code": None,
+                "result": 'skipped', "reason": f"missing {', '.join(sorted(missing))}"
+            })
+            continue
+
+        with app.test_request_context():
+            url = app.url_for(rule.endpoint, **{name: url_values[name] for name in rule.arguments})
+
+        # A fresh app context gives each request its own g (the CLI's context would be
+        # shared otherwise), and the client keeps the request context until the with
+        # block ends, so g is still readable
+        with app.app_context(), client:
+            response = client.get(url, headers=headers)
+            response.get_data()
+            statements = statement_count()
+            budget = _endpoint_budget()
+
+        if response.status_code >= 400:
+            result = 'error'
+        elif statements > budget:
+            result = 'over'
+        else:
+            result = 'ok'
+        results.append({
+            "url": url, "budget": budget, "statements": statements,
+            "status_code": response.status_code, "result": result
+        })
+    return results
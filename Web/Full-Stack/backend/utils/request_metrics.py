@@ -0,0 +1,349 @@
+"""
+================================================================================
+REQUEST METRICS
+================================================================================
+Per-request SQL and timing instrumentation.
+
+SQLAlchemy cursor events time every statement a request runs. For each
+request the middleware records:
+- the number of statements and the total time spent in the database,
+- the slowest statements (SQL text only, never parameters),
+- the total request duration.
+
+These are returned to the client as a Server-Timing header (visible in the
+browser's network panel) and written as one JSON log line per request on
+the "request_metrics" logger (WARNING when slower than
+REQUEST_METRICS_SLOW_MS, INFO otherwise). The most recent samples of each
+route are kept for GET /api/finance/metrics/requests, which reports
+percentiles per route.
+
+Samples live in process memory unless REQUEST_METRICS_PATH names a SQLite
+file. With the file every gunicorn worker on the host appends to the same
+bounded per-route windows, so the percentiles (and a reset) cover all
+workers instead of whichever one answered.
+"""
+
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+logger = logging.getLogger('request_metrics')
+
+PERCENTILES = (50, 90, 95, 99)
+
+# Longest SQL text kept for a slow statement
+STATEMENT_TEXT_LIMIT = 300
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a sorted list (None when empty)."""
+    if not values:
+        return None
+    rank = max(1, -(-len(values) * pct // 100))
+    return values[min(rank, len(values)) - 1]
+
+
+def _summary(values):
+    values = sorted(values)
+    result = {f"p{pct}": percentile(values, pct) for pct in PERCENTILES}
+    result['max'] = values[-1] if values else None
+    return result
+
+
+def _statement_text(statement):
+    text = re.sub(r"\s+", " ", statement).strip()
+    return text if len(text) <= STATEMENT_TEXT_LIMIT else text[:STATEMENT_TEXT_LIMIT - 3] + '...'
+
+
+def current():
+    """
+    SQL stats of the current request: statements, db_ms and slowest
+    ([{"ms", "statement"}], slowest first). Empty outside a request.
+    """
+    if not has_request_context():
+        return {'statements': 0, 'db_ms': 0.0, 'slowest': []}
+    if 'request_sql' not in g:
+        g.request_sql = {'statements': 0, 'db_ms': 0.0, 'slowest': []}
+    return g.request_sql
+
+
+# ----------------------------------------------------------------------
+# SQLAlchemy cursor events
+# ----------------------------------------------------------------------
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        conn.info.setdefault('request_metrics_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if not has_request_context():
+        return
+    started = conn.info.get('request_metrics_started')
+    if not started:
+        return
+    elapsed_ms = (time.perf_counter() - started.pop()) * 1000
+
+    stats = current()
+    stats['statements'] += 1
+    stats['db_ms'] += elapsed_ms
+    slowest = stats['slowest']
+    limit = request_metrics.slow_statements
+    if len(slowest) < limit or elapsed_ms > slowest[-1]['ms']:
+        slowest.append({'ms': round(elapsed_ms, 2), 'statement': _statement_text(statement)})
+        slowest.sort(key=lambda item: -item['ms'])
+        del slowest[limit:]
+
+
+def _discard_failed_statement(exception_context):
+    # after_cursor_execute does not run for a failed statement
+    conn = exception_context.connection
+    if conn is not None and conn.info.get('request_metrics_started'):
+        conn.info['request_metrics_started'].pop()
+
+
+def install_listeners():
+    """Register the cursor event listeners (once per process)."""
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(Engine, 'handle_error', _discard_failed_statement)
+
+
+class RequestMetrics:
+    """
+    Request instrumentation and per-route sample windows. Create once at
+    import time and bind with init_app().
+    """
+
+    def __init__(self, window=1000):
+        self.window = window
+        self.slow_ms = 1000
+        self.slow_statements = 3
+        self.server_timing = True
+        self.store_path = None
+        self._samples = {}    # route -> deque of (duration_ms, db_ms, statements, status)
+        self._slowest = {}    # route -> slowest statements since the last reset
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """
+        Install the cursor listeners and the request hooks.
+
+        Config:
+            REQUEST_METRICS_WINDOW (int): Samples kept per route
+            REQUEST_METRICS_SLOW_MS (int): Requests at least this slow are
+                logged as warnings
+            REQUEST_METRICS_SLOW_STATEMENTS (int): Slowest statements kept
+                per request
+            REQUEST_METRICS_SERVER_TIMING (bool): Add the Server-Timing header
+            REQUEST_METRICS_LOG_LEVEL (str): Level of the request_metrics
+                logger (INFO logs every request, WARNING only slow ones)
+            REQUEST_METRICS_PATH (str): SQLite file holding the samples of
+                all workers (optional; default: per process memory)
+        """
+        self.window = app.config.get('REQUEST_METRICS_WINDOW', self.window)
+        self.slow_ms = app.config.get('REQUEST_METRICS_SLOW_MS', self.slow_ms)
+        self.slow_statements = app.config.get('REQUEST_METRICS_SLOW_STATEMENTS', self.slow_statements)
+        self.server_timing = app.config.get('REQUEST_METRICS_SERVER_TIMING', self.server_timing)
+        self.store_path = app.config.get('REQUEST_METRICS_PATH') or None
+        install_listeners()
+
+        if self.store_path:
+            try:
+                with self._connect() as conn:
+                    conn.execute('PRAGMA journal_mode=WAL')
+                    conn.execute(
+                        'CREATE TABLE IF NOT EXISTS request_samples (id INTEGER PRIMARY KEY AUTOINCREMENT, '
+                        'route TEXT NOT NULL, duration_ms REAL NOT NULL, db_ms REAL NOT NULL, '
+                        'statements INTEGER NOT NULL, status INTEGER NOT NULL)'
+                    )
+                    conn.execute('CREATE INDEX IF NOT EXISTS idx_request_samples_route ON request_samples (route, id)')
+                    conn.execute(
+                        'CREATE TABLE IF NOT EXISTS request_slowest '
+                        '(route TEXT NOT NULL, ms REAL NOT NULL, statement TEXT NOT NULL, path TEXT)'
+                    )
+            except sqlite3.Error as e:
+                app.logger.warning(f"Request metrics store disabled ({self.store_path}): {str(e)}")
+                self.store_path = None
+
+        # The logger would otherwise inherit the root's WARNING level and drop the INFO lines
+        logger.setLevel(app.config.get('REQUEST_METRICS_LOG_LEVEL', 'INFO'))
+        if not logger.handlers:
+            handler = logging.StreamHandler()
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            logger.addHandler(handler)
+
+        @app.before_request
+        def start_request_timer():
+            g.request_started = time.perf_counter()
+
+        @app.after_request
+        def record_request_metrics(response):
+            if 'request_started' not in g:
+                return response
+            self._finish(response)
+            return response
+
+    def _finish(self, response):
+        duration_ms = (time.perf_counter() - g.request_started) * 1000
+        stats = current()
+        route = f"{request.method} {request.url_rule.rule}" if request.url_rule else f"{request.method} (unmatched)"
+
+        if self.server_timing:
+            response.headers.add(
+                'Server-Timing',
+                f'db;dur={stats["db_ms"]:.2f};desc="{stats["statements"]} statements", '
+                f'app;dur={max(duration_ms - stats["db_ms"], 0):.2f}, total;dur={duration_ms:.2f}'
+            )
+
+        logger.log(
+            logging.WARNING if duration_ms >= self.slow_ms else logging.INFO,
+            json.dumps({
+                'event': 'request',
+                'method': request.method,
+                'route': route,
+                'path': request.path,
+                'status': response.status_code,
+                'duration_ms': round(duration_ms, 2),
+                'db_ms': round(stats['db_ms'], 2),
+                'statements': stats['statements'],
+                'slowest': stats['slowest']
+            })
+        )
+
+        self.record(
+            route, duration_ms, stats['db_ms'], stats['statements'], response.status_code,
+            [dict(item, path=request.path) for item in stats['slowest']]
+        )
+
+    @contextmanager
+    def _connect(self):
+        """Short-lived connection to the shared store (committed and closed on exit)."""
+        conn = sqlite3.connect(self.store_path, timeout=1)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _store_record(self, route, sample, slowest):
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT INTO request_samples (route, duration_ms, db_ms, statements, status) VALUES (?, ?, ?, ?, ?)',
+                (route, *sample)
+            )
+            # Keep the newest `window` samples of the route
+            conn.execute(
+                'DELETE FROM request_samples WHERE route = ? AND id <= ('
+                'SELECT id FROM request_samples WHERE route = ? ORDER BY id DESC LIMIT 1 OFFSET ?)',
+                (route, route, self.window)
+            )
+            if slowest:
+                conn.executemany(
+                    'INSERT INTO request_slowest (route, ms, statement, path) VALUES (?, ?, ?, ?)',
+                    [(route, item['ms'], item['statement'], item.get('path')) for item in slowest]
+                )
+                conn.execute(
+                    'DELETE FROM request_slowest WHERE route = ? AND rowid NOT IN ('
+                    'SELECT rowid FROM request_slowest WHERE route = ? ORDER BY ms DESC LIMIT ?)',
+                    (route, route, self.slow_statements)
+                )
+
+    def _store_snapshot(self):
+        with self._connect() as conn:
+            samples = conn.execute(
+                'SELECT route, duration_ms, db_ms, statements, status FROM request_samples ORDER BY id'
+            ).fetchall()
+            slowest_rows = conn.execute(
+                'SELECT route, ms, statement, path FROM request_slowest ORDER BY ms DESC'
+            ).fetchall()
+
+        snapshot, slowest = {}, {}
+        for route, *sample in samples:
+            snapshot.setdefault(route, []).append(tuple(sample))
+        for route, ms, statement, path in slowest_rows:
+            slowest.setdefault(route, []).append({'ms': ms, 'statement': statement, 'path': path})
+        return snapshot, slowest
+
+    def record(self, route, duration_ms, db_ms, statements, status, slowest=()):
+        """Add one request to the route's sample window."""
+        if self.store_path:
+            try:
+                self._store_record(route, (duration_ms, db_ms, statements, status), list(slowest))
+                return
+            except sqlite3.Error as e:
+                logger.warning(f"Request metrics store write failed: {str(e)}")
+
+        with self._lock:
+            if route not in self._samples:
+                self._samples[route] = deque(maxlen=self.window)
+            self._samples[route].append((duration_ms, db_ms, statements, status))
+
+            kept = self._slowest.get(route, []) + list(slowest)
+            kept.sort(key=lambda item: -item['ms'])
+            self._slowest[route] = kept[:self.slow_statements]
+
+    def report(self, route_filter=None):
+        """
+        Percentiles per route over the current sample windows (of every
+        worker when the shared store is enabled).
+
+        Args:
+            route_filter (str): Only routes containing this text (optional)
+
+        Returns:
+            list: One dict per route (requests, errors, duration_ms, db_ms and
+                statements percentiles, slowest statements), slowest p95 first
+        """
+        snapshot = None
+        if self.store_path:
+            try:
+                snapshot, slowest = self._store_snapshot()
+            except sqlite3.Error as e:
+                logger.warning(f"Request metrics store read failed: {str(e)}")
+        if snapshot is None:
+            with self._lock:
+                snapshot = {route: list(samples) for route, samples in self._samples.items()}
+                slowest = {route: list(items) for route, items in self._slowest.items()}
+
+        routes = []
+        for route, samples in snapshot.items():
+            if route_filter and route_filter not in route:
+                continue
+            durations, db_times, statements, statuses = zip(*samples)
+            routes.append({
+                'route': route,
+                'requests': len(samples),
+                'errors': sum(1 for status in statuses if status >= 500),
+                'duration_ms': {key: round(value, 2) for key, value in _summary(durations).items()},
+                'db_ms': {key: round(value, 2) for key, value in _summary(db_times).items()},
+                'statements': _summary(statements),
+                'slowest_statements': slowest.get(route, [])
+            })
+        return sorted(routes, key=lambda item: -item['duration_ms']['p95'])
+
+    def reset(self):
+        """Drop every sample window (of every worker with the shared store)."""
+        with self._lock:
+            self._samples.clear()
+            self._slowest.clear()
+        if self.store_path:
+            try:
+                with self._connect() as conn:
+                    conn.execute('DELETE FROM request_samples')
+                    conn.execute('DELETE FROM request_slowest')
+            except sqlite3.Error as e:
+                logger.warning(f"Request metrics store reset failed: {str(e)}")
+
+
+request_metrics = RequestMetrics()
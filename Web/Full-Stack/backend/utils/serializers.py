@@ -0,0 +1,145 @@
+"""
+================================================================================
+SERIALIZERS WITH LOAD PLANS
+================================================================================
+Each serializer pairs the function that turns a row into JSON with the
+load plan (selectinload/joinedload options) covering every relationship
+that function touches. Endpoints load rows through serializer.load(query),
+so relationships arrive with the page in a fixed number of statements
+instead of one lazy SELECT per row and hop (enrollment.course.faculty...).
+
+Keep the plan next to the dump function: when a serializer starts reading
+another relationship, extend its plan in the same change. Endpoint query
+budgets (utils/query_budget.py) catch plans that fall behind.
+"""
+
+from sqlalchemy.orm import joinedload, selectinload
+
+from models import BankTransaction, Course, Enrollment, Payment, User
+
+
+class Serializer:
+    """
+    A dump function plus the loader options it needs.
+    """
+
+    def __init__(self, dump, *plan):
+        """
+        Args:
+            dump (callable): Row -> dict
+            *plan: SQLAlchemy loader options for the relationships dump reads
+        """
+        self.dump = dump
+        self.plan = plan
+
+    def load(self, query):
+        """Apply the load plan to a query returning the rows to serialize."""
+        return query.options(*self.plan) if self.plan else query
+
+    def __call__(self, row):
+        return self.dump(row)
+
+    def many(self, rows):
+        return [self.dump(row) for row in rows]
+
+
+# ============================================================================
+# Payments
+# ============================================================================
+def _payment_status_label(status):
+    if status == 'PENDING':
+        return "Pending"
+    if status == 'FAILED':
+        return "Failed"
+    return "Paid"
+
+
+def _first_enrollment_faculty(student):
+    """Faculty of the student's first course (lowest enrollment id), or 'Unknown'."""
+    if not student.enrollments:
+        return "Unknown"
+    enrollment = min(student.enrollments, key=lambda e: e.id)
+    if enrollment.course and enrollment.course.faculty:
+        return enrollment.course.faculty.name
+    return "Unknown"
+
+
+def _dump_recent_payment(row):
+    payment, student = row
+    return {
+        "id": f"PAY-{payment.id}",
+        "payment_id": payment.id,
+        "student_id": student.id,
+        "student_name": student.username,
+        "faculty": _first_enrollment_faculty(student),
+        "amount": payment.amount,
+        "date": payment.payment_date.strftime('%b %d, %Y') if payment.payment_date else 'N/A',
+        "status": _payment_status_label(payment.status)
+    }
+
+
+# (Payment, User) rows of the dashboard's recent payments list
+recent_payment = Serializer(
+    _dump_recent_payment,
+    selectinload(User.enrollments).joinedload(Enrollment.course).joinedload(Course.faculty)
+)
+
+
+def _dump_pending_payment(payment):
+    result = payment.to_dict(include_student=True)
+    if payment.student:
+        result['student_balance'] = payment.student.dues_balance
+    return result
+
+
+# Payments awaiting verification, with student details and balance
+pending_payment = Serializer(_dump_pending_payment, joinedload(Payment.student))
+
+
+# ============================================================================
+# Courses and enrollments
+# ============================================================================
+course_with_faculty = Serializer(
+    lambda course: course.to_dict(include_faculty=True),
+    joinedload(Course.faculty)
+)
+
+
+def _dump_enrollment(enrollment):
+    return {
+        "id": enrollment.id,
+        "course_name": enrollment.course.name if enrollment.course else "Unknown Course",
+        "course_fee": enrollment.course_fee,
+        "enrollment_date": enrollment.enrollment_date.isoformat() if enrollment.enrollment_date else None,
+        "status": enrollment.status
+    }
+
+
+# Enrollments listed on the finance student detail page
+enrollment_with_course = Serializer(_dump_enrollment, joinedload(Enrollment.course))
+
+
+def _dump_student_enrollment(enrollment):
+    return {
+        "id": enrollment.id,
+        "course_id": enrollment.course_id,
+        "course_name": enrollment.course.name,
+        "credits": enrollment.course.credits,
+        "course_fee": enrollment.course_fee,
+        "enrollment_date": enrollment.enrollment_date.isoformat(),
+        "status": enrollment.status
+    }
+
+
+# Enrollments on the student's own status page (rows without a course are skipped by the caller)
+student_enrollment = Serializer(_dump_student_enrollment, joinedload(Enrollment.course))
+
+
+# ============================================================================
+# Bank reconciliation
+# ============================================================================
+bank_transaction_detail_plan = (
+    joinedload(BankTransaction.matcher),
+    joinedload(BankTransaction.matched_payment).joinedload(Payment.student),
+    joinedload(BankTransaction.matched_student)
+)
@@ -0,0 +1,92 @@
+"""
+================================================================================
+STREAMING RESPONSE UTILITIES
+================================================================================
+Helpers for sending large reports row by row instead of building the whole
+payload in memory. Rows are read through a server-side cursor and written
+out as NDJSON or CSV by a Flask generator response, so worker memory and
+time-to-first-byte stay flat no matter how many students are in the report.
+"""
+
+import csv
+import io
+import json
+
+from flask import Response, stream_with_context
+from models import db
+
+
+# Supported values for the ?stream= query parameter
+STREAM_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+# Rows fetched from the database per round trip while streaming
+STREAM_CHUNK_SIZE = 500
+
+
+def iter_query_chunks(statement, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Execute a SELECT through a server-side cursor and yield its rows in chunks.
+
+    The cursor runs on its own connection so the request session stays free
+    for follow-up prefetch queries while the result is still open (MySQL
+    cannot interleave statements on a connection with an unbuffered result).
+
+    Args:
+        statement: SQLAlchemy selectable (e.g. query.statement)
+        chunk_size (int): Rows per chunk
+
+    Yields:
+        list: Row objects, at most chunk_size per chunk
+    """
+    with db.engine.connect() as connection:
+        result = connection.execution_options(
+            stream_results=True,
+            max_row_buffer=chunk_size
+        ).execute(statement)
+        for partition in result.partitions(chunk_size):
+            yield partition
+
+
+def _csv_line(values):
+    """Render one CSV record as a string."""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(values)
+    return buffer.getvalue()
+
+
+def stream_rows(rows, stream_format, csv_fields, filename, csv_mapper=None):
+    """
+    Wrap an iterator of row dicts in a streaming NDJSON or CSV response.
+
+    Args:
+        rows (iterable): Row dictionaries, produced lazily
+        stream_format (str): 'ndjson' or 'csv'
+        csv_fields (list): Column names (and order) for CSV output
+        filename (str): Download file name without extension
+        csv_mapper (callable): Optional function flattening a row for CSV
+
+    Returns:
+        Response: Chunked Flask response
+    """
+    def generate():
+        if stream_format == 'csv':
+            yield _csv_line(csv_fields)
+            for row in rows:
+                flat = csv_mapper(row) if csv_mapper else row
+                yield _csv_line([flat.get(field) for field in csv_fields])
+        else:
+            for row in rows:
+                yield json.dumps(row, default=str) + "\n"
+
+    extension = 'csv' if stream_format == 'csv' else 'ndjson'
+    return Response(
+        stream_with_context(generate()),
+        mimetype=STREAM_FORMATS[stream_format],
+        headers={
+            'Content-Disposition': f'attachment; filename="{filename}.{extension}"',
+            'X-Accel-Buffering': 'no'  # Let nginx pass chunks through immediately
+        }
+    )
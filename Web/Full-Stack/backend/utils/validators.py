@@ -9,3 +9,14 @@ def validate_required(data, fields):
             "error": f"Missing required fields: {', '.join(missing)}"
         }
     return None
+
+
+def parse_id(value):
+    """Integer id from a request value (int or digit string), else None."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str) and value.isdigit():
+        return int(value)
+    return None